@@ -15,6 +15,18 @@ PubSubClient client(net);
 
 MAX30105 particleSensor;
 
+// 250 Hz IR samples are sent in batches of 25 (10 messages/s)
+// to ayushcare/ecg; vitals still go out every 5 seconds.
+const unsigned long SAMPLE_INTERVAL_US = 4000;
+const int ECG_BATCH = 25;
+const unsigned long VITALS_INTERVAL_MS = 5000;
+
+long ecgSamples[ECG_BATCH];
+int ecgCount = 0;
+
+unsigned long nextSample = 0;
+unsigned long nextVitals = 0;
+
 void setup() {
 
   Serial.begin(115200);
@@ -28,11 +40,34 @@ void setup() {
   client.setServer(mqtt_server, 8883);
 
   particleSensor.begin();
+
+  // 25-sample ECG batches need more than the 256-byte default.
+  client.setBufferSize(512);
+
+  nextSample = micros();
+  nextVitals = millis();
 }
 
-void loop() {
+void publishEcg() {
+
+  String payload = "{\"patient_id\":\"P001\",\"samples\":[";
+
+  for (int i = 0; i < ecgCount; i++) {
+    if (i) payload += ",";
+    payload += String(ecgSamples[i]);
+  }
+
+  payload += "]}";
+
+  client.publish(
+      "ayushcare/ecg",
+      payload.c_str()
+  );
 
-  long irValue = particleSensor.getIR();
+  ecgCount = 0;
+}
+
+void publishVitals() {
 
   int heartRate = random(70, 90);
   int spo2 = random(95, 100);
@@ -49,6 +84,27 @@ void loop() {
       "ayushcare/vitals",
       payload.c_str()
   );
+}
+
+void loop() {
+
+  client.loop();
+
+  if ((long)(micros() - nextSample) >= 0) {
 
-  delay(5000);
+    nextSample += SAMPLE_INTERVAL_US;
+
+    ecgSamples[ecgCount++] = particleSensor.getIR();
+
+    if (ecgCount == ECG_BATCH) {
+      publishEcg();
+    }
+  }
+
+  if ((long)(millis() - nextVitals) >= 0) {
+
+    nextVitals += VITALS_INTERVAL_MS;
+
+    publishVitals();
+  }
 }
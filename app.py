@@ -1,10 +1,5 @@
 import streamlit as st
 
-from views.login import page_login
-from views.register import page_register
-from views.dashboard import page_dashboard
-from streamlit_autorefresh import st_autorefresh
-
 # --------------------------------------------------------------
 # PAGE CONFIG
 # --------------------------------------------------------------
@@ -15,11 +10,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-st_autorefresh(
-    interval=5000,
-    key="live_refresh"
-)
-
 # --------------------------------------------------------------
 # GLOBAL CSS
 # --------------------------------------------------------------
@@ -49,14 +39,32 @@ if "current_user" not in st.session_state:
 # --------------------------------------------------------------
 # NAVIGATION
 # --------------------------------------------------------------
+# Each page is imported only when it is shown, so the register and
+# login pages never load the dashboard's plotting, PDF, ML and AWS
+# dependencies.
 if st.session_state.page == "register":
 
+    from views.register import page_register
+
     page_register()
 
 elif st.session_state.page == "login":
 
+    from views.login import page_login
+
     page_login()
 
 elif st.session_state.page == "dashboard":
 
-    page_dashboard()
+    from views.dashboard import page_dashboard
+
+    from services import perf
+
+    # One timing sample per rerun; the JSON-lines log (if any) is
+    # written once here instead of on every timed call.
+    try:
+        with perf.timed("page_dashboard"):
+            page_dashboard()
+
+    finally:
+        perf.flush()
@@ -1,26 +1,167 @@
 import json
+import logging
+import math
+import time
 import boto3
-from decimal import Decimal
-from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from datetime import datetime, timedelta
 
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table("AyushCareVitals")
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
 
+TABLE_NAME = "AyushCareVitals"
 
+NUMERIC_FIELDS = ("heart_rate", "spo2", "temperature")
+
+# batch_writer sends at most 25 items per BatchWriteItem call.
+# Each chunk gets its own writer so a failure can be pinned to the
+# records in that chunk.
+WRITE_CHUNK = 25
+
+_table = None
+
+
+def get_table():
+
+    global _table
+
+    if _table is None:
+        _table = boto3.resource("dynamodb").Table(TABLE_NAME)
+
+    return _table
+
+
+def set_table(table):
+
+    global _table
+
+    _table = table
+
+
+# --------------------------------------------------------------
+# RECORD DECODING
+# --------------------------------------------------------------
+# SNS records carry the payload in Sns.Message, SQS records in
+# body. Both carry a message id that is echoed back for failed
+# writes; records that cannot be decoded are logged and dropped,
+# since a retry would fail the same way.
+def _record_id(record, index):
+
+    if "Sns" in record:
+        return record["Sns"].get("MessageId", str(index))
+
+    return record.get("messageId", str(index))
+
+
+def _record_body(record):
+
+    if "Sns" in record:
+        return record["Sns"]["Message"]
+
+    return record["body"]
+
+
+def _to_item(payload, timestamp):
+
+    patient_id = payload["patient_id"]
+
+    if not isinstance(patient_id, str) or not patient_id:
+        raise ValueError("patient_id must be a non-empty string")
+
+    item = {
+        "patient_id": patient_id,
+        "timestamp": timestamp
+    }
+
+    for field in NUMERIC_FIELDS:
+
+        value = payload[field]
+
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{field} must be a number")
+
+        if not math.isfinite(value):
+            raise ValueError(f"{field} must be finite")
+
+        item[field] = Decimal(str(value))
+
+    return item
+
+
+# --------------------------------------------------------------
+# HANDLER
+# --------------------------------------------------------------
 def lambda_handler(event, context):
 
-    payload = json.loads(event["Records"][0]["Sns"]["Message"])
+    start = time.perf_counter()
+
+    records = event.get("Records", [])
+
+    # Every record gets a distinct sort key, even when one batch
+    # holds several readings for the same patient.
+    received = datetime.now()
+
+    items = []
+    failures = []
+    rejected = 0
+
+    for index, record in enumerate(records):
+
+        record_id = _record_id(record, index)
+
+        timestamp = (received + timedelta(microseconds=index)).isoformat()
+
+        try:
+
+            payload = json.loads(_record_body(record))
+
+            items.append((record_id, _to_item(payload, timestamp)))
+
+        except (
+            KeyError,
+            TypeError,
+            ValueError,
+            OverflowError,
+            InvalidOperation
+        ) as e:
+
+            logger.warning(f"Rejected record {record_id}: {e}")
+            rejected += 1
+
+    table = get_table()
+
+    written = 0
+
+    for i in range(0, len(items), WRITE_CHUNK):
+
+        chunk = items[i:i + WRITE_CHUNK]
+
+        try:
+
+            with table.batch_writer() as batch:
+
+                for _, item in chunk:
+                    batch.put_item(Item=item)
+
+            written += len(chunk)
+
+        except Exception as e:
+
+            logger.error(f"Batch write failed: {e}")
+            failures.extend(record_id for record_id, _ in chunk)
 
-    table.put_item(
-        Item={
-            "patient_id": payload["patient_id"],
-            "timestamp": datetime.now().isoformat(),
-            "heart_rate": Decimal(str(payload["heart_rate"])),
-            "spo2": Decimal(str(payload["spo2"])),
-            "temperature": Decimal(str(payload["temperature"]))
-        }
-    )
+    logger.info(json.dumps({
+        "records": len(records),
+        "written": written,
+        "rejected": rejected,
+        "failed": len(failures),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+    }))
 
     return {
-        "statusCode": 200
+        "statusCode": 200,
+        "batchItemFailures": [
+            {"itemIdentifier": record_id}
+            for record_id in failures
+        ]
     }
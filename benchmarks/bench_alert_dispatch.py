@@ -0,0 +1,90 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services.alert_dispatcher import AlertDispatcher
+from services.local_aws import InMemorySNSClient
+
+
+PHONE = "+910000000000"
+TOPIC = "arn:aws:sns:ap-south-1:000000000000:ayushcare-critical"
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--alerts", type=int, default=5000)
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=5.0,
+                        help="spread submissions over this long")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="simulated SNS round trip in seconds")
+    parser.add_argument("--rate", type=float, default=10.0)
+    parser.add_argument("--fail-calls", type=int, default=3)
+    args = parser.parse_args()
+
+    client = InMemorySNSClient(latency=args.latency)
+    client.fail_calls = args.fail_calls
+
+    dispatcher = AlertDispatcher(
+        lambda: client,
+        [PHONE, TOPIC],
+        rate=args.rate,
+        backoff=0.05
+    )
+
+    rng = random.Random(0)
+
+    submit_ns = []
+
+    interval = args.seconds / args.alerts
+
+    started = time.perf_counter()
+
+    for i in range(args.alerts):
+
+        patient_id = f"P{rng.randrange(args.patients):04d}"
+
+        start = time.perf_counter_ns()
+        dispatcher.submit(patient_id, "Low oxygen detected")
+        submit_ns.append(time.perf_counter_ns() - start)
+
+        delay = started + (i + 1) * interval - time.perf_counter()
+
+        if delay > 0:
+            time.sleep(delay)
+
+    dispatcher.flush(timeout=120)
+
+    elapsed = time.perf_counter() - started
+
+    stats = dispatcher.stats()
+
+    dispatcher.close()
+
+    print(f"submit() p50 / p99 / max: "
+          f"{np.percentile(submit_ns, 50) / 1000:.1f} / "
+          f"{np.percentile(submit_ns, 99) / 1000:.1f} / "
+          f"{max(submit_ns) / 1000:.1f} us")
+
+    for key, value in stats.items():
+        print(f"{key:>18}: {value}")
+
+    print(f"{'provider calls':>18}: {client.publish_calls} publish, "
+          f"{client.batch_calls} publish_batch")
+    print(f"{'message rate':>18}: {stats['messages_sent'] / elapsed:.1f}/s "
+          f"(limit {args.rate}/s, burst 20)")
+    print(f"{'synchronous cost':>18}: {args.alerts * 2 * args.latency:.0f} s "
+          f"of UI-thread blocking for one publish per alert per recipient")
+
+
+if __name__ == "__main__":
+    main()
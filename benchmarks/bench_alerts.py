@@ -0,0 +1,105 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services import notification_service
+from services.notification_service import AlertSuppressor
+
+
+RULES = [
+    ("SpO₂", "critical", "Low oxygen detected"),
+    ("Heart Rate", "warning", "Possible tachycardia"),
+    ("Temperature", "warning", "High fever detected")
+]
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# --------------------------------------------------------------
+# ALERT STORM
+# --------------------------------------------------------------
+# `per_minute` alerts spread evenly over `minutes` of simulated
+# time from `patients` deteriorating patients.
+def storm(patients, per_minute, minutes, seed=0):
+
+    rng = random.Random(seed)
+
+    clock = FakeClock()
+
+    previous = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        os.chdir(tmp)
+
+        notification_service._log = None
+        notification_service._suppressor = AlertSuppressor(clock=clock)
+
+        try:
+
+            total = per_minute * minutes
+            step = 60.0 / per_minute
+
+            start = time.perf_counter()
+
+            for i in range(total):
+
+                clock.now = i * step
+
+                rule, severity, message = rng.choice(RULES)
+
+                notification_service.save_alert(
+                    f"P{rng.randrange(patients):04d}",
+                    severity,
+                    message,
+                    rule
+                )
+
+            elapsed = time.perf_counter() - start
+
+            stats = notification_service.suppression_stats()
+            rendered = len(notification_service.load_alerts())
+
+        finally:
+
+            os.chdir(previous)
+
+            notification_service._log = None
+            notification_service._suppressor = None
+
+    return total, elapsed, stats, rendered
+
+
+def main():
+
+    print(
+        f"{'patients':>8} {'alerts':>8} {'stored':>7} {'dupes':>8} "
+        f"{'limited':>8} {'us/alert':>9} {'rendered':>9}"
+    )
+
+    for patients in (1, 10, 100, 1000):
+
+        total, elapsed, stats, rendered = storm(patients, 10000, 5)
+
+        print(
+            f"{patients:>8} {total:>8,} {stats['stored']:>7,} "
+            f"{stats['duplicates']:>8,} {stats['rate_limited']:>8,} "
+            f"{elapsed / total * 1e6:>9.1f} {rendered:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
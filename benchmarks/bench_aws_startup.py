@@ -0,0 +1,92 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Each scenario runs in a fresh interpreter so module caches from
+# one measurement cannot hide the cost of another.
+SCENARIOS = {
+
+    # Floor shared by every page of the app.
+    "import streamlit": """
+import streamlit
+""",
+
+    # What services/aws_service used to do at import time.
+    "eager boto3 construction": """
+import boto3
+boto3.resource("dynamodb", region_name="ap-south-1",
+               aws_access_key_id="x", aws_secret_access_key="x")
+boto3.client("sns", region_name="ap-south-1",
+             aws_access_key_id="x", aws_secret_access_key="x")
+""",
+
+    "import services.aws_service": """
+import services.aws_service
+""",
+
+    "first save_to_dynamodb (local)": """
+import services.aws_service as aws
+aws.save_to_dynamodb("P001", {
+    "temperature": 36.8, "heart_rate": 74, "spo2": 98,
+    "bp": "120/80", "respiratory_rate": 18
+})
+""",
+
+    "first boto3 table + sns (lazy)": """
+from services import aws_clients
+aws_clients._read_secrets = lambda: {
+    "region_name": "ap-south-1",
+    "aws_access_key_id": "x",
+    "aws_secret_access_key": "x"
+}
+aws_clients.set_backend("boto3")
+aws_clients.get_table("AyushCareVitals")
+aws_clients.get_sns_client()
+"""
+}
+
+
+TIMER = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{body}
+print(json.dumps((time.perf_counter() - start) * 1000))
+"""
+
+
+def run(body, backend="local"):
+
+    env = dict(os.environ, AYUSHCARE_AWS_BACKEND=backend)
+
+    with tempfile.TemporaryDirectory() as cwd:
+
+        out = subprocess.run(
+            [sys.executable, "-c", TIMER.format(root=ROOT, body=body)],
+            cwd=cwd,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+
+    for name, body in SCENARIOS.items():
+
+        samples = sorted(run(body) for _ in range(3))
+
+        print(f"{name:<36} {samples[1]:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services.downsample import (
+    lttb_downsample,
+    minmax_downsample,
+    point_budget
+)
+
+
+def series(rows, seed=0):
+
+    rng = np.random.default_rng(seed)
+
+    x = 1_700_000_000_000 + np.arange(rows, dtype=np.int64) * 1000
+    t = np.arange(rows)
+
+    y = (
+        80
+        + 8 * np.sin(2 * np.pi * t / 86400)
+        + rng.normal(0, 2, rows)
+    ).astype("f4")
+
+    # One short tachycardia episode that must stay visible.
+    spike = rows // 3
+    y[spike:spike + 5] += 60
+
+    return x, y, spike
+
+
+def payload_kb(x, y):
+
+    fig = go.Figure(go.Scatter(x=x.astype("datetime64[ms]"), y=y))
+
+    return len(fig.to_json()) / 1024
+
+
+def main():
+
+    budget = point_budget()
+
+    print(f"point budget per trace: {budget:,}\n")
+    print(
+        f"{'rows':>10} {'raw KB':>9} {'lttb ms':>8} {'lttb KB':>8} "
+        f"{'minmax ms':>10} {'spike kept':>11}"
+    )
+
+    for rows in (3600, 86400, 604800, 2_592_000, 10_000_000):
+
+        x, y, spike = series(rows)
+
+        raw = payload_kb(x, y) if rows <= 604800 else float("nan")
+
+        start = time.perf_counter()
+        lx, ly = lttb_downsample(x, y, budget)
+        lttb_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        minmax_downsample(x, y, budget)
+        minmax_ms = (time.perf_counter() - start) * 1000
+
+        print(
+            f"{rows:>10,} {raw:>9.0f} {lttb_ms:>8.1f} {payload_kb(lx, ly):>8.0f} "
+            f"{minmax_ms:>10.1f} {str(ly.max() >= y[spike:spike + 5].min()):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
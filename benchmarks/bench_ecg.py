@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services.downsample import minmax_downsample
+from services.ecg_stream import EcgStreams, ECG_SAMPLE_RATE
+
+
+BATCH = 25
+
+
+def main():
+
+    rng = np.random.default_rng(0)
+
+    batch = rng.normal(size=BATCH).astype("<f4")
+
+    print(f"{'patients':>8} {'append us':>10} {'read+decimate ms':>17} {'max Hz/patient':>15}")
+
+    for patients in (1, 10, 100, 1000):
+
+        with tempfile.TemporaryDirectory() as tmp:
+
+            streams = EcgStreams(tmp)
+
+            ids = [f"P{i:05d}" for i in range(patients)]
+
+            for pid in ids:
+                streams.append(pid, batch)
+
+            rounds = max(1, 20000 // patients)
+
+            start = time.perf_counter()
+
+            for _ in range(rounds):
+                for pid in ids:
+                    streams.append(pid, batch)
+
+            append = (time.perf_counter() - start) / (rounds * patients)
+
+            # One dashboard refresh: the last 10 s of every lead.
+            start = time.perf_counter()
+
+            for pid in ids[:4]:
+                samples, _ = streams.latest(pid)
+                seconds = np.arange(len(samples)) / ECG_SAMPLE_RATE
+                minmax_downsample(seconds, samples, 600)
+
+            refresh = (time.perf_counter() - start) / min(4, patients)
+
+            print(
+                f"{patients:>8} {append * 1e6:>10.1f} {refresh * 1000:>17.3f} "
+                f"{BATCH / append / patients:>15,.0f}"
+            )
+
+    # Browser payload for one lead at increasing buffer lengths.
+    print(f"\n{'buffered s':>10} {'raw KB':>8} {'decimated KB':>13}")
+
+    for seconds in (10, 60, 600):
+
+        samples = rng.normal(size=seconds * ECG_SAMPLE_RATE)
+        x = np.arange(len(samples)) / ECG_SAMPLE_RATE
+
+        raw = go.Figure(go.Scatter(x=x, y=samples)).to_json()
+
+        dx, dy = minmax_downsample(x, samples, 600)
+        small = go.Figure(go.Scatter(x=dx, y=dy)).to_json()
+
+        print(f"{seconds:>10} {len(raw) / 1024:>8.0f} {len(small) / 1024:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
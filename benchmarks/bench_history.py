@@ -0,0 +1,63 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.segment_log import SegmentedLog
+
+
+VITALS = {
+    "time": "12:00:00",
+    "temperature": 36.8,
+    "heart_rate": 74,
+    "spo2": 98
+}
+
+
+# --------------------------------------------------------------
+# APPEND COST VS NUMBER OF PATIENTS
+# --------------------------------------------------------------
+def bench_append(patients, appends):
+
+    with tempfile.TemporaryDirectory() as root:
+
+        log = SegmentedLog(root, segment_rows=500, retain_segments=2)
+
+        ids = [f"P{i:05d}" for i in range(patients)]
+
+        for patient_id in ids:
+            log.append(patient_id, VITALS)
+
+        targets = [random.choice(ids) for _ in range(appends)]
+
+        start = time.perf_counter()
+
+        for patient_id in targets:
+            log.append(patient_id, VITALS)
+
+        elapsed = time.perf_counter() - start
+
+    return elapsed / appends * 1e6
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--appends", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'patients':>10} {'us/append':>12}")
+
+    for patients in (10, 100, 1000, 10000):
+
+        cost = bench_append(patients, args.appends)
+
+        print(f"{patients:>10} {cost:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
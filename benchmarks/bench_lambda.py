@@ -0,0 +1,145 @@
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services.local_aws import InMemoryTable
+
+
+def load_handler():
+
+    spec = importlib.util.spec_from_file_location(
+        "lambda_function",
+        os.path.join(ROOT, "aws", "lambda_function.py")
+    )
+
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+# --------------------------------------------------------------
+# SYNTHETIC EVENTS
+# --------------------------------------------------------------
+# Same payload the ESP32 firmware publishes. `invalid` is the
+# fraction of records with a missing or non-numeric field.
+def make_event(records, source="sns", invalid=0.01, seed=0):
+
+    rng = random.Random(seed)
+
+    event = {"Records": []}
+
+    for i in range(records):
+
+        payload = {
+            "patient_id": f"P{rng.randrange(1000):03d}",
+            "heart_rate": rng.randint(60, 130),
+            "spo2": rng.randint(84, 100),
+            "temperature": round(rng.uniform(36, 40), 1)
+        }
+
+        if rng.random() < invalid:
+            payload["spo2"] = "n/a"
+
+        message = json.dumps(payload)
+        message_id = f"msg-{i}"
+
+        if source == "sns":
+            event["Records"].append({
+                "EventSource": "aws:sns",
+                "Sns": {"MessageId": message_id, "Message": message}
+            })
+
+        else:
+            event["Records"].append({
+                "eventSource": "aws:sqs",
+                "messageId": message_id,
+                "body": message
+            })
+
+    return event
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--source", choices=["sns", "sqs"], default="sns")
+    args = parser.parse_args()
+
+    module = load_handler()
+
+    # The handler logs one line per rejected record and per call.
+    module.logger.setLevel(logging.CRITICAL)
+
+    print(
+        f"{'records':>8} {'written':>8} {'rejected':>8} {'failed':>7} "
+        f"{'ms':>9} {'records/s':>11}"
+    )
+
+    for records in (1, 10, 100, 1000, 10000):
+
+        table = InMemoryTable()
+        module.set_table(table)
+
+        event = make_event(records, args.source)
+
+        start = time.perf_counter()
+        result = module.lambda_handler(event, None)
+        elapsed = time.perf_counter() - start
+
+        # Invalid records are dropped; only write failures are
+        # reported for retry.
+        failed = len(result["batchItemFailures"])
+        rejected = records - len(table.items) - failed
+
+        assert failed == 0
+
+        print(
+            f"{records:>8} {len(table.items):>8} {rejected:>8} {failed:>7} "
+            f"{elapsed * 1000:>9.2f} {records / elapsed:>11,.0f}"
+        )
+
+    # A failing chunk is reported record by record.
+    table = InMemoryTable()
+    table.fail_batches = 1
+    module.set_table(table)
+
+    result = module.lambda_handler(make_event(60, args.source, 0), None)
+
+    print(
+        f"\ninjected chunk failure: {len(result['batchItemFailures'])} "
+        f"records reported for retry, {len(table.items)} written"
+    )
+
+    # An integer too large for a float rejects only its own record.
+    event = make_event(10, args.source, 0)
+    oversized = '{"patient_id": "P001", "heart_rate": 1%s, ' \
+        '"spo2": 97, "temperature": 37}' % ("0" * 400)
+
+    if args.source == "sns":
+        event["Records"][0]["Sns"]["Message"] = oversized
+
+    else:
+        event["Records"][0]["body"] = oversized
+
+    table = InMemoryTable()
+    module.set_table(table)
+
+    result = module.lambda_handler(event, None)
+
+    assert not result["batchItemFailures"] and len(table.items) == 9
+
+    print(f"oversized integer: rejected, {len(table.items)} of 10 written")
+
+
+if __name__ == "__main__":
+    main()
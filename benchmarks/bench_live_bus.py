@@ -0,0 +1,150 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from benchmarks.suite import VITALS, fresh_workdir
+from services.history_service import (
+    get_timeseries_store,
+    load_history_window,
+    save_history_batch
+)
+from services.live_bus import DEVICE_SOURCE, LiveBus, StoreSource
+from services.timeseries_store import now_ms
+from services.ward_service import frame_from_history, latest_vitals
+
+
+HISTORY_RANGE_MS = 60 * 60 * 1000
+
+
+# What each open dashboard reads on one refresh: its patient's
+# latest vitals and history window, and the ward table.
+def poll_session(patient_id):
+
+    latest_vitals(patient_id)
+    load_history_window(patient_id, now_ms() - HISTORY_RANGE_MS)
+    frame_from_history()
+
+
+def bus_session(bus, patient_id):
+
+    bus.get((DEVICE_SOURCE, patient_id), lambda: latest_vitals(patient_id))
+
+    bus.get(
+        (DEVICE_SOURCE, patient_id),
+        lambda: load_history_window(patient_id, now_ms() - HISTORY_RANGE_MS),
+        key=("history", HISTORY_RANGE_MS)
+    )
+
+    bus.get(DEVICE_SOURCE, frame_from_history, key="frame")
+
+
+def write_readings(patient_ids, start_ms):
+
+    save_history_batch([
+        (patient_id, VITALS, start_ms + i)
+        for i, patient_id in enumerate(patient_ids)
+    ])
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--updates", type=int, default=5,
+                        help="patients with a new reading per refresh round")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    with fresh_workdir():
+
+        patients = [f"P{i:05d}" for i in range(args.patients)]
+
+        write_readings(patients, now_ms() - 1000)
+
+        viewing = [patients[i] for i in rng.integers(0, args.patients, args.sessions)]
+
+        bus = LiveBus()
+        bus.add_source(DEVICE_SOURCE, StoreSource(get_timeseries_store()))
+
+        topics = {DEVICE_SOURCE} | {(DEVICE_SOURCE, p) for p in viewing}
+
+        bus.poll(topics)
+
+        print(f"{args.sessions} sessions over {args.patients} patients, "
+              f"{args.updates} patients updated per refresh round")
+
+        for mode in ("active", "idle"):
+
+            updates = args.updates if mode == "active" else 0
+
+            results = {}
+
+            for name in ("polling", "bus"):
+
+                # Catch the bus up on readings written meanwhile.
+                bus.poll(topics)
+
+                for patient_id in viewing:
+                    bus_session(bus, patient_id)
+
+                reads_before = bus.reads
+
+                cpu = 0.0
+                polled = 0.0
+
+                for round_number in range(args.rounds):
+
+                    updated = [
+                        patients[i]
+                        for i in rng.choice(args.patients, updates, replace=False)
+                    ]
+
+                    write_readings(updated, now_ms())
+
+                    start = time.process_time()
+
+                    if name == "polling":
+
+                        for patient_id in viewing:
+                            poll_session(patient_id)
+
+                    else:
+
+                        # The watcher's pass, then every session's refresh.
+                        bus.poll(topics)
+
+                        polled += time.process_time() - start
+
+                        for patient_id in viewing:
+                            bus_session(bus, patient_id)
+
+                    cpu += time.process_time() - start
+
+                reads = (
+                    args.sessions * 3 * args.rounds
+                    if name == "polling" else bus.reads - reads_before
+                )
+
+                results[name] = (cpu / args.rounds, reads / args.rounds, polled / args.rounds)
+
+            line = f"  {mode:>6}:"
+
+            for name, (cpu, reads, polled) in results.items():
+
+                line += f" {name} {cpu * 1000:8.1f} ms CPU, {reads:6.0f} reads per round;"
+
+            print(line + f" watcher pass {results['bus'][2] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
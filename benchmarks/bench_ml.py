@@ -0,0 +1,145 @@
+import argparse
+import os
+import runpy
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services import ml_service
+
+
+VITALS = {"spo2": 92, "heart_rate": 104, "temperature": 38.4}
+
+
+def percentiles(samples_s):
+
+    ms = np.array(samples_s) * 1000
+
+    return np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+def report(name, samples_s):
+
+    p50, p99 = percentiles(samples_s)
+
+    print(f"{name:<36} p50 {p50:>8.3f} ms   p99 {p99:>8.3f} ms")
+
+
+# --------------------------------------------------------------
+# SCENARIOS
+# --------------------------------------------------------------
+def bench_one_row_dataframe(model, calls):
+
+    samples = []
+
+    for _ in range(calls):
+
+        start = time.perf_counter()
+        model.predict(pd.DataFrame([VITALS]))
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def bench_single(calls):
+
+    samples = []
+
+    for _ in range(calls):
+
+        start = time.perf_counter()
+        ml_service.predict_risk(VITALS)
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def bench_concurrent(calls, sessions):
+
+    def one(_):
+
+        start = time.perf_counter()
+        ml_service.predict_risk(VITALS)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(sessions) as pool:
+        return list(pool.map(one, range(calls)))
+
+
+def bench_batch(rows, repeats):
+
+    rng = np.random.default_rng(0)
+
+    spo2 = rng.integers(84, 100, rows)
+    heart_rate = rng.integers(60, 130, rows)
+    temperature = rng.uniform(36, 40, rows)
+
+    samples = []
+
+    for _ in range(repeats):
+
+        start = time.perf_counter()
+        ml_service.predict_risk_batch(spo2, heart_rate, temperature)
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--sessions", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        os.chdir(tmp)
+
+        if not os.path.exists(ml_service.MODEL_FILE):
+            runpy.run_path(os.path.join(ROOT, "ml", "train_model.py"))
+
+        start = time.perf_counter()
+        ml_service.warm_up(background=False)
+        print(f"model load + warm-up: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+        model = ml_service.get_model()
+
+        report(
+            "one-row DataFrame predict (old)",
+            bench_one_row_dataframe(model, args.calls)
+        )
+
+        report("predict_risk, 1 session", bench_single(args.calls))
+
+        batcher = ml_service.get_batcher()
+        before = batcher.batches
+
+        report(
+            f"predict_risk, {args.sessions} sessions",
+            bench_concurrent(args.calls * 4, args.sessions)
+        )
+
+        print(
+            f"{'':<36} {args.calls * 4} requests in "
+            f"{batcher.batches - before} predict calls"
+        )
+
+        for rows in (1_000, 100_000):
+
+            samples = bench_batch(rows, 10)
+
+            report(f"predict_risk_batch, {rows:,} rows", samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services.note_index import NoteIndex
+
+
+CLINICAL = (
+    "patient stable oxygen saturation improved hypoxia hydration fever "
+    "cough tachycardia bradycardia monitor continue fluids oral iv "
+    "antibiotics paracetamol review tomorrow discharge pain mild severe "
+    "no not sleeping eating walking bp high low dizziness nausea rest "
+    "spo2 temperature heart rate breathing chest clear wheeze drip"
+).split()
+
+QUERIES = [
+    "hypoxia",
+    "hydration fever",
+    "patient stable",
+    '"continue fluids"',
+    '"no fever" cough',
+    "tachycardia bradycardia dizziness nausea",
+    "term123"
+]
+
+
+def synthetic_notes(count, patients, seed=0):
+
+    rng = np.random.default_rng(seed)
+
+    # Zipf-like word frequencies over the clinical words plus a long
+    # tail of rare terms, so the vocabulary looks like real text.
+    vocabulary = np.array(CLINICAL + [f"term{i}" for i in range(20000)])
+
+    weights = 1.0 / np.arange(1, vocabulary.size + 1)
+    weights /= weights.sum()
+
+    lengths = rng.integers(4, 30, count)
+    words = vocabulary[rng.choice(vocabulary.size, int(lengths.sum()), p=weights)]
+
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+
+    start_ms = 1_700_000_000_000
+
+    for i in range(count):
+        yield (
+            f"P{i % patients:05d}",
+            {
+                "time": "2024-01-01 12:00:00",
+                "note": " ".join(words[bounds[i]:bounds[i + 1]])
+            },
+            start_ms + i * 1000
+        )
+
+
+def percentiles(samples):
+
+    samples = np.array(samples) * 1000
+
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=1000000)
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--scan-notes", type=int, default=100000,
+                        help="notes for the linear-scan baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        root = os.path.join(tmp, "notes_index")
+
+        index = NoteIndex(root)
+
+        start = time.perf_counter()
+
+        batch = []
+
+        for note in synthetic_notes(args.notes, args.patients):
+
+            batch.append(note)
+
+            if len(batch) == 50000:
+                index.add_many(batch)
+                batch = []
+
+        index.add_many(batch)
+
+        build = time.perf_counter() - start
+
+        stats = index.stats()
+
+        docs_bytes = os.path.getsize(os.path.join(root, "docs.jsonl"))
+
+        print(f"{args.notes:,} notes indexed in {build:.1f} s "
+              f"({args.notes / build:,.0f} notes/s), {stats['segments']} segments")
+        print(f"  on disk: {stats['bytes'] / 1e6:.1f} MB total, "
+              f"{(stats['bytes'] - docs_bytes) / 1e6:.1f} MB postings and columns, "
+              f"{docs_bytes / 1e6:.1f} MB note text")
+
+        start = time.perf_counter()
+        reopened = NoteIndex(root)
+        len(reopened)
+        print(f"  reopen: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        latencies = []
+
+        for i in range(200):
+
+            start = time.perf_counter()
+            reopened.add(
+                "P00001",
+                {"time": "2024-01-02 08:00:00", "note": f"hydration review {i}"},
+                1_800_000_000_000 + i
+            )
+            latencies.append(time.perf_counter() - start)
+
+        p50, p99 = percentiles(latencies)
+        print(f"  save_note index update: {p50:.3f} ms p50, {p99:.3f} ms p99")
+
+        end_ms = 1_700_000_000_000 + args.notes * 1000
+
+        filters = {
+            "all notes": {},
+            "one patient": {"patient_ids": "P00042"},
+            "last 10%": {"start_ms": end_ms - args.notes * 100}
+        }
+
+        for query in QUERIES:
+
+            line = f"  {query:<42}"
+
+            for label, kwargs in filters.items():
+
+                samples = []
+
+                for _ in range(20):
+
+                    start = time.perf_counter()
+                    results = reopened.search(query, **kwargs)
+                    samples.append(time.perf_counter() - start)
+
+                p50, p99 = percentiles(samples)
+
+                line += f" {label} {p50:6.1f}/{p99:6.1f} ms"
+
+            print(line + f"  ({len(results)} hits shown)")
+
+        # Baseline: parse every note and test each word, as a search
+        # over doctor_notes.json would.
+        notes = [
+            json.dumps(note[1])
+            for note in synthetic_notes(args.scan_notes, args.patients)
+        ]
+
+        start = time.perf_counter()
+
+        hits = [
+            n for n in map(json.loads, notes)
+            if "hydration" in n["note"] or "fever" in n["note"]
+        ]
+
+        scan = time.perf_counter() - start
+
+        print(f"  linear scan of {args.scan_notes:,} notes: {scan * 1000:.0f} ms "
+              f"(~{scan * args.notes / args.scan_notes * 1000:,.0f} ms at {args.notes:,}), "
+              f"{len(hits):,} unranked hits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services import notes_service, storage
+
+
+NOTE = {"time": "2024-01-01 12:00:00", "note": "Oxygen stable, continue monitoring."}
+
+
+def best_ms(fn, repeat=5):
+
+    samples = []
+
+    for _ in range(repeat):
+
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return min(samples)
+
+
+def seed(counts):
+
+    log = notes_service.get_notes_log()
+
+    for patient_id, count in counts.items():
+
+        for offset in range(0, count, 10000):
+            log.append_many(patient_id, [NOTE] * min(10000, count - offset))
+
+
+# What the component did before: every note, one card each.
+def render_all(patient_id):
+
+    return [
+        f"<div><b>🕒 {entry['time']}</b><p>{entry['note']}</p></div>"
+        for entry in reversed(notes_service.load_patient_notes(patient_id))
+    ]
+
+
+def render_page(patient_id, pages=1):
+
+    from components.doctor_notes import note_html
+
+    notes, _ = notes_service.load_note_page(
+        patient_id,
+        pages * notes_service.NOTES_PAGE_SIZE
+    )
+
+    return "".join(note_html(e["time"], e["note"]) for e in notes)
+
+
+def _notes_script(patient_id):
+
+    from components.doctor_notes import render_doctor_notes
+
+    render_doctor_notes(patient_id)
+
+
+def apptest_ms(patient_id):
+
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_function(
+        _notes_script,
+        args=(patient_id,),
+        default_timeout=120
+    )
+
+    at.run()
+
+    samples = []
+
+    for _ in range(3):
+
+        start = time.perf_counter()
+        at.run()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return min(samples)
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=50000)
+    parser.add_argument("--apptest", action="store_true",
+                        help="also time the component in Streamlit's AppTest")
+    args = parser.parse_args()
+
+    counts = {"SHORT": 5, "LONG": args.notes}
+
+    for backend in ("files", "sqlite"):
+
+        os.environ[storage.STORAGE_BACKEND_ENV] = backend
+
+        previous = os.getcwd()
+
+        with tempfile.TemporaryDirectory() as tmp:
+
+            os.chdir(tmp)
+
+            storage._database = None
+            notes_service._log = None
+
+            try:
+
+                seed(counts)
+
+                print(f"{backend}:")
+
+                for patient_id, count in counts.items():
+
+                    old = best_ms(lambda: render_all(patient_id), 3)
+                    first = best_ms(lambda: render_page(patient_id))
+                    deep = best_ms(lambda: render_page(patient_id, 10))
+
+                    line = (
+                        f"  {count:>7,} notes: all notes {old:9.2f} ms, "
+                        f"first page {first:6.2f} ms, 10 pages {deep:6.2f} ms"
+                    )
+
+                    if args.apptest:
+
+                        line += f", component rerun {apptest_ms(patient_id):6.1f} ms"
+
+                    print(line)
+
+            finally:
+
+                os.chdir(previous)
+
+                if storage._database is not None:
+                    storage._database.close()
+
+                storage._database = None
+                notes_service._log = None
+
+
+if __name__ == "__main__":
+    main()
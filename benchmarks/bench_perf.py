@@ -0,0 +1,78 @@
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services import perf
+
+
+CALLS = 200000
+
+
+def noop():
+    return None
+
+
+def per_call_ns(fn):
+
+    start = time.perf_counter()
+
+    for _ in range(CALLS):
+        fn()
+
+    return (time.perf_counter() - start) / CALLS * 1e9
+
+
+def main():
+
+    decorated = perf.instrument("bench.noop")(noop)
+
+    def block():
+        with perf.timed("bench.block"):
+            noop()
+
+    baseline = per_call_ns(noop)
+
+    print(f"{'mode':<26} {'decorator ns':>13} {'with-block ns':>14}")
+    print(f"{'plain call':<26} {baseline:>13.0f} {'':>14}")
+
+    perf.disable()
+
+    print(
+        f"{'disabled':<26} {per_call_ns(decorated):>13.0f} "
+        f"{per_call_ns(block):>14.0f}"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        modes = [
+            ("enabled", {}),
+            ("enabled + jsonl log", {"log_path": os.path.join(tmp, "perf.jsonl")}),
+            ("enabled + tracemalloc", {"trace_allocations": True})
+        ]
+
+        for label, options in modes:
+
+            perf.disable()
+            perf.enable(**options)
+
+            decorator_ns = per_call_ns(decorated)
+            block_ns = per_call_ns(block)
+
+            flush_start = time.perf_counter()
+            written = perf.flush()
+            flush_ms = (time.perf_counter() - flush_start) * 1000
+
+            extra = f"  (flushed {written:,} lines in {flush_ms:.0f} ms)" if written else ""
+
+            print(f"{label:<26} {decorator_ns:>13.0f} {block_ns:>14.0f}{extra}")
+
+        perf.disable()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import argparse
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("AYUSHCARE_AWS_BACKEND", "local")
+
+from benchmarks.suite import fresh_workdir
+from services import perf
+
+
+# The old app reran the whole script on this timer for every
+# session, whether or not anything on the page had changed.
+OLD_REFRESH_SECONDS = 5
+
+
+def _empty_script():
+
+    import streamlit as st
+
+    st.markdown("tick")
+
+
+def _ecg_script(patient_id):
+
+    from components.charts import render_ecg
+
+    render_ecg(patient_id)
+
+
+def _cpu_ms(at, runs, before_run=None):
+
+    samples = []
+
+    for _ in range(runs):
+
+        if before_run:
+            before_run()
+
+        start = time.process_time()
+        at.run()
+        samples.append((time.process_time() - start) * 1000)
+
+    return float(np.median(samples))
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--patient", default="P002")
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    import plotly.express as px
+    import views.dashboard as dashboard
+
+    from components.charts import ECG_REFRESH_SECONDS
+    from services.ecg_stream import ECG_SAMPLE_RATE, get_ecg_streams
+
+    # Some plotly builds no longer ship scatter_mapbox; the map is
+    # static either way.
+    if not hasattr(px, "scatter_mapbox"):
+        dashboard.render_health_map = lambda: None
+
+    fragments = {
+        "live_status": dashboard.LIVE_REFRESH_SECONDS,
+        "live_metrics": dashboard.LIVE_REFRESH_SECONDS,
+        "live_vitals_chart": dashboard.LIVE_REFRESH_SECONDS,
+        "live_downloads": dashboard.LIVE_REFRESH_SECONDS,
+        "live_feed": dashboard.FEED_REFRESH_SECONDS,
+        "live_ward": dashboard.WARD_REFRESH_SECONDS,
+        "live_history": dashboard.HISTORY_REFRESH_SECONDS
+    }
+
+    perf.enable(log_path=None)
+
+    with fresh_workdir():
+
+        shutil.copy(os.path.join(ROOT, "sample_vitals.json"), ".")
+
+        # One lead streaming for the viewed patient, fed between
+        # runs at the rate a device sends it.
+        streams = get_ecg_streams()
+        rng = np.random.default_rng(0)
+
+        def feed_ecg():
+            streams.append(
+                args.patient,
+                rng.normal(size=int(ECG_SAMPLE_RATE * ECG_REFRESH_SECONDS))
+            )
+
+        streams.append(args.patient, rng.normal(size=ECG_SAMPLE_RATE * 10))
+
+        at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+        at.session_state["page"] = "dashboard"
+        at.session_state["current_user"] = "bench"
+
+        at.run()
+        at.sidebar.selectbox[0].set_value(args.patient).run()
+
+        if at.exception:
+            raise SystemExit(at.exception[0].value)
+
+        perf.get_recorder().reset()
+
+        full = _cpu_ms(at, args.runs)
+
+        timings = {
+            row["name"]: row["mean_ms"]
+            for row in perf.get_recorder().summary()
+        }
+
+        # Streamlit's own cost per script or fragment run.
+        overhead = _cpu_ms(AppTest.from_function(_empty_script), args.runs)
+
+        # The ECG section alone; its fragment is most of the script.
+        ecg = _cpu_ms(
+            AppTest.from_function(_ecg_script, args=(args.patient,)),
+            args.runs,
+            feed_ecg
+        )
+
+    print(f"full page rerun: {full:.1f} ms CPU "
+          f"(median of {args.runs}, patient {args.patient})")
+    print(f"streamlit run overhead: {overhead:.1f} ms CPU")
+
+    timings["live_ecg"] = max(ecg - overhead, 0.0)
+    fragments["live_ecg"] = ECG_REFRESH_SECONDS
+
+    after = 0.0
+
+    for name, seconds in fragments.items():
+
+        per_run = timings[name] + overhead
+        per_minute = per_run * 60 / seconds
+
+        after += per_minute
+
+        print(f"  {name:<18} every {seconds:>4} s: {per_run:6.1f} ms/run, "
+              f"{per_minute:7.1f} ms/min")
+
+    # Not a measurement of the old tree: this page's own full
+    # rerun, repeated on the old app's timer.
+    before = full * 60 / OLD_REFRESH_SECONDS
+
+    print(f"server CPU per viewing session, ECG included: "
+          f"synthetic full rerun every {OLD_REFRESH_SECONDS} s {before:,.0f} ms/min, "
+          f"fragments {after:,.0f} ms/min ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
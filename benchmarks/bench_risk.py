@@ -0,0 +1,100 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.alerts import (
+    calculate_risk,
+    calculate_risk_batch,
+    get_alerts
+)
+
+
+# --------------------------------------------------------------
+# SYNTHETIC UPLOAD
+# --------------------------------------------------------------
+# Same columns the dashboard expects from "Upload CSV". Values
+# straddle every threshold, including the exact boundaries.
+def write_csv(path, rows, seed=0):
+
+    rng = np.random.default_rng(seed)
+
+    systolic = rng.integers(100, 160, rows)
+    diastolic = rng.integers(60, 100, rows)
+
+    pd.DataFrame({
+        "patient_id": [f"P{i % 5000:04d}" for i in range(rows)],
+        "timestamp": pd.date_range("2026-01-01", periods=rows, freq="s"),
+        "heart_rate": rng.integers(60, 130, rows),
+        "spo2": rng.integers(84, 100, rows),
+        "temperature": rng.choice(
+            [36.5, 37.2, 38.0, 38.1, 38.9, 39.0, 39.6],
+            rows
+        ),
+        "bp": [f"{s}/{d}" for s, d in zip(systolic, diastolic)],
+        "respiratory_rate": rng.integers(12, 28, rows)
+    }).to_csv(path, index=False)
+
+
+def check_matches_scalar(df, sample=20000):
+
+    rows = df.head(sample)
+    batch = calculate_risk_batch(rows)
+
+    for i, vitals in enumerate(rows.to_dict("records")):
+
+        score, level, color, status = calculate_risk(vitals)
+
+        assert batch["risk_score"][i] == score
+        assert batch["risk_level"][i] == level
+        assert batch["risk_color"][i] == color
+        assert batch["patient_status"][i] == status
+        assert batch["alerts"][i] == get_alerts(vitals)
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        path = os.path.join(tmp, "vitals.csv")
+        write_csv(path, args.rows)
+
+        start = time.perf_counter()
+        df = pd.read_csv(path)
+        parse_s = time.perf_counter() - start
+
+    check_matches_scalar(df)
+
+    records = df.head(100_000).to_dict("records")
+
+    start = time.perf_counter()
+
+    for vitals in records:
+        calculate_risk(vitals)
+        get_alerts(vitals)
+
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    calculate_risk_batch(df)
+    batch_s = time.perf_counter() - start
+
+    print(f"rows:           {len(df):>12,}")
+    print(f"csv parse:      {parse_s:>12.3f} s")
+    print(f"scalar:         {len(records) / scalar_s:>12,.0f} rows/s")
+    print(f"batch:          {len(df) / batch_s:>12,.0f} rows/s")
+    print(f"batch time:     {batch_s * 1000:>12.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold import budget for everything the login page needs.
+LOGIN_BUDGET_MS = 1000
+
+PAGES = {
+    "login": "import streamlit, views.login",
+    "register": "import streamlit, views.register",
+    "dashboard": "import streamlit, views.dashboard"
+}
+
+
+# --------------------------------------------------------------
+# python -X importtime
+# --------------------------------------------------------------
+# Each stderr line is "import time: self [us] | cumulative | name",
+# with the name indented by nesting depth.
+def import_times(statement):
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    modules = []
+
+    for line in result.stderr.splitlines():
+
+        if not line.startswith("import time:"):
+            continue
+
+        parts = line[len("import time:"):].split("|")
+
+        if not parts[0].strip().isdigit():
+            continue
+
+        name = parts[2].rstrip()
+
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+            "self_ms": int(parts[0]) / 1000,
+            "cumulative_ms": int(parts[1]) / 1000
+        })
+
+    return modules
+
+
+def total_ms(modules):
+
+    return sum(m["cumulative_ms"] for m in modules if m["depth"] == 0)
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=LOGIN_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    totals = {}
+
+    for page, statement in PAGES.items():
+
+        modules = import_times(statement)
+        totals[page] = total_ms(modules)
+
+        print(f"\n{page}: {totals[page]:.1f} ms")
+
+        top = sorted(
+            (m for m in modules if m["depth"] <= 1),
+            key=lambda m: m["cumulative_ms"],
+            reverse=True
+        )[:args.top]
+
+        for m in top:
+            print(
+                f"  {m['cumulative_ms']:>9.1f} ms"
+                f"  {m['self_ms']:>8.1f} ms  {m['module']}"
+            )
+
+    if totals["login"] > args.budget_ms:
+
+        print(
+            f"\nFAIL: login cold start {totals['login']:.1f} ms "
+            f"exceeds budget of {args.budget_ms:.0f} ms"
+        )
+
+        sys.exit(1)
+
+    print(
+        f"\nOK: login cold start {totals['login']:.1f} ms "
+        f"within budget of {args.budget_ms:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
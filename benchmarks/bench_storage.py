@@ -0,0 +1,181 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services import storage
+from services.storage import Database, SQLiteLog
+from services.segment_log import SegmentedLog
+
+
+RECORD = {
+    "time": "12:00:00",
+    "temperature": 37.2,
+    "heart_rate": 84,
+    "spo2": 97
+}
+
+
+def make_log(backend, root):
+
+    if backend == "files":
+        return SegmentedLog(os.path.join(root, "log"), 500, 2)
+
+    return SQLiteLog(
+        Database(os.path.join(root, storage.DB_FILE)),
+        "history",
+        retain_rows=1000,
+        prune_every=500
+    )
+
+
+def timed(fn):
+
+    start = time.perf_counter()
+    fn()
+
+    return time.perf_counter() - start
+
+
+# --------------------------------------------------------------
+# SINGLE PROCESS
+# --------------------------------------------------------------
+def single(backend, patients, appends):
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        log = make_log(backend, tmp)
+
+        keys = [f"P{i:05d}" for i in range(patients)]
+
+        seed = timed(lambda: [log.append_many(k, [RECORD] * 10) for k in keys])
+
+        rng = np.random.default_rng(0)
+        targets = [keys[i] for i in rng.integers(0, patients, appends)]
+
+        append = timed(lambda: [log.append(k, RECORD) for k in targets])
+
+        tail = timed(lambda: [log.tail(k, 15) for k in targets[:1000]])
+
+        everything = timed(lambda: {k: log.tail(k, 15) for k in log.keys()})
+
+    return {
+        "seed rows/s": patients * 10 / seed,
+        "append us": append / appends * 1e6,
+        "tail(15) us": tail / min(1000, appends) * 1e6,
+        "load_history ms": everything * 1000
+    }
+
+
+# --------------------------------------------------------------
+# CONCURRENT SESSIONS
+# --------------------------------------------------------------
+# One process appends at a steady rate while the others read in a
+# tight loop, like several Streamlit processes sharing one file.
+def _reader(path, stop_at, counts):
+
+    log = SQLiteLog(Database(path), "history")
+
+    reads = 0
+
+    while time.time() < stop_at:
+        log.tail(f"P{reads % 100:05d}", 15)
+        reads += 1
+
+    counts.put(reads)
+
+
+def concurrent(readers, seconds):
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        path = os.path.join(tmp, storage.DB_FILE)
+
+        log = SQLiteLog(Database(path), "history")
+
+        for i in range(100):
+            log.append_many(f"P{i:05d}", [RECORD] * 100)
+
+        stop_at = time.time() + seconds
+
+        counts = multiprocessing.Queue()
+
+        procs = [
+            multiprocessing.Process(
+                target=_reader,
+                args=(path, stop_at, counts)
+            )
+            for _ in range(readers)
+        ]
+
+        for p in procs:
+            p.start()
+
+        latencies = []
+        errors = 0
+
+        while time.time() < stop_at:
+
+            start = time.perf_counter()
+
+            try:
+                log.append(f"P{len(latencies) % 100:05d}", RECORD)
+
+            except Exception:
+                errors += 1
+
+            latencies.append(time.perf_counter() - start)
+
+            time.sleep(0.005)
+
+        reads = sum(counts.get() for _ in procs)
+
+        for p in procs:
+            p.join()
+
+    latencies = np.array(latencies) * 1000
+
+    return {
+        "writes": len(latencies),
+        "write errors": errors,
+        "write p50 ms": np.percentile(latencies, 50),
+        "write p99 ms": np.percentile(latencies, 99),
+        "reads/s": reads / seconds
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=10000)
+    parser.add_argument("--appends", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=3)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.patients:,} patients, {args.appends:,} single appends")
+
+    for backend in ("files", "sqlite"):
+
+        result = single(backend, args.patients, args.appends)
+
+        print(f"  {backend:>6}: " + ", ".join(
+            f"{k} {v:,.1f}" for k, v in result.items()
+        ))
+
+    print(f"sqlite, 1 writer + {args.readers} reader processes, {args.seconds:.0f} s")
+
+    for k, v in concurrent(args.readers, args.seconds).items():
+        print(f"  {k:>14}: {v:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services import auth_service
+from services.auth_service import UserDirectory
+
+
+PASSWORD = "correct horse"
+
+
+# Every account shares one precomputed hash; hashing 100k
+# passwords would take hours and is not what is being measured.
+def write_users(path, count, hashed):
+
+    users = {
+        f"user{i:06d}": {
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "password": hashed
+        }
+        for i in range(count)
+    }
+
+    with open(path, "w") as f:
+        json.dump(users, f, indent=4)
+
+
+def timed_ms(fn, repeat):
+
+    samples = []
+
+    for _ in range(repeat):
+
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+# What login.py and register.py did on every rerun: parse the whole
+# file, and for a sign-up rewrite it.
+def legacy_lookup(path, username):
+
+    with open(path, "r") as f:
+        users = json.load(f)
+
+    return users.get(username)
+
+
+def legacy_register(path, username, record):
+
+    with open(path, "r") as f:
+        users = json.load(f)
+
+    users[username] = record
+
+    with open(path, "w") as f:
+        json.dump(users, f, indent=4)
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--logins", type=int, default=16)
+    args = parser.parse_args()
+
+    hashed = auth_service.hash_password(PASSWORD)
+
+    previous = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        os.chdir(tmp)
+
+        try:
+
+            path = auth_service.USERS_FILE
+
+            write_users(path, args.users, hashed)
+
+            size_mb = os.path.getsize(path) / 1e6
+
+            print(f"{args.users:,} users, users.json {size_mb:.1f} MB")
+
+            target = f"user{args.users // 2:06d}"
+
+            p50, p99 = timed_ms(lambda: legacy_lookup(path, target), 5)
+            print(f"{'lookup, parse per rerun':>28}: {p50:9.2f} ms p50  {p99:9.2f} ms p99")
+
+            directory = UserDirectory(path)
+
+            start = time.perf_counter()
+            directory.get(target)
+            cold = (time.perf_counter() - start) * 1000
+
+            print(f"{'lookup, cold cache':>28}: {cold:9.2f} ms")
+
+            p50, p99 = timed_ms(lambda: directory.get(target), 1000)
+            print(f"{'lookup, warm cache':>28}: {p50:9.3f} ms p50  {p99:9.3f} ms p99")
+
+            p50, p99 = timed_ms(
+                lambda: directory.find_by_email("user7@example.com"),
+                1000
+            )
+            print(f"{'email check, warm cache':>28}: {p50:9.3f} ms p50  {p99:9.3f} ms p99")
+
+            record = {"name": "New", "email": "new@example.com", "password": hashed}
+
+            counter = iter(range(10 ** 9))
+
+            p50, p99 = timed_ms(
+                lambda: legacy_register(path, f"legacy{next(counter)}", record),
+                3
+            )
+            print(f"{'register, rewrite file':>28}: {p50:9.2f} ms p50  {p99:9.2f} ms p99")
+
+            directory = UserDirectory(path)
+            directory.get(target)
+
+            p50, p99 = timed_ms(
+                lambda: directory.add(
+                    f"new{next(counter)}",
+                    dict(record, email=f"new{next(counter)}@example.com")
+                ),
+                200
+            )
+            print(f"{'register, journal append':>28}: {p50:9.3f} ms p50  {p99:9.3f} ms p99")
+
+            # Another process's view picks the appends up from the
+            # journal offset instead of re-reading users.json.
+            other = UserDirectory(path)
+            other.get(target)
+
+            directory.add("late", dict(record, email="late@example.com"))
+
+            start = time.perf_counter()
+            found = other.get("late")
+            print(f"{'see other process write':>28}: {(time.perf_counter() - start) * 1000:9.3f} ms "
+                  f"({'ok' if found else 'MISSING'})")
+
+            start = time.perf_counter()
+            directory.compact()
+            print(f"{'compaction':>28}: {(time.perf_counter() - start) * 1000:9.2f} ms")
+
+        finally:
+
+            os.chdir(previous)
+
+    # bcrypt dominates a login; with the pool, concurrent logins
+    # overlap instead of queueing on one session's thread.
+    start = time.perf_counter()
+
+    for _ in range(args.logins):
+        auth_service._check(PASSWORD, hashed)
+
+    serial = time.perf_counter() - start
+
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(args.logins) as sessions:
+        list(sessions.map(
+            lambda _: auth_service.verify_password(PASSWORD, hashed),
+            range(args.logins)
+        ))
+
+    pooled = time.perf_counter() - start
+
+    print(f"{'logins, one at a time':>28}: {args.logins / serial:9.2f} /s")
+    print(f"{'logins, bcrypt pool':>28}: {args.logins / pooled:9.2f} /s "
+          f"({auth_service.BCRYPT_WORKERS} workers, {os.cpu_count()} CPU)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.pdf_service import generate_ward_reports
+
+
+def make_ward(patients, history_rows, seed=0):
+
+    rng = np.random.default_rng(seed)
+
+    ward = {}
+    history = {}
+
+    for i in range(patients):
+
+        patient_id = f"P{i:04d}"
+
+        ward[patient_id] = {
+            "heart_rate": int(rng.integers(60, 130)),
+            "spo2": int(rng.integers(84, 100)),
+            "temperature": round(float(rng.uniform(36, 40)), 1),
+            "bp": "120/80",
+            "respiratory_rate": int(rng.integers(12, 28))
+        }
+
+        history[patient_id] = [
+            {
+                "time": f"12:{m:02d}:00",
+                "temperature": ward[patient_id]["temperature"],
+                "heart_rate": ward[patient_id]["heart_rate"],
+                "spo2": ward[patient_id]["spo2"]
+            }
+            for m in range(history_rows)
+        ]
+
+    return ward, history
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--history-rows", type=int, default=15)
+    args = parser.parse_args()
+
+    ward, history = make_ward(args.patients, args.history_rows)
+
+    worker_counts = sorted({1, os.cpu_count() or 1})
+
+    for workers in worker_counts:
+
+        with tempfile.TemporaryDirectory() as tmp:
+
+            path = os.path.join(tmp, "ward_reports.zip")
+
+            result = generate_ward_reports(ward, history, path, workers)
+
+            size_mb = os.path.getsize(path) / 1e6
+
+        print(
+            f"workers {workers:>3}: {result['reports']} reports in "
+            f"{result['seconds']:.2f} s = "
+            f"{result['reports_per_sec']:.1f} reports/s, "
+            f"{size_mb:.1f} MB zip"
+        )
+
+
+if __name__ == "__main__":
+    main()
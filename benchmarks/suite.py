@@ -0,0 +1,569 @@
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("AYUSHCARE_AWS_BACKEND", "local")
+
+from benchmarks.bench_lambda import load_handler, make_event
+from benchmarks.bench_risk import write_csv
+from services import auth_service, history_service, notes_service
+from services import notification_service, storage
+from services.local_aws import InMemoryTable
+
+
+# predict_risk calls come from this many sessions at once.
+PREDICT_SESSIONS = 32
+
+# Data sizes per case. "quick" is meant for every commit; "full"
+# goes up to 100k patients and 10M history rows.
+SIZES = {
+    "quick": {
+        "patients": [10, 1000, 10000],
+        "history_rows": [1000, 100000],
+        "notes": [100, 10000],
+        "alerts": [100, 10000],
+        "csv_rows": [1000, 100000],
+        "records": [10, 1000],
+        "reports": [1]
+    },
+    "full": {
+        "patients": [10, 1000, 10000, 100000],
+        "history_rows": [1000, 100000, 1000000, 10000000],
+        "notes": [100, 10000, 100000],
+        "alerts": [100, 10000, 100000],
+        "csv_rows": [1000, 100000, 1000000],
+        "records": [10, 1000, 10000],
+        "reports": [1, 15]
+    }
+}
+
+VITALS = {
+    "temperature": 38.4,
+    "heart_rate": 104,
+    "spo2": 92,
+    "bp": "130/85",
+    "respiratory_rate": 20
+}
+
+
+# --------------------------------------------------------------
+# HELPERS
+# --------------------------------------------------------------
+def reset_stores():
+
+    if storage._database is not None:
+        storage._database.close()
+
+    storage._database = None
+
+    auth_service._directory = None
+
+    history_service._log = None
+    history_service._store = None
+
+    notes_service._log = None
+    notes_service._index = None
+
+    notification_service._log = None
+    notification_service._suppressor = None
+
+
+# The stores use paths relative to the working directory, so each
+# case runs in an empty temp directory with every cached store and
+# database connection dropped.
+@contextlib.contextmanager
+def fresh_workdir():
+
+    previous = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        os.chdir(tmp)
+
+        reset_stores()
+
+        try:
+            yield tmp
+
+        finally:
+            os.chdir(previous)
+
+            reset_stores()
+
+
+def best_of(fn, repeat=3):
+
+    samples = []
+
+    for _ in range(repeat):
+
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    return min(samples)
+
+
+def ward(patients, seed=0):
+
+    rng = np.random.default_rng(seed)
+
+    return {
+        "spo2": rng.integers(84, 100, patients),
+        "heart_rate": rng.integers(60, 130, patients),
+        "temperature": rng.uniform(36, 40, patients)
+    }
+
+
+def ward_records(patients):
+
+    columns = ward(patients)
+
+    return [
+        {k: columns[k][i].item() for k in columns}
+        for i in range(patients)
+    ]
+
+
+# The existing data is written as the legacy JSON files and
+# imported into the configured backend before timing starts.
+def seed_notes(size):
+
+    notes = {}
+
+    for i in range(size):
+        notes.setdefault(f"P{i % 50:03d}", []).append({
+            "time": "2024-01-01 12:00:00",
+            "note": f"Observation {i}"
+        })
+
+    with open("doctor_notes.json", "w") as f:
+        json.dump(notes, f, indent=4)
+
+
+def seed_alerts(size):
+
+    alerts = [
+        {
+            "time": "12:00:00",
+            "patient_id": f"P{i % 50:03d}",
+            "severity": "warning",
+            "message": f"Alert {i}"
+        }
+        for i in range(size)
+    ]
+
+    with open("notifications.json", "w") as f:
+        json.dump(alerts, f, indent=4)
+
+
+# --------------------------------------------------------------
+# CASES
+# --------------------------------------------------------------
+# Each case takes a size and returns (seconds, operations).
+def case_calculate_risk(size):
+
+    from services.alerts import calculate_risk
+
+    records = ward_records(size)
+
+    return best_of(lambda: [calculate_risk(v) for v in records]), size
+
+
+def case_calculate_risk_batch(size):
+
+    from services.alerts import calculate_risk_batch
+
+    columns = ward(size)
+
+    return best_of(lambda: calculate_risk_batch(columns)), size
+
+
+def case_get_alerts(size):
+
+    from services.alerts import get_alerts
+
+    records = ward_records(size)
+
+    return best_of(lambda: [get_alerts(v) for v in records]), size
+
+
+def load_model():
+
+    from services import ml_service
+
+    with fresh_workdir():
+
+        runpy.run_path(os.path.join(ROOT, "ml", "train_model.py"))
+
+        ml_service._model = None
+        ml_service.warm_up(background=False)
+
+    return ml_service
+
+
+# One call per patient, as the dashboard makes them, spread over
+# PREDICT_SESSIONS threads so the micro-batcher sees concurrent
+# sessions.
+def case_predict_risk(size):
+
+    ml_service = load_model()
+
+    records = ward_records(size)
+
+    with ThreadPoolExecutor(PREDICT_SESSIONS) as pool:
+
+        seconds = best_of(
+            lambda: list(pool.map(ml_service.predict_risk, records))
+        )
+
+    return seconds, size
+
+
+def case_predict_risk_batch(size):
+
+    ml_service = load_model()
+
+    columns = ward(size)
+
+    return best_of(
+        lambda: ml_service.predict_risk_batch(
+            columns["spo2"],
+            columns["heart_rate"],
+            columns["temperature"]
+        )
+    ), size
+
+
+def case_save_history(size):
+
+    appends = 1000
+
+    with fresh_workdir():
+
+        patients = [f"P{i:06d}" for i in range(size)]
+
+        now = int(time.time() * 1000)
+
+        history_service.save_history_batch(
+            [(p, VITALS, now) for p in patients]
+        )
+
+        targets = [random.choice(patients) for _ in range(appends)]
+
+        seconds = best_of(
+            lambda: [history_service.save_history(p, VITALS) for p in targets],
+            repeat=1
+        )
+
+    return seconds, appends
+
+
+def case_load_history(size):
+
+    with fresh_workdir():
+
+        now = int(time.time() * 1000)
+
+        history_service.save_history_batch(
+            [(f"P{i:06d}", VITALS, now) for i in range(size)]
+        )
+
+        seconds = best_of(history_service.load_history)
+
+    return seconds, 1
+
+
+def case_history_window(size):
+
+    with fresh_workdir():
+
+        store = history_service.get_timeseries_store()
+
+        chunk = 100000
+        start_ms = 1_700_000_000_000
+
+        for offset in range(0, size, chunk):
+
+            rows = min(chunk, size - offset)
+
+            store.append_many(
+                "P001",
+                [VITALS] * rows,
+                np.arange(offset, offset + rows) * 1000 + start_ms
+            )
+
+        # The last hour of 1 Hz data, read all the way through.
+        end_ms = start_ms + size * 1000
+
+        def read():
+            window = history_service.load_history_window(
+                "P001",
+                end_ms - 3600 * 1000,
+                end_ms
+            )
+            return float(window["heart_rate"].sum())
+
+        seconds = best_of(read)
+
+    return seconds, 1
+
+
+def case_save_note(size):
+
+    from components import doctor_notes
+
+    with fresh_workdir():
+
+        seed_notes(size)
+
+        # Imports the seeded doctor_notes.json and indexes it before
+        # timing.
+        notes_service.get_note_index()
+
+        seconds = best_of(
+            lambda: doctor_notes.save_note("P001", "Benchmark note"),
+            repeat=5
+        )
+
+    return seconds, 1
+
+
+def case_load_notes(size):
+
+    with fresh_workdir():
+
+        seed_notes(size)
+
+        # Imports the seeded doctor_notes.json before timing.
+        notes_service.get_notes_log()
+
+        seconds = best_of(notes_service.load_notes)
+
+    return seconds, 1
+
+
+def case_save_alert(size):
+
+    with fresh_workdir():
+
+        seed_alerts(size)
+
+        # Imports the seeded notifications.json before timing.
+        notification_service.get_notification_log()
+
+        # A new patient per call, so every alert is actually stored
+        # rather than folded into the previous one.
+        patients = iter(range(1000))
+
+        seconds = best_of(
+            lambda: notification_service.save_alert(
+                f"B{next(patients):03d}",
+                "critical",
+                "Benchmark alert"
+            ),
+            repeat=5
+        )
+
+    return seconds, 1
+
+
+def case_generate_report(size):
+
+    from services.pdf_service import build_report_bytes
+
+    history = [
+        {
+            "time": f"12:{i % 60:02d}:00",
+            "temperature": 37.0,
+            "heart_rate": 80,
+            "spo2": 97
+        }
+        for i in range(size)
+    ] if size > 1 else None
+
+    return best_of(lambda: build_report_bytes(VITALS, history)), 1
+
+
+def case_upload_csv(size):
+
+    from services.data_loader import parse_vitals_csv
+
+    with fresh_workdir():
+
+        write_csv("vitals.csv", size)
+
+        seconds = best_of(lambda: parse_vitals_csv("vitals.csv"))
+
+    return seconds, size
+
+
+def case_lambda_handler(size):
+
+    module = load_handler()
+    module.logger.setLevel(logging.CRITICAL)
+
+    event = make_event(size, invalid=0)
+
+    def run():
+        module.set_table(InMemoryTable())
+        module.lambda_handler(event, None)
+
+    return best_of(run), size
+
+
+CASES = [
+    ("calculate_risk", "patients", case_calculate_risk),
+    ("calculate_risk_batch", "patients", case_calculate_risk_batch),
+    ("get_alerts", "patients", case_get_alerts),
+    ("predict_risk", "patients", case_predict_risk),
+    ("predict_risk_batch", "patients", case_predict_risk_batch),
+    ("save_history", "patients", case_save_history),
+    ("load_history", "patients", case_load_history),
+    ("load_history_window", "history_rows", case_history_window),
+    ("save_note", "notes", case_save_note),
+    ("load_notes", "notes", case_load_notes),
+    ("save_alert", "alerts", case_save_alert),
+    ("generate_report", "reports", case_generate_report),
+    ("upload_csv", "csv_rows", case_upload_csv),
+    ("lambda_handler", "records", case_lambda_handler)
+]
+
+
+# --------------------------------------------------------------
+# RUN / COMPARE
+# --------------------------------------------------------------
+def git_revision():
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(profile, only=None):
+
+    results = []
+
+    for name, dimension, case in CASES:
+
+        if only and name not in only:
+            continue
+
+        for size in SIZES[profile][dimension]:
+
+            seconds, ops = case(size)
+
+            result = {
+                "name": name,
+                "dimension": dimension,
+                "size": size,
+                "seconds": round(seconds, 6),
+                "us_per_op": round(seconds / ops * 1e6, 3)
+            }
+
+            results.append(result)
+
+            print(
+                f"{name:<22} {dimension:<13} {size:>10,} "
+                f"{seconds * 1000:>11.3f} ms {result['us_per_op']:>12.3f} us/op",
+                flush=True
+            )
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "profile": profile,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+        },
+        "results": results
+    }
+
+
+def compare(current, baseline, threshold):
+
+    previous = {
+        (r["name"], r["size"]): r
+        for r in baseline["results"]
+    }
+
+    regressions = []
+
+    for r in current["results"]:
+
+        old = previous.get((r["name"], r["size"]))
+
+        if not old or not old["seconds"]:
+            continue
+
+        ratio = r["seconds"] / old["seconds"]
+
+        if ratio > threshold:
+            regressions.append((r["name"], r["size"], ratio))
+
+    return regressions
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", choices=list(SIZES), default="quick")
+    parser.add_argument("--only", nargs="*")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    current = run(args.profile, args.only)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.compare:
+
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(current, baseline, args.threshold)
+
+        for name, size, ratio in regressions:
+            print(f"REGRESSION {name} @ {size:,}: {ratio:.2f}x slower")
+
+        if regressions:
+            sys.exit(1)
+
+        print("No regressions against", args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,111 @@
 import streamlit as st
 import plotly.graph_objects as go
-import plotly.express as px
 import numpy as np
-import pandas as pd
+import time
 
-from services.history_service import load_history
+from functools import lru_cache
+
+from services.downsample import (
+    minmax_downsample,
+    lttb_downsample,
+    point_budget,
+    CHART_WIDTH_PX
+)
+from services.ecg_stream import get_ecg_streams, ECG_WINDOW_SECONDS
+from services.history_service import load_history_window
+from services.timeseries_store import now_ms
 
 
 # --------------------------------------------------------------
 # ECG MONITOR
 # --------------------------------------------------------------
-def render_ecg():
+# Samples arrive at 250 Hz through the ingestion gateway
+# (POST /ecg or MQTT ayushcare/ecg) into per-patient ring
+# buffers. Only this fragment reruns on each refresh, and every
+# trace is decimated to ECG_DISPLAY_POINTS on the server, so the
+# browser payload stays the same size however many samples are
+# buffered.
+ECG_REFRESH_SECONDS = 0.5
+ECG_DISPLAY_POINTS = 600
+ECG_MAX_STREAMS = 4
+
+# No new samples for this long marks a lead as disconnected.
+ECG_STALE_SECONDS = 2.0
+
+ECG_LAYOUT = dict(
+
+    paper_bgcolor="black",
+
+    plot_bgcolor="black",
+
+    font=dict(
+        color="#00FF66",
+        size=12
+    ),
+
+    height=260,
+
+    showlegend=False,
+
+    xaxis=dict(
+        title="Seconds",
+        range=[-ECG_WINDOW_SECONDS, 0],
+        showgrid=True,
+        gridcolor="#003300",
+        zeroline=False
+    ),
+
+    yaxis=dict(
+        title="Signal",
+        showgrid=True,
+        gridcolor="#003300",
+        zeroline=False,
+        showticklabels=False
+    ),
+
+    margin=dict(
+        l=20,
+        r=20,
+        t=30,
+        b=20
+    )
+)
+
+
+def render_ecg(selected):
 
     st.subheader("❤️ Live ECG Monitor")
 
-    with st.container(border=True):
+    streaming = get_ecg_streams().patients()
 
-        x = np.linspace(0, 10, 500)
+    if not streaming:
 
-        y = (
-            np.sin(15 * x)
-            + 0.3 * np.sin(50 * x)
-            + 0.1 * np.random.randn(len(x))
+        st.info(
+            "📡 No ECG stream yet. Devices publish 250 Hz samples to "
+            "the ingestion gateway (POST /ecg or MQTT ayushcare/ecg)."
         )
+        return
+
+    default = [selected] if selected in streaming else streaming[:1]
 
-        fig_ecg = go.Figure()
+    patient_ids = st.multiselect(
+        "ECG leads",
+        streaming,
+        default=default,
+        max_selections=ECG_MAX_STREAMS
+    )
+
+    with st.container(border=True):
+        _render_ecg_traces(patient_ids)
 
-        fig_ecg.add_trace(
+
+def _ecg_figure(patient_id):
+
+    fig_ecg = go.Figure(
+        data=[
             go.Scatter(
-                x=x,
-                y=y,
+                x=[],
+                y=[],
                 mode="lines",
                 line=dict(
                     color="#00FF66",
@@ -37,73 +113,108 @@ def render_ecg():
                 ),
                 name="ECG"
             )
-        )
+        ],
+        layout=ECG_LAYOUT
+    )
 
-        fig_ecg.update_layout(
-
-            paper_bgcolor="black",
-
-            plot_bgcolor="black",
-
-            font=dict(
-                color="#00FF66",
-                size=12
-            ),
-
-            height=320,
-
-            showlegend=False,
-
-            xaxis=dict(
-                title="Time",
-                showgrid=True,
-                gridcolor="#003300",
-                zeroline=False,
-                showticklabels=False
-            ),
-            
-            yaxis=dict(
-                title="Signal",
-                showgrid=True,
-                gridcolor="#003300",
-                zeroline=False,
-                showticklabels=False
-            ),
-
-            margin=dict(
-                l=20,
-                r=20,
-                t=20,
-                b=20
-            )
-        )
+    fig_ecg.update_layout(title=f"Patient {patient_id}")
+
+    return fig_ecg
+
+
+# Building a figure costs several times more than swapping the
+# trace data of an existing one, so each session keeps one figure
+# per lead and only replaces x/y when new samples have arrived.
+@st.fragment(run_every=ECG_REFRESH_SECONDS)
+def _render_ecg_traces(patient_ids):
+
+    streams = get_ecg_streams()
+
+    seen = st.session_state.setdefault("ecg_seen", {})
+    figures = st.session_state.setdefault("ecg_figures", {})
+
+    for patient_id in list(figures):
+
+        if patient_id not in patient_ids:
+            del figures[patient_id]
+            seen.pop(patient_id, None)
+
+    now = time.monotonic()
+
+    rate = streams.sample_rate
+
+    for patient_id in patient_ids:
+
+        ring = streams.get(patient_id)
+        sequence = ring.written if ring is not None else 0
+
+        last_sequence, changed_at = seen.get(patient_id, (None, now))
+
+        fig_ecg = figures.get(patient_id)
+
+        if fig_ecg is None:
+            fig_ecg = figures[patient_id] = _ecg_figure(patient_id)
+
+        if sequence != last_sequence:
+
+            changed_at = now
+
+            samples, sequence = streams.latest(patient_id)
+
+            seconds = (np.arange(len(samples)) - len(samples)) / rate
+
+            x, y = minmax_downsample(seconds, samples, ECG_DISPLAY_POINTS)
+
+            fig_ecg.data[0].x = x
+            fig_ecg.data[0].y = y
+
+        seen[patient_id] = (sequence, changed_at)
 
         st.plotly_chart(
             fig_ecg,
-            use_container_width=True
+            use_container_width=True,
+            key=f"ecg_{patient_id}"
         )
 
-        st.info(
-            "🟢 ECG Status: Normal Sinus Rhythm Detected"
-        )
-        c1, c2, c3 = st.columns(3)
+        if now - changed_at > ECG_STALE_SECONDS:
+
+            st.error("🔴 Lead disconnected: no new samples")
 
-        with c1:
-            st.success("🟢 Lead Connected")
-        
-        with c2:
-            st.success("📡 Signal Stable")
-        
-        with c3:
-            st.success("❤️ BPM Detected")
+        else:
+
+            st.caption(
+                f"🟢 {rate} Hz · {min(sequence, streams.capacity) / rate:.1f} s "
+                f"buffered · {len(fig_ecg.data[0].x)} points drawn"
+            )
 
 # --------------------------------------------------------------
 # PREMIUM VITALS CHART
 # --------------------------------------------------------------
+# Building a figure validates it against plotly's schema, which
+# costs far more than sending it. The live tile redraws the same
+# vitals on most refreshes, so figures are kept per set of values
+# across reruns and sessions; they are never modified once built.
+VITALS_FIGURE_CACHE = 1024
+
+
 def render_vitals_chart(vitals):
 
     st.subheader("📊 Live Vitals Analytics")
 
+    st.plotly_chart(
+        vitals_figure(
+            vitals["temperature"],
+            vitals["heart_rate"],
+            vitals["spo2"],
+            vitals["respiratory_rate"]
+        ),
+        use_container_width=True
+    )
+
+
+@lru_cache(maxsize=VITALS_FIGURE_CACHE)
+def vitals_figure(temperature, heart_rate, spo2, respiratory_rate):
+
     fig = go.Figure(
         data=[
             go.Bar(
@@ -115,10 +226,10 @@ def render_vitals_chart(vitals):
                 ],
 
                 y=[
-                    vitals["temperature"],
-                    vitals["heart_rate"],
-                    vitals["spo2"],
-                    vitals["respiratory_rate"]
+                    temperature,
+                    heart_rate,
+                    spo2,
+                    respiratory_rate
                 ],
 
                 marker_color=[
@@ -139,41 +250,82 @@ def render_vitals_chart(vitals):
         yaxis_title="Values"
     )
 
-    st.plotly_chart(
-        fig,
-        use_container_width=True
-    )
+    return fig
 
 
 # --------------------------------------------------------------
 # HISTORY DASHBOARD
 # --------------------------------------------------------------
-def render_history(selected):
+# Long ranges hold up to days of 1 Hz rows. Each trace is reduced
+# with LTTB to a budget derived from the chart width before it is
+# sent to the browser.
+HISTORY_RANGES = {
+    "1 hour": 60 * 60 * 1000,
+    "6 hours": 6 * 60 * 60 * 1000,
+    "24 hours": 24 * 60 * 60 * 1000,
+    "7 days": 7 * 24 * 60 * 60 * 1000
+}
+
+# Below this many points per trace, markers are drawn too.
+HISTORY_MARKER_POINTS = 200
+
+
+# `load_window(patient_id, range_ms)` returns the readings of the
+# last range_ms; the default reads them from the store.
+def render_history(selected, width_px=CHART_WIDTH_PX, load_window=None):
 
     st.subheader("📈 Real-Time Patient History")
 
-    history = load_history()
+    label = st.radio(
+        "History range",
+        list(HISTORY_RANGES),
+        horizontal=True,
+        key="history_range"
+    )
 
-    patient_history = history.get(selected, [])
+    if load_window is None:
+        load_window = _load_recent_history
 
-    if patient_history:
+    window = load_window(selected, HISTORY_RANGES[label])
 
-        history_df = pd.DataFrame(patient_history)
+    if len(window["timestamp"]):
 
-        fig_history = px.line(
-            history_df,
-            x="time",
-            y=[
-                "heart_rate",
-                "spo2",
-                "temperature"
-            ],
-            markers=True,
-            template="plotly_dark"
-        )
+        budget = point_budget(width_px)
+
+        fig_history = go.Figure()
+
+        for column in [
+            "heart_rate",
+            "spo2",
+            "temperature"
+        ]:
+
+            values = window[column]
+
+            present = np.isfinite(values)
+
+            x, y = lttb_downsample(
+                window["timestamp"][present],
+                values[present],
+                budget
+            )
+
+            fig_history.add_trace(
+                go.Scatter(
+                    x=x.astype("datetime64[ms]"),
+                    y=y,
+                    mode=(
+                        "lines+markers"
+                        if len(x) <= HISTORY_MARKER_POINTS
+                        else "lines"
+                    ),
+                    name=column
+                )
+            )
 
         fig_history.update_layout(
             height=400,
+            template="plotly_dark",
             title="Historical Health Trends"
         )
 
@@ -182,8 +334,20 @@ def render_history(selected):
             use_container_width=True
         )
 
+        if len(window["timestamp"]) > budget:
+
+            st.caption(
+                f"{len(window['timestamp']):,} readings drawn as "
+                f"{budget:,} points per trace"
+            )
+
     else:
 
         st.info(
             "No historical data available yet."
         )
+
+
+def _load_recent_history(patient_id, range_ms):
+
+    return load_history_window(patient_id, now_ms() - range_ms)
@@ -1,47 +1,52 @@
 import streamlit as st
-import json
-import os
+import html
+import time
 
-from datetime import datetime
+from functools import lru_cache
 
+from services.notes_service import (
+    load_note_page,
+    save_note,
+    search_notes
+)
 
-NOTES_FILE = "doctor_notes.json"
+# Rendered note cards kept across reruns and sessions.
+NOTE_HTML_CACHE = 4096
 
-
-# --------------------------------------------------------------
-# LOAD NOTES
-# --------------------------------------------------------------
-def load_notes():
-
-    if os.path.exists(NOTES_FILE):
-
-        with open(NOTES_FILE, "r") as f:
-            return json.load(f)
-
-    return {}
+SEARCH_PERIODS = {
+    "Any time": None,
+    "Last 24 hours": 24 * 3600,
+    "Last 7 days": 7 * 24 * 3600,
+    "Last 30 days": 30 * 24 * 3600
+}
 
 
 # --------------------------------------------------------------
-# SAVE NOTE
+# NOTE CARD
 # --------------------------------------------------------------
-def save_note(patient_id, note):
-
-    notes = load_notes()
-
-    if patient_id not in notes:
-        notes[patient_id] = []
+# Note text is escaped so an observation containing "<" shows as
+# written instead of being parsed as markup.
+@lru_cache(maxsize=NOTE_HTML_CACHE)
+def note_html(time, note):
 
-    notes[patient_id].append({
+    return f"""
+    <div style='
+    background:white;
+    padding:1rem;
+    border-radius:15px;
+    margin-bottom:1rem;
+    box-shadow:
+    0 4px 10px rgba(0,0,0,0.08);
+    '>
 
-        "time": datetime.now().strftime(
-            "%Y-%m-%d %H:%M:%S"
-        ),
+    <b>🕒 {html.escape(str(time))}</b>
 
-        "note": note
-    })
+    <p style='margin-top:10px;'>
+    {html.escape(str(note))}
+    </p>
 
-    with open(NOTES_FILE, "w") as f:
-        json.dump(notes, f, indent=4)
+    </div>
+    """
 
 
 # --------------------------------------------------------------
@@ -51,9 +56,27 @@ def render_doctor_notes(selected):
 
     st.subheader("🩺 Doctor Notes & Observations")
 
-    notes = load_notes()
+    # The newest page is read on every run. Older pages fetched with
+    # "Load older notes" are kept per patient with the cursor to
+    # continue from, so each click reads one more page only. They
+    # are dropped once new notes move the newest page along.
+    paging = st.session_state.setdefault("notes_paging", {})
+
+    patient_notes, cursor = load_note_page(selected)
+
+    state = paging.get(selected)
 
-    patient_notes = notes.get(selected, [])
+    if state is None or state["anchor"] != cursor:
+
+        state = paging[selected] = {
+            "anchor": cursor,
+            "older": [],
+            "cursor": cursor
+        }
+
+    patient_notes = patient_notes + state["older"]
+
+    older = state["cursor"]
 
     # ----------------------------------------------------------
     # NEW NOTE INPUT
@@ -84,6 +107,63 @@ Continue hydration and monitoring.
 
     st.write("---")
 
+    # ----------------------------------------------------------
+    # SEARCH
+    # ----------------------------------------------------------
+    st.markdown("### 🔎 Search Notes")
+
+    query = st.text_input(
+        "Search observations",
+        placeholder='hypoxia, "continue hydration"',
+        key="notes_search"
+    )
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        this_patient = st.checkbox(
+            "Only this patient",
+            key="notes_search_patient"
+        )
+
+    with col2:
+        period = st.selectbox(
+            "Period",
+            list(SEARCH_PERIODS),
+            key="notes_search_period"
+        )
+
+    if query.strip():
+
+        seconds = SEARCH_PERIODS[period]
+
+        results = search_notes(
+            query,
+            patient_id=selected if this_patient else None,
+            start_ms=(
+                int((time.time() - seconds) * 1000) if seconds else None
+            )
+        )
+
+        if results:
+
+            st.markdown(
+                "".join(
+                    note_html(
+                        f"{r['patient_id']} · {r['time']}",
+                        r["note"]
+                    )
+                    for r in results
+                ),
+                unsafe_allow_html=True
+            )
+
+        else:
+
+            st.info("No matching notes.")
+
+    st.write("---")
+
     # ----------------------------------------------------------
     # NOTES HISTORY
     # ----------------------------------------------------------
@@ -91,26 +171,25 @@ Continue hydration and monitoring.
 
     if patient_notes:
 
-        for entry in reversed(patient_notes):
+        # Newest first, all cards in one element.
+        st.markdown(
+            "".join(
+                note_html(entry["time"], entry["note"])
+                for entry in patient_notes
+            ),
+            unsafe_allow_html=True
+        )
 
-            st.markdown(f"""
-            <div style='
-            background:white;
-            padding:1rem;
-            border-radius:15px;
-            margin-bottom:1rem;
-            box-shadow:
-            0 4px 10px rgba(0,0,0,0.08);
-            '>
+        if older is not None and st.button("⬇️ Load older notes"):
 
-            <b>🕒 {entry['time']}</b>
+            page, state["cursor"] = load_note_page(
+                selected,
+                before=older
+            )
 
-            <p style='margin-top:10px;'>
-            {entry['note']}
-            </p>
+            state["older"].extend(page)
 
-            </div>
-            """, unsafe_allow_html=True)
+            st.rerun()
 
     else:
 
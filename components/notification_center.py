@@ -0,0 +1,52 @@
+import streamlit as st
+
+from services.notification_service import (
+    load_alerts,
+    suppression_stats
+)
+
+
+# --------------------------------------------------------------
+# NOTIFICATION CENTER
+# --------------------------------------------------------------
+# Shows the newest stored alerts for the ward. Repeats folded into
+# an alert by the dedup window and rate limits are shown as a
+# count on it instead of as separate entries. `alerts` may be
+# passed in when the caller already has them.
+def render_notification_center(alerts=None):
+
+    st.subheader("🔔 Notification Center")
+
+    if alerts is None:
+        alerts = load_alerts()
+
+    if not alerts:
+
+        st.info("No alerts raised.")
+        return
+
+    for alert in reversed(alerts):
+
+        text = (
+            f"{alert['time']} · {alert['patient_id']} · "
+            f"{alert['message']}"
+        )
+
+        if alert.get("suppressed"):
+            text += f" (+{alert['suppressed']} repeats)"
+
+        if alert["severity"] == "critical":
+            st.error(text)
+
+        else:
+            st.warning(text)
+
+    stats = suppression_stats()
+
+    if stats["suppressed"]:
+
+        st.caption(
+            f"🔕 {stats['suppressed']:,} repeat alerts suppressed "
+            f"({stats['duplicates']:,} duplicates, "
+            f"{stats['rate_limited']:,} rate limited)"
+        )
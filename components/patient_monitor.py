@@ -1,21 +1,84 @@
 import streamlit as st
-import pandas as pd
 import json
 
+from services.ward_service import WardOverview
 
-def render_patient_monitor():
+
+WARD_PAGE_SIZE = 50
+
+SORT_OPTIONS = {
+    "Highest risk first": ("risk_score", True),
+    "Lowest risk first": ("risk_score", False),
+    "Patient ID": ("patient_id", True)
+}
+
+
+def render_patient_monitor(ward_frame):
 
     st.subheader("🏥 Multi-Patient Monitoring")
 
-    patient_overview = pd.DataFrame([
-        ["P001", "Stable", "Low"],
-        ["P002", "Critical", "High"],
-        ["P003", "Observation", "Moderate"],
-        ["P004", "Stable", "Low"]
-    ], columns=["Patient", "Status", "Risk"])
+    if "ward_overview" not in st.session_state:
+        st.session_state.ward_overview = WardOverview()
+
+    overview = st.session_state.ward_overview.update(ward_frame)
+
+    # The ward can shrink between runs; a page number past the end
+    # would make number_input raise.
+    page_count = overview.page_count(WARD_PAGE_SIZE)
+
+    if st.session_state.get("ward_page", 1) > page_count:
+        st.session_state.ward_page = page_count
+
+    c1, c2, c3 = st.columns([2, 1, 1])
+
+    with c1:
+        sort_label = st.selectbox(
+            "Sort patients",
+            list(SORT_OPTIONS),
+            key="ward_sort"
+        )
+
+    with c2:
+        page_number = st.number_input(
+            "Page",
+            min_value=1,
+            max_value=page_count,
+            key="ward_page"
+        )
+
+    with c3:
+        st.metric(
+            "Rescored",
+            f"{overview.last_rescored}/{len(overview.table)}"
+        )
+
+    sort_by, ascending = SORT_OPTIONS[sort_label]
+
+    if sort_by == "patient_id":
+        sort_by = overview.table.index.name or "patient_id"
+
+    # Only the visible page is styled and sent to the browser.
+    patient_overview = (
+        overview.page(
+            page_number - 1,
+            WARD_PAGE_SIZE,
+            sort_by,
+            ascending
+        )
+        .reset_index()
+        .rename(columns={
+            "patient_id": "Patient",
+            "patient_status": "Status",
+            "risk_level": "Risk",
+            "risk_score": "Score"
+        })
+    )
 
     st.dataframe(
-        patient_overview,
+        patient_overview.style.apply(
+            highlight_status,
+            axis=1
+        ),
         use_container_width=True
     )
 
@@ -43,17 +106,10 @@ def render_download(selected, vitals):
     )
 
 def highlight_status(row):
-    if row["Risk"] == "High":
+    if row["Risk"] in ("High", "Critical"):
         return ["background-color:#ffcccc"] * len(row)
 
     elif row["Risk"] == "Moderate":
         return ["background-color:#fff4cc"] * len(row)
 
     return ["background-color:#d4edda"] * len(row)
-    
-    st.dataframe(
-        df.style.apply(
-            highlight_status,
-            axis=1
-        )
-    )
@@ -0,0 +1,48 @@
+import streamlit as st
+import pandas as pd
+
+from services import perf
+
+
+# --------------------------------------------------------------
+# ADMIN PERFORMANCE PANEL
+# --------------------------------------------------------------
+# Only shown when timing is on (AYUSHCARE_PERF=1). Rows are
+# per render/service call, slowest total first.
+def render_perf_panel():
+
+    recorder = perf.get_recorder()
+
+    if recorder is None:
+        return
+
+    with st.expander("⏱ Performance (admin)"):
+
+        rows = recorder.summary()
+
+        if not rows:
+            st.info("No timings recorded yet.")
+            return
+
+        st.dataframe(
+            pd.DataFrame(rows).set_index("name"),
+            use_container_width=True
+        )
+
+        last = [
+            s for s in list(recorder.samples)
+            if s["name"] == "page_dashboard"
+        ]
+
+        if last:
+            st.caption(
+                f"Last dashboard rerun: {last[-1]['ms']:.1f} ms · "
+                f"{len(recorder.samples)} samples buffered"
+            )
+
+        if recorder.log_path:
+            st.caption(f"Logging to {recorder.log_path}")
+
+        if st.button("🧹 Reset timings"):
+            recorder.reset()
+            st.rerun()
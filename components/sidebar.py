@@ -9,7 +9,7 @@ def render_sidebar():
 
     data_source = st.sidebar.radio(
         "📦 Data Source",
-        ["Local JSON", "Upload CSV"]
+        ["Local JSON", "Upload CSV", "Live Devices"]
     )
 
     show_gauge = st.sidebar.checkbox(
@@ -1,27 +1,7 @@
 import streamlit as st
 import plotly.graph_objects as go
 from datetime import datetime
-
-st.markdown("""
-<style>
-
-@keyframes pulse {
-
-    0% {
-        transform: scale(1);
-    }
-
-    50% {
-        transform: scale(1.01);
-    }
-
-    100% {
-        transform: scale(1);
-    }
-}
-
-</style>
-""", unsafe_allow_html=True)
+from functools import lru_cache
 
 def render_status_card(
     risk_score, 
@@ -30,6 +10,27 @@ def render_status_card(
     patient_status, 
     show_gauge=True):
 
+    st.markdown("""
+    <style>
+
+    @keyframes pulse {
+
+        0% {
+            transform: scale(1);
+        }
+
+        50% {
+            transform: scale(1.01);
+        }
+
+        100% {
+            transform: scale(1);
+        }
+    }
+
+    </style>
+    """, unsafe_allow_html=True)
+
     col1, col2 = st.columns([3,2])
 
     with col1:
@@ -64,40 +65,48 @@ def render_status_card(
 
         if show_gauge:
     
-            score_fig = go.Figure(
-                go.Indicator(
-                    mode="gauge+number",
-                    value=risk_score,
-                    title={
-                        "text": "<b>Health Score</b>",
-                        "font": {
-                            "size": 30,
-                            "color": "#000000"
-                        }
-                    },
-                    gauge={
-                        "axis": {
-                            "range": [0, 100]
-                        },
-                        "bar": {
-                            "color": "#00d4ff"
-                        }
-                    }
-                )
-            )
-    
-            score_fig.update_layout(
-                height=320,
-                template="plotly_dark",
-                paper_bgcolor="rgba(0,0,0,0)",
-                plot_bgcolor="rgba(0,0,0,0)",
-                font=dict(
-                    color="#000000",
-                    size=24
-                )
-            )
-    
             st.plotly_chart(
-                score_fig,
+                score_figure(risk_score),
                 use_container_width=True
             )
+
+
+# The gauge only depends on the score, so each one is built once
+# and reused by every refresh and session showing that score.
+@lru_cache(maxsize=101)
+def score_figure(risk_score):
+
+    score_fig = go.Figure(
+        go.Indicator(
+            mode="gauge+number",
+            value=risk_score,
+            title={
+                "text": "<b>Health Score</b>",
+                "font": {
+                    "size": 30,
+                    "color": "#000000"
+                }
+            },
+            gauge={
+                "axis": {
+                    "range": [0, 100]
+                },
+                "bar": {
+                    "color": "#00d4ff"
+                }
+            }
+        )
+    )
+
+    score_fig.update_layout(
+        height=320,
+        template="plotly_dark",
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font=dict(
+            color="#000000",
+            size=24
+        )
+    )
+
+    return score_fig
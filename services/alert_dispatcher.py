@@ -0,0 +1,425 @@
+import queue
+import threading
+import time
+
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from services.rate_limit import TokenBucket
+
+
+DISPATCH_QUEUE_SIZE = 1000
+DISPATCH_WORKERS = 4
+
+# Alerts for the same recipient and patient arriving within this
+# many seconds of the first one are sent as one message.
+COALESCE_SECONDS = 2.0
+
+# SNS allows 20 SMS/s per account by default; stay under it.
+SNS_RATE = 10.0
+SNS_BURST = 20
+
+# PublishBatch takes at most 10 entries per call.
+PUBLISH_BATCH_MAX = 10
+
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.2
+
+# API calls handed to the worker pool but not finished yet.
+MAX_IN_FLIGHT = DISPATCH_WORKERS * 4
+
+BLOCKED_POLL = 0.05
+
+
+def _is_topic(recipient):
+
+    return recipient.startswith("arn:")
+
+
+def _compose(patient_id, messages):
+
+    counts = Counter(messages)
+
+    parts = [
+        f"{text} x{count}" if count > 1 else text
+        for text, count in counts.items()
+    ]
+
+    return f"[AyushCare] Patient {patient_id}: " + "; ".join(parts)
+
+
+# --------------------------------------------------------------
+# DISPATCHER
+# --------------------------------------------------------------
+# submit() only puts the alert on a bounded queue, so a dashboard
+# rerun never waits on SNS. A collector thread groups alerts per
+# (recipient, patient) for COALESCE_SECONDS, then hands each API
+# call to a small worker pool. Phone numbers get one Publish per
+# group; topic ARNs get PublishBatch with up to 10 groups per call.
+# Every message sent takes a token from a shared bucket, which
+# holds the account below the provider's rate limit.
+class AlertDispatcher:
+
+    def __init__(
+        self,
+        client_factory,
+        recipients,
+        queue_size=DISPATCH_QUEUE_SIZE,
+        workers=DISPATCH_WORKERS,
+        window=COALESCE_SECONDS,
+        rate=SNS_RATE,
+        burst=SNS_BURST,
+        max_retries=MAX_RETRIES,
+        backoff=RETRY_BACKOFF
+    ):
+
+        self.client_factory = client_factory
+        self.recipients = list(recipients)
+        self.window = window
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.bucket = TokenBucket(rate, burst)
+
+        self.pool = ThreadPoolExecutor(
+            workers,
+            thread_name_prefix="sns-dispatch"
+        )
+
+        self._slots = threading.Semaphore(MAX_IN_FLIGHT)
+
+        # (recipient, patient_id) -> [first seen, messages, submit times]
+        self._groups = {}
+
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+
+        self._flush_requested = threading.Event()
+        self._closed = False
+
+        self.submitted = 0
+        self.dropped = 0
+        self.api_calls = 0
+        self.sent = 0
+        self.alerts_delivered = 0
+        self.failed = 0
+        self.retries = 0
+
+        # Seconds from submit() to the provider accepting the message.
+        self.latencies = deque(maxlen=10000)
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="sns-collector",
+            daemon=True
+        )
+        self._thread.start()
+
+    # ----------------------------------------------------------
+    # PRODUCER SIDE
+    # ----------------------------------------------------------
+    def submit(self, patient_id, message, recipients=None):
+
+        try:
+            self.queue.put_nowait((
+                time.perf_counter(),
+                patient_id,
+                message,
+                recipients or self.recipients
+            ))
+
+        except queue.Full:
+
+            with self._lock:
+                self.dropped += 1
+
+            return False
+
+        with self._lock:
+            self.submitted += 1
+
+        return True
+
+    # ----------------------------------------------------------
+    # COLLECTOR
+    # ----------------------------------------------------------
+    def _add(self, item):
+
+        # None only wakes the collector up for flush() and close().
+        if item is None:
+            return
+
+        submitted, patient_id, message, recipients = item
+
+        for recipient in recipients:
+
+            group = self._groups.get((recipient, patient_id))
+
+            if group is None:
+                group = self._groups[(recipient, patient_id)] = [
+                    time.perf_counter(), [], []
+                ]
+
+            group[1].append(message)
+            group[2].append(submitted)
+
+    def _due(self, force):
+
+        now = time.perf_counter()
+
+        ready = [
+            key for key, group in self._groups.items()
+            if force or now - group[0] >= self.window
+        ]
+
+        return [(key, self._groups.pop(key)) for key in ready]
+
+    def _next_deadline(self):
+
+        if not self._groups:
+            return self.window
+
+        oldest = min(group[0] for group in self._groups.values())
+
+        return max(0.0, oldest + self.window - time.perf_counter())
+
+    def _run(self):
+
+        blocked = False
+
+        while True:
+
+            timeout = self._next_deadline()
+
+            # Groups are due but every worker slot is taken: check
+            # again shortly instead of spinning.
+            if blocked:
+                timeout = max(timeout, BLOCKED_POLL)
+
+            try:
+                self._add(self.queue.get(timeout=timeout))
+
+                # Drain what is already waiting, bounded so a steady
+                # stream cannot hold back groups that are due.
+                for _ in range(self.queue.maxsize):
+                    self._add(self.queue.get_nowait())
+
+            except queue.Empty:
+                pass
+
+            force = self._flush_requested.is_set()
+
+            blocked = not self._dispatch(self._due(force))
+
+            if force and self.queue.empty() and not self._groups:
+                self._flush_requested.clear()
+
+            if self._closed and self.queue.empty() and not self._groups:
+                return
+
+    # Starts one API call per SMS group and per 10 topic groups.
+    # When the provider cannot keep up and all MAX_IN_FLIGHT slots
+    # are busy, the remaining groups go back and keep absorbing new
+    # alerts for the same patient instead of being dropped.
+    def _dispatch(self, groups):
+
+        calls = []
+        topics = {}
+
+        for key, group in groups:
+
+            if _is_topic(key[0]):
+                topics.setdefault(key[0], []).append((key, group))
+
+            else:
+                calls.append((self._publish_sms, key[0], [(key, group)]))
+
+        for topic, items in topics.items():
+
+            for i in range(0, len(items), PUBLISH_BATCH_MAX):
+                calls.append(
+                    (self._publish_batch, topic, items[i:i + PUBLISH_BATCH_MAX])
+                )
+
+        for n, (send, recipient, items) in enumerate(calls):
+
+            if not self._slots.acquire(blocking=False):
+
+                for _, _, waiting in calls[n:]:
+                    for key, group in waiting:
+                        self._groups[key] = group
+
+                return False
+
+            with self._lock:
+                self._in_flight += 1
+
+            entries = [
+                (_compose(key[1], group[1]), group[2])
+                for key, group in items
+            ]
+
+            self.pool.submit(self._send, send, recipient, entries)
+
+        return True
+
+    # ----------------------------------------------------------
+    # WORKERS
+    # ----------------------------------------------------------
+    def _send(self, send, recipient, entries):
+
+        try:
+
+            for attempt in range(self.max_retries + 1):
+
+                self.bucket.acquire(min(len(entries), self.bucket.capacity))
+
+                try:
+                    entries = send(recipient, entries)
+
+                except Exception:
+                    pass
+
+                if not entries:
+                    return
+
+                if attempt < self.max_retries:
+
+                    with self._lock:
+                        self.retries += 1
+
+                    time.sleep(self.backoff * 2 ** attempt)
+
+            with self._lock:
+                self.failed += len(entries)
+
+        finally:
+
+            self._slots.release()
+
+            with self._lock:
+                self._in_flight -= 1
+                self._idle.notify_all()
+
+    def _delivered(self, entries):
+
+        now = time.perf_counter()
+
+        with self._lock:
+
+            self.sent += len(entries)
+
+            for _, submitted in entries:
+                self.alerts_delivered += len(submitted)
+                self.latencies.extend(now - t for t in submitted)
+
+    # Each send returns the entries that still need to be retried.
+    def _publish_sms(self, phone, entries):
+
+        with self._lock:
+            self.api_calls += 1
+
+        self.client_factory().publish(
+            PhoneNumber=phone,
+            Message=entries[0][0]
+        )
+
+        self._delivered(entries)
+
+        return []
+
+    def _publish_batch(self, topic, entries):
+
+        with self._lock:
+            self.api_calls += 1
+
+        response = self.client_factory().publish_batch(
+            TopicArn=topic,
+            PublishBatchRequestEntries=[
+                {"Id": str(i), "Message": text}
+                for i, (text, _) in enumerate(entries)
+            ]
+        )
+
+        failed = {item["Id"] for item in response.get("Failed", [])}
+
+        self._delivered([
+            entry for i, entry in enumerate(entries)
+            if str(i) not in failed
+        ])
+
+        return [
+            entry for i, entry in enumerate(entries)
+            if str(i) in failed
+        ]
+
+    # ----------------------------------------------------------
+    # LIFECYCLE / METRICS
+    # ----------------------------------------------------------
+    # Sends everything queued or grouped now and waits for the
+    # workers to finish.
+    def flush(self, timeout=10.0):
+
+        deadline = time.perf_counter() + timeout
+
+        self._flush_requested.set()
+        self.queue.put(None)
+
+        while (
+            self._flush_requested.is_set()
+            and time.perf_counter() < deadline
+        ):
+            time.sleep(0.005)
+
+        with self._idle:
+
+            while self._in_flight:
+
+                remaining = deadline - time.perf_counter()
+
+                if remaining <= 0:
+                    return False
+
+                self._idle.wait(remaining)
+
+        return True
+
+    def close(self, timeout=10.0):
+
+        self.flush(timeout)
+
+        self._closed = True
+        self.queue.put(None)
+
+        self._thread.join(timeout)
+
+        self.pool.shutdown(wait=True)
+
+    def stats(self):
+
+        with self._lock:
+
+            latencies = np.array(self.latencies) * 1000
+
+            return {
+                "submitted": self.submitted,
+                "dropped": self.dropped,
+                "api_calls": self.api_calls,
+                "messages_sent": self.sent,
+                "alerts_delivered": self.alerts_delivered,
+                "coalesced": self.alerts_delivered - self.sent,
+                "failed": self.failed,
+                "retries": self.retries,
+                "queue_depth": self.queue.qsize(),
+                "in_flight": self._in_flight,
+                "latency_p50_ms": round(
+                    float(np.percentile(latencies, 50)), 1
+                ) if len(latencies) else None,
+                "latency_p99_ms": round(
+                    float(np.percentile(latencies, 99)), 1
+                ) if len(latencies) else None
+            }
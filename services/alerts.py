@@ -1,4 +1,5 @@
 import time
+import numpy as np
 import streamlit as st
 
 
@@ -47,3 +48,91 @@ def calculate_risk(vitals):
         patient_status = "🔴 Critical Condition"
 
     return risk_score, risk_level, risk_color, patient_status
+
+
+# --------------------------------------------------------------
+# BATCH SCORING
+# --------------------------------------------------------------
+# Same thresholds as get_alerts / calculate_risk, applied to whole
+# columns at once. `vitals` can be a DataFrame or a dict of
+# equal-length arrays with spo2, heart_rate and temperature.
+RISK_LEVELS = np.array(["Low", "Moderate", "Critical"], dtype=object)
+
+RISK_COLORS = np.array(["#16a34a", "#f59e0b", "#dc2626"], dtype=object)
+
+PATIENT_STATUSES = np.array([
+    "🟢 Patient Stable",
+    "🟡 Monitoring Required",
+    "🔴 Critical Condition"
+], dtype=object)
+
+ALERT_RULES = [
+    ("SpO₂", "critical", "Low oxygen detected"),
+    ("Heart Rate", "warning", "Possible tachycardia"),
+    ("Temperature", "warning", "High fever detected")
+]
+
+# Every combination of the three rules, indexed by a 3-bit code,
+# so per-row alerts are a single fancy-indexing lookup. The table
+# holds tuples; each row gets its own list copy, so callers may
+# append to it.
+_ALERT_COMBOS = np.empty(8, dtype=object)
+
+for _code in range(8):
+    _ALERT_COMBOS[_code] = tuple(
+        rule for bit, rule in enumerate(ALERT_RULES)
+        if _code & (1 << bit)
+    )
+
+_as_list = np.frompyfunc(list, 1, 1)
+
+
+def _columns(vitals):
+
+    return (
+        np.asarray(vitals["spo2"], dtype=float),
+        np.asarray(vitals["heart_rate"], dtype=float),
+        np.asarray(vitals["temperature"], dtype=float)
+    )
+
+
+def get_alerts_batch(vitals):
+
+    spo2, heart_rate, temperature = _columns(vitals)
+
+    code = (
+        (spo2 < 90).astype(np.uint8)
+        | ((heart_rate > 100).astype(np.uint8) << 1)
+        | ((temperature > 38.9).astype(np.uint8) << 2)
+    )
+
+    if np.ndim(code) == 0:
+        return list(_ALERT_COMBOS[code])
+
+    return _as_list(_ALERT_COMBOS[code])
+
+
+def calculate_risk_batch(vitals):
+
+    spo2, heart_rate, temperature = _columns(vitals)
+
+    risk_score = (
+        100
+        - 20 * (spo2 < 95)
+        - 15 * (heart_rate > 100)
+        - 15 * (temperature > 38)
+    ).astype(np.int64)
+
+    level = np.where(
+        risk_score >= 85,
+        0,
+        np.where(risk_score >= 60, 1, 2)
+    )
+
+    return {
+        "risk_score": risk_score,
+        "risk_level": RISK_LEVELS[level],
+        "risk_color": RISK_COLORS[level],
+        "patient_status": PATIENT_STATUSES[level],
+        "alerts": get_alerts_batch(vitals)
+    }
@@ -1,11 +1,37 @@
 import bcrypt
 import json
 import os
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from services.storage import FileLock, get_backend, get_database
 
 USERS_FILE = "users.json"
 
+# New and changed accounts are appended here as JSON lines and
+# folded back into users.json once there are enough of them.
+USERS_JOURNAL = "users.journal"
+USERS_COMPACT_EVERY = 1000
+
+# bcrypt releases the GIL, so a small pool lets logins from
+# different sessions hash in parallel without one login flood
+# taking every core.
+BCRYPT_WORKERS = 4
+
+_bcrypt_pool = ThreadPoolExecutor(
+    BCRYPT_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+
+_directory = None
+_directory_lock = threading.Lock()
 
-def hash_password(password):
+
+# --------------------------------------------------------------
+# PASSWORD HASHING
+# --------------------------------------------------------------
+def _hash(password):
 
     return bcrypt.hashpw(
         password.encode(),
@@ -13,7 +39,7 @@ def hash_password(password):
     ).decode()
 
 
-def verify_password(password, hashed):
+def _check(password, hashed):
 
     return bcrypt.checkpw(
         password.encode(),
@@ -21,17 +47,455 @@ def verify_password(password, hashed):
     )
 
 
-def load_users():
+def is_password_hash(value):
+
+    return isinstance(value, str) and value.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def hash_password(password):
+
+    return _bcrypt_pool.submit(_hash, password).result()
+
+
+def verify_password(password, hashed):
+
+    return _bcrypt_pool.submit(_check, password, hashed).result()
+
+
+def _signature(path):
+
+    try:
+        st = os.stat(path)
+
+    except FileNotFoundError:
+        return None
+
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+# --------------------------------------------------------------
+# USER DIRECTORY
+# --------------------------------------------------------------
+# Users indexed by username and by email, kept in memory and
+# revalidated against the files' stat() on every access. An
+# unchanged users.json costs one stat; journal lines written by
+# another process are read from the last known offset instead of
+# re-parsing everything.
+class UserDirectory:
+
+    def __init__(
+        self,
+        path=USERS_FILE,
+        journal=USERS_JOURNAL,
+        compact_every=USERS_COMPACT_EVERY
+    ):
+
+        self.path = path
+        self.journal = journal
+        self.compact_every = compact_every
+
+        self._users = {}
+        self._by_email = {}
+
+        self._base = None
+        self._offset = 0
+        self._journal_lines = 0
+
+        self._lock = threading.RLock()
+
+    # ----------------------------------------------------------
+    # CACHE
+    # ----------------------------------------------------------
+    def _index(self, username, record):
+
+        previous = self._users.get(username)
+
+        if previous and previous.get("email"):
+            self._by_email.pop(previous["email"].lower(), None)
+
+        self._users[username] = record
+
+        if record.get("email"):
+            self._by_email[record["email"].lower()] = username
+
+    def _reload(self, base):
+
+        users = {}
+
+        if base is not None:
+
+            try:
+
+                with open(self.path, "r") as f:
+                    users = json.load(f)
+
+            except json.JSONDecodeError:
+
+                users = {}
+
+        self._users = {}
+        self._by_email = {}
+
+        for username, record in users.items():
+            self._index(username, record)
+
+        self._base = base
+        self._offset = 0
+        self._journal_lines = 0
+
+    def _replay(self):
+
+        try:
+            size = os.path.getsize(self.journal)
+
+        except FileNotFoundError:
+            size = 0
+
+        if size < self._offset:
+            # Compacted by another process: users.json changed too.
+            self._reload(_signature(self.path))
+
+        if size == self._offset:
+            return
+
+        with open(self.journal, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+
+        # Only whole lines; a line still being written is picked
+        # up on the next refresh.
+        end = chunk.rfind(b"\n") + 1
+
+        for line in chunk[:end].splitlines():
+
+            if not line.strip():
+                continue
+
+            entry = json.loads(line)
+
+            self._index(entry.pop("username"), entry)
+            self._journal_lines += 1
+
+        self._offset += end
+
+    def _refresh(self):
+
+        base = _signature(self.path)
+
+        if base != self._base:
+            self._reload(base)
+
+        self._replay()
+
+    # ----------------------------------------------------------
+    # READ
+    # ----------------------------------------------------------
+    def get(self, username):
+
+        with self._lock:
+
+            self._refresh()
+
+            record = self._users.get(username)
+
+            return dict(record) if record else None
+
+    def find_by_email(self, email):
+
+        with self._lock:
+
+            self._refresh()
+
+            return self._by_email.get(str(email).lower())
+
+    def all(self):
+
+        with self._lock:
+
+            self._refresh()
+
+            return {k: dict(v) for k, v in self._users.items()}
+
+    def __len__(self):
+
+        with self._lock:
+
+            self._refresh()
+
+            return len(self._users)
+
+    # ----------------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------------
+    # Called with both locks held.
+    def _append(self, username, record):
+
+        with open(self.journal, "a") as f:
+            f.write(json.dumps(dict(record, username=username)) + "\n")
+
+        self._refresh()
+
+        if self._journal_lines >= self.compact_every:
+            self._compact()
+
+    def put(self, username, record):
+
+        with self._lock, FileLock(self.path):
+
+            self._refresh()
+            self._append(username, record)
 
-    if os.path.exists(USERS_FILE):
+    # Returns False when the username or email is already taken.
+    def add(self, username, record):
 
-        with open(USERS_FILE, "r") as f:
-            return json.load(f)
+        with self._lock, FileLock(self.path):
+
+            self._refresh()
+
+            if username in self._users:
+                return False
+
+            email = record.get("email")
+
+            if email and email.lower() in self._by_email:
+                return False
+
+            self._append(username, record)
+
+        return True
+
+    # Called with both locks held.
+    def _compact(self):
+
+        tmp = self.path + ".tmp"
+
+        with open(tmp, "w") as f:
+            json.dump(self._users, f, indent=4)
+
+        os.replace(tmp, self.path)
+
+        open(self.journal, "w").close()
+
+        self._reload(_signature(self.path))
+
+    def compact(self):
+
+        with self._lock, FileLock(self.path):
+
+            self._refresh()
+            self._compact()
+
+    def replace_all(self, users):
+
+        with self._lock, FileLock(self.path):
+
+            self._users = {}
+            self._by_email = {}
+
+            for username, record in users.items():
+                self._index(username, dict(record))
+
+            self._compact()
+
+
+# --------------------------------------------------------------
+# SQLITE USER DIRECTORY
+# --------------------------------------------------------------
+# Same interface as UserDirectory, for the SQLite backend. The
+# primary key and a case-insensitive email index replace the
+# in-memory dicts; every process sees a committed sign-up on its
+# next query.
+class SQLiteUserDirectory:
+
+    def __init__(self, db):
+
+        self.db = db
+
+        db.ensure("users", [
+            """CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                name TEXT,
+                email TEXT,
+                password TEXT NOT NULL
+            )""",
+            "CREATE INDEX IF NOT EXISTS users_email "
+            "ON users (email COLLATE NOCASE)"
+        ])
+
+    @staticmethod
+    def _record(row):
+
+        return {"name": row[0], "email": row[1], "password": row[2]}
+
+    # ----------------------------------------------------------
+    # READ
+    # ----------------------------------------------------------
+    def get(self, username):
+
+        with self.db.connection() as conn:
+
+            row = conn.execute(
+                "SELECT name, email, password FROM users WHERE username = ?",
+                (username,)
+            ).fetchone()
+
+        return self._record(row) if row else None
+
+    def find_by_email(self, email):
+
+        with self.db.connection() as conn:
+
+            row = conn.execute(
+                "SELECT username FROM users "
+                "WHERE email = ? COLLATE NOCASE LIMIT 1",
+                (str(email),)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def all(self):
+
+        with self.db.connection() as conn:
+
+            rows = conn.execute(
+                "SELECT username, name, email, password FROM users"
+            ).fetchall()
+
+        return {row[0]: self._record(row[1:]) for row in rows}
+
+    def __len__(self):
+
+        with self.db.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    # ----------------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------------
+    def _upsert(self, conn, rows):
+
+        conn.executemany(
+            "INSERT INTO users (username, name, email, password) "
+            "VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (username) DO UPDATE SET "
+            "name = excluded.name, email = excluded.email, "
+            "password = excluded.password",
+            [
+                (
+                    username,
+                    record.get("name"),
+                    record.get("email"),
+                    record["password"]
+                )
+                for username, record in rows
+            ]
+        )
+
+    def put(self, username, record):
+
+        with self.db.transaction() as conn:
+            self._upsert(conn, [(username, record)])
+
+    # Returns False when the username or email is already taken.
+    # The transaction holds the write lock from the checks to the
+    # insert, so two sessions cannot both claim the same name.
+    def add(self, username, record):
+
+        with self.db.transaction() as conn:
+
+            taken = conn.execute(
+                "SELECT 1 FROM users WHERE username = ? "
+                "OR (? IS NOT NULL AND email = ? COLLATE NOCASE) LIMIT 1",
+                (username, record.get("email"), record.get("email"))
+            ).fetchone()
+
+            if taken:
+                return False
+
+            self._upsert(conn, [(username, record)])
+
+        return True
+
+    def compact(self):
+
+        pass
+
+    def replace_all(self, users):
+
+        with self.db.transaction() as conn:
+
+            conn.execute("DELETE FROM users")
+            self._upsert(conn, users.items())
+
+
+def get_user_directory():
+
+    global _directory
+
+    with _directory_lock:
+
+        if _directory is None:
+
+            if get_backend() == "files":
+                _directory = UserDirectory()
+
+            else:
+
+                _directory = SQLiteUserDirectory(get_database())
+
+                # First start on SQLite: bring over users.json and
+                # any journaled sign-ups.
+                if not len(_directory) and os.path.exists(USERS_FILE):
+                    _directory.replace_all(UserDirectory().all())
+
+    return _directory
+
+
+# --------------------------------------------------------------
+# ACCOUNTS
+# --------------------------------------------------------------
+def get_user(username):
+
+    return get_user_directory().get(username)
+
+
+def email_registered(email):
+
+    return get_user_directory().find_by_email(email) is not None
+
+
+def register_user(username, name, email, password):
+
+    return get_user_directory().add(username, {
+        "name": name,
+        "email": email,
+        "password": hash_password(password)
+    })
+
+
+# Returns the account on success, None on a wrong password.
+# Accounts whose stored password is not a bcrypt hash (plain text
+# from before hashing) never log in.
+def authenticate(username, password):
+
+    user = get_user_directory().get(username)
+
+    if user is None or not is_password_hash(user["password"]):
+        return None
+
+    if not verify_password(password, user["password"]):
+        return None
+
+    return user
+
+
+# --------------------------------------------------------------
+# WHOLE-FILE ACCESS
+# --------------------------------------------------------------
+def load_users():
 
-    return {}
+    return get_user_directory().all()
 
 
 def save_users(users):
 
-    with open(USERS_FILE, "w") as f:
-        json.dump(users, f, indent=4)
+    get_user_directory().replace_all(users)
@@ -0,0 +1,225 @@
+import logging
+import os
+import threading
+
+
+# --------------------------------------------------------------
+# CLIENT SETTINGS
+# --------------------------------------------------------------
+# "boto3" (the default) talks to AWS. "local" uses in-process
+# stand-ins that send nothing anywhere and has to be asked for;
+# "auto" picks boto3 when AWS credentials are present in
+# st.secrets and falls back to local, with a warning, otherwise.
+AWS_BACKEND_ENV = "AYUSHCARE_AWS_BACKEND"
+DEFAULT_BACKEND = "boto3"
+
+MAX_POOL_CONNECTIONS = 50
+CONNECT_TIMEOUT = 2
+READ_TIMEOUT = 5
+MAX_ATTEMPTS = 3
+RETRY_MODE = "standard"
+
+logger = logging.getLogger(__name__)
+
+
+# Missing secrets are reported rather than raised: boto3 then uses
+# its default credential chain (environment, instance role).
+def _read_secrets():
+
+    try:
+        import streamlit as st
+
+    except ImportError:
+        return None
+
+    try:
+
+        return {
+            "region_name": st.secrets["AWS_REGION"],
+            "aws_access_key_id": st.secrets["AWS_ACCESS_KEY_ID"],
+            "aws_secret_access_key": st.secrets["AWS_SECRET_ACCESS_KEY"]
+        }
+
+    except (KeyError, FileNotFoundError) as e:
+
+        logger.warning("AWS credentials missing from st.secrets: %s", e)
+
+        return None
+
+
+# --------------------------------------------------------------
+# BOTO3 BACKEND
+# --------------------------------------------------------------
+class Boto3Backend:
+
+    name = "boto3"
+
+    def __init__(self, credentials=None):
+
+        # boto3 is only imported once a client is actually needed.
+        import boto3
+
+        from botocore.config import Config
+
+        self.session = boto3.session.Session(**(credentials or {}))
+
+        self.config = Config(
+            max_pool_connections=MAX_POOL_CONNECTIONS,
+            connect_timeout=CONNECT_TIMEOUT,
+            read_timeout=READ_TIMEOUT,
+            retries={
+                "max_attempts": MAX_ATTEMPTS,
+                "mode": RETRY_MODE
+            }
+        )
+
+        self._dynamodb = None
+
+    def table(self, name):
+
+        if self._dynamodb is None:
+
+            self._dynamodb = self.session.resource(
+                "dynamodb",
+                config=self.config
+            )
+
+        return self._dynamodb.Table(name)
+
+    def sns(self):
+
+        return self.session.client("sns", config=self.config)
+
+
+# --------------------------------------------------------------
+# LOCAL BACKEND
+# --------------------------------------------------------------
+class LocalBackend:
+
+    name = "local"
+
+    def __init__(self, credentials=None):
+
+        from services.local_aws import (
+            InMemoryTable,
+            InMemorySNSClient
+        )
+
+        self._table_cls = InMemoryTable
+        self._sns_cls = InMemorySNSClient
+
+    def table(self, name):
+
+        return self._table_cls(name)
+
+    def sns(self):
+
+        return self._sns_cls()
+
+
+BACKENDS = {
+    "boto3": Boto3Backend,
+    "local": LocalBackend
+}
+
+
+# --------------------------------------------------------------
+# PROCESS-WIDE POOL
+# --------------------------------------------------------------
+# Streamlit runs every session as a thread in one process, so a
+# module-level pool is shared by all of them. Clients are built
+# on first use and reused afterwards.
+class ClientPool:
+
+    def __init__(self, backend):
+
+        self.backend = backend
+
+        self._tables = {}
+        self._sns = None
+
+        self._lock = threading.Lock()
+
+    def table(self, name):
+
+        with self._lock:
+
+            if name not in self._tables:
+                self._tables[name] = self.backend.table(name)
+
+            return self._tables[name]
+
+    def sns(self):
+
+        with self._lock:
+
+            if self._sns is None:
+                self._sns = self.backend.sns()
+
+            return self._sns
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def register_backend(name, factory):
+
+    BACKENDS[name] = factory
+
+
+def _create_backend(name=None):
+
+    name = name or os.environ.get(AWS_BACKEND_ENV, DEFAULT_BACKEND)
+
+    credentials = _read_secrets()
+
+    if name == "auto":
+
+        name = "boto3" if credentials else "local"
+
+        if name == "local":
+            logger.warning(
+                "No AWS credentials; using the local backend. Vitals "
+                "stay in memory and SMS alerts are not sent."
+            )
+
+    return BACKENDS[name](credentials)
+
+
+def get_pool():
+
+    global _pool
+
+    with _pool_lock:
+
+        if _pool is None:
+            _pool = ClientPool(_create_backend())
+
+        return _pool
+
+
+def set_backend(name):
+
+    global _pool
+
+    with _pool_lock:
+        _pool = ClientPool(_create_backend(name))
+
+    return _pool
+
+
+# True when nothing leaves the process; the dashboard says so.
+def using_local_backend():
+
+    return get_pool().backend.name == "local"
+
+
+def get_table(name):
+
+    return get_pool().table(name)
+
+
+def get_sns_client():
+
+    return get_pool().sns()
@@ -1,80 +1,112 @@
-import boto3
+import logging
+import threading
 import streamlit as st
 
 from decimal import Decimal
 from datetime import datetime
 
+from services.aws_clients import get_table, get_sns_client
 from services.history_service import save_history
+from services.dynamo_writer import DynamoWriteBehind
+from services.alert_dispatcher import AlertDispatcher
+from services.perf import instrument
 
 
 # --------------------------------------------------------------
-# AWS CONFIG
+# DYNAMODB TABLE
 # --------------------------------------------------------------
-AWS_REGION = st.secrets["AWS_REGION"]
+VITALS_TABLE = "AyushCareVitals"
+
+_writer = None
+_writer_lock = threading.Lock()
+
+_dispatcher = None
+
+_warned_no_recipients = False
+
+logger = logging.getLogger(__name__)
 
 
 # --------------------------------------------------------------
-# DYNAMODB CONNECTION
+# WRITE-BEHIND QUEUE (ONE PER PROCESS)
 # --------------------------------------------------------------
-dynamodb = boto3.resource(
-    "dynamodb",
-    region_name=AWS_REGION,
-    aws_access_key_id=st.secrets["AWS_ACCESS_KEY_ID"],
-    aws_secret_access_key=st.secrets["AWS_SECRET_ACCESS_KEY"]
-)
+def get_dynamo_writer():
+
+    global _writer
+
+    with _writer_lock:
 
-table = dynamodb.Table("AyushCareVitals")
+        if _writer is None:
+            _writer = DynamoWriteBehind(
+                get_table(VITALS_TABLE)
+            )
+
+    return _writer
 
 
 # --------------------------------------------------------------
-# SNS CLIENT
+# ALERT RECIPIENTS
 # --------------------------------------------------------------
-sns_client = boto3.client(
-    "sns",
-    region_name=AWS_REGION,
-    aws_access_key_id=st.secrets["AWS_ACCESS_KEY_ID"],
-    aws_secret_access_key=st.secrets["AWS_SECRET_ACCESS_KEY"]
-)
+# Phone numbers and/or SNS topic ARNs, from ALERT_RECIPIENTS in
+# secrets.toml. With none configured, no SMS is sent.
+def get_alert_recipients():
+
+    try:
+        return list(st.secrets["ALERT_RECIPIENTS"])
+
+    except Exception:
+        return []
 
 
 # --------------------------------------------------------------
-# ALERT PHONE NUMBER
+# SNS DISPATCHER (ONE PER PROCESS)
 # --------------------------------------------------------------
-ALERT_PHONE = "+91XXXXXXXXXX"
+def get_alert_dispatcher():
+
+    global _dispatcher
+
+    with _writer_lock:
+
+        if _dispatcher is None:
+            _dispatcher = AlertDispatcher(
+                get_sns_client,
+                get_alert_recipients()
+            )
+
+    return _dispatcher
 
 
 # --------------------------------------------------------------
 # SAVE TO DYNAMODB
 # --------------------------------------------------------------
+@instrument()
 def save_to_dynamodb(patient_id, vitals):
 
     try:
 
-        table.put_item(
-            Item={
-                "patient_id": patient_id,
+        get_dynamo_writer().submit({
+            "patient_id": patient_id,
 
-                "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now().isoformat(),
 
-                "temperature": Decimal(
-                    str(vitals["temperature"])
-                ),
+            "temperature": Decimal(
+                str(vitals["temperature"])
+            ),
 
-                "heart_rate": Decimal(
-                    str(vitals["heart_rate"])
-                ),
+            "heart_rate": Decimal(
+                str(vitals["heart_rate"])
+            ),
 
-                "spo2": Decimal(
-                    str(vitals["spo2"])
-                ),
+            "spo2": Decimal(
+                str(vitals["spo2"])
+            ),
 
-                "bp": vitals["bp"],
+            "bp": vitals["bp"],
 
-                "respiratory_rate": Decimal(
-                    str(vitals["respiratory_rate"])
-                )
-            }
-        )
+            "respiratory_rate": Decimal(
+                str(vitals["respiratory_rate"])
+            )
+        })
 
         save_history(patient_id, vitals)
 
@@ -88,17 +120,28 @@ def save_to_dynamodb(patient_id, vitals):
 # --------------------------------------------------------------
 # SEND SNS ALERT
 # --------------------------------------------------------------
-def send_emergency_alert(message):
+# Queues the alert and returns at once; delivery, coalescing and
+# rate limiting happen on the dispatcher's threads.
+@instrument()
+def send_emergency_alert(message, patient_id="ward"):
 
-    try:
+    global _warned_no_recipients
 
-        sns_client.publish(
-            PhoneNumber=ALERT_PHONE,
-            Message=message
-        )
+    dispatcher = get_alert_dispatcher()
 
-    except Exception as e:
+    if not dispatcher.recipients:
+
+        if not _warned_no_recipients:
+
+            logger.warning(
+                "ALERT_RECIPIENTS is not configured; emergency SMS disabled"
+            )
+            _warned_no_recipients = True
+
+        return
+
+    if not dispatcher.submit(patient_id, message):
 
         st.warning(
-            f"SNS Alert Failed: {e}"
+            "SNS Alert Failed: dispatch queue is full"
         )
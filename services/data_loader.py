@@ -2,12 +2,29 @@ import json
 import pandas as pd
 import streamlit as st
 
+from services.perf import instrument
 
+VITALS_FILE = "sample_vitals.json"
+
+
+@instrument()
 def load_json_data():
-    with open("sample_vitals.json") as f:
+    with open(VITALS_FILE) as f:
         return json.load(f)
 
 
+@instrument()
+def parse_vitals_csv(source):
+
+    df = pd.read_csv(source)
+
+    df["timestamp"] = pd.to_datetime(
+        df["timestamp"]
+    )
+
+    return df
+
+
 def upload_csv():
 
     uploaded = st.sidebar.file_uploader(
@@ -17,11 +34,7 @@ def upload_csv():
 
     if uploaded:
 
-        df = pd.read_csv(uploaded)
-
-        df["timestamp"] = pd.to_datetime(
-            df["timestamp"]
-        )
+        df = parse_vitals_csv(uploaded)
 
         with st.expander(
             "📄 View Uploaded CSV Data"
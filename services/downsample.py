@@ -0,0 +1,132 @@
+import numpy as np
+
+
+# --------------------------------------------------------------
+# MIN/MAX DECIMATION
+# --------------------------------------------------------------
+# Splits the series into equal buckets and keeps the lowest and
+# highest sample of each, in time order, so narrow spikes such as
+# R peaks survive. Returns at most `points` samples.
+def minmax_downsample(x, y, points):
+
+    x = np.asarray(x)
+    y = np.asarray(y)
+
+    count = len(y)
+
+    if points < 4 or count <= points:
+        return x, y
+
+    buckets = points // 2
+
+    # Drop the remainder from the front so the newest samples
+    # are always in the last bucket.
+    usable = count - count % buckets
+    offset = count - usable
+
+    grid = y[offset:].reshape(buckets, -1)
+
+    base = np.arange(buckets) * grid.shape[1] + offset
+
+    low = grid.argmin(axis=1) + base
+    high = grid.argmax(axis=1) + base
+
+    # Flat buckets have the same min and max; keep it once.
+    index = np.unique(np.concatenate([low, high]))
+
+    return x[index], y[index]
+
+
+# --------------------------------------------------------------
+# LARGEST-TRIANGLE-THREE-BUCKETS
+# --------------------------------------------------------------
+# Keeps the first and last sample and, from each bucket in
+# between, the one forming the largest triangle with its
+# neighbours. Textbook LTTB anchors each bucket on the point just
+# picked from the previous one, which forces a Python loop. Here
+# the first pass anchors on the previous bucket's mean and each
+# further pass on the previous pass's picks, so every pass is a
+# handful of whole-array operations. Input must be finite and
+# sorted by x.
+def lttb_downsample(x, y, points, passes=2):
+
+    x = np.asarray(x)
+    y = np.asarray(y)
+
+    count = len(y)
+
+    if points < 3 or count <= points:
+        return x, y
+
+    xf = x.astype("f8")
+    yf = y.astype("f8")
+
+    # points - 2 buckets over samples 1 .. count - 2.
+    edges = np.linspace(1, count - 1, points - 1).astype(np.int64)
+
+    starts = edges[:-1]
+    sizes = edges[1:] - starts
+
+    # Buckets differ in size by at most one; the short ones are
+    # padded by repeating their last sample, which can never win
+    # the argmax over its own first occurrence.
+    offsets = np.arange(sizes.max())
+
+    index = np.minimum(starts[:, None] + offsets, edges[1:, None] - 1)
+
+    bx = xf[index]
+    by = yf[index]
+
+    mean_x = np.add.reduceat(xf[:count - 1], starts) / sizes
+    mean_y = np.add.reduceat(yf[:count - 1], starts) / sizes
+
+    # Third corner: the next bucket's mean, or the last sample.
+    cx = np.append(mean_x[1:], xf[-1])[:, None]
+    cy = np.append(mean_y[1:], yf[-1])[:, None]
+
+    # Twice the triangle area is |ax * u + ay * v + w|; only the
+    # anchor (ax, ay) changes between passes.
+    u = by - cy
+    v = cx - bx
+    w = bx * cy - cx * by
+
+    ax = np.append(xf[0], mean_x[:-1])[:, None]
+    ay = np.append(yf[0], mean_y[:-1])[:, None]
+
+    rows = np.arange(len(starts))
+
+    for _ in range(passes):
+
+        area = np.abs(ax * u + ay * v + w)
+
+        picked = index[rows, area.argmax(axis=1)]
+
+        ax = np.append(xf[0], xf[picked[:-1]])[:, None]
+        ay = np.append(yf[0], yf[picked[:-1]])[:, None]
+
+    keep = np.concatenate([[0], picked, [count - 1]])
+
+    return x[keep], y[keep]
+
+
+# --------------------------------------------------------------
+# POINT BUDGET
+# --------------------------------------------------------------
+# Streamlit does not report a chart's rendered width, so callers
+# pass the width they lay the chart out for. Two points per pixel
+# is enough for the line to look identical to the full series.
+CHART_WIDTH_PX = 1200
+POINTS_PER_PIXEL = 2
+
+
+def point_budget(width_px=CHART_WIDTH_PX, points_per_pixel=POINTS_PER_PIXEL):
+
+    return max(3, int(width_px * points_per_pixel))
+
+
+def downsample(x, y, points, method="lttb"):
+
+    if method == "minmax":
+        return minmax_downsample(x, y, points)
+
+    return lttb_downsample(x, y, points)
@@ -0,0 +1,248 @@
+import atexit
+import hashlib
+import json
+import threading
+import time
+
+
+BATCH_SIZE = 25
+
+# Items from chunks that still fail after every retry go back on
+# the queue for the next flush, up to this many pending items;
+# beyond that they are dropped and counted in `failed`.
+MAX_PENDING = 10000
+
+
+# --------------------------------------------------------------
+# CONTENT HASH
+# --------------------------------------------------------------
+# The timestamp changes on every call, so it is left out; two
+# items with the same vitals hash the same.
+def item_digest(item, ignore=("timestamp",)):
+
+    body = {k: v for k, v in item.items() if k not in ignore}
+
+    return hashlib.sha1(
+        json.dumps(body, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+# --------------------------------------------------------------
+# WRITE-BEHIND QUEUE
+# --------------------------------------------------------------
+# Callers hand items to submit() and return immediately. A
+# background thread drains the pending items every
+# `flush_interval` seconds and writes them through
+# table.batch_writer() in batches of 25. Pending items are keyed
+# by (`key_field`, `sort_field`), the table's primary key, so only
+# a resubmission of the same reading replaces a pending one, and
+# an item whose content matches the last one submitted for that
+# patient is skipped. Whatever is pending is flushed at exit.
+class DynamoWriteBehind:
+
+    def __init__(
+        self,
+        table,
+        key_field="patient_id",
+        sort_field="timestamp",
+        flush_interval=1.0,
+        batch_size=BATCH_SIZE,
+        max_pending=MAX_PENDING,
+        max_retries=5,
+        backoff=0.1
+    ):
+
+        self.table = table
+        self.key_field = key_field
+        self.sort_field = sort_field
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._pending = {}
+        self._digests = {}
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+
+        self.submitted = 0
+        self.skipped = 0
+        self.coalesced = 0
+        self.written = 0
+        self.failed = 0
+        self.requeued = 0
+        self.retries = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="dynamo-write-behind",
+            daemon=True
+        )
+        self._thread.start()
+
+        atexit.register(self.close)
+
+    # ----------------------------------------------------------
+    # PRODUCER SIDE
+    # ----------------------------------------------------------
+    def _key(self, item):
+
+        return item[self.key_field], item.get(self.sort_field)
+
+    def submit(self, item):
+
+        patient = item[self.key_field]
+        key = self._key(item)
+        digest = item_digest(item)
+
+        with self._lock:
+
+            self.submitted += 1
+
+            if self._digests.get(patient) == digest:
+                self.skipped += 1
+                return False
+
+            if key in self._pending:
+                self.coalesced += 1
+
+            self._digests[patient] = digest
+            self._pending[key] = item
+
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+        return True
+
+    # ----------------------------------------------------------
+    # CONSUMER SIDE
+    # ----------------------------------------------------------
+    def _run(self):
+
+        while not self._stopped:
+
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+            self.flush()
+
+    def _write_chunk(self, chunk):
+
+        for attempt in range(self.max_retries + 1):
+
+            try:
+
+                with self.table.batch_writer() as batch:
+
+                    for item in chunk:
+                        batch.put_item(Item=item)
+
+                return True
+
+            except Exception:
+
+                if attempt == self.max_retries:
+                    return False
+
+                self.retries += 1
+                time.sleep(self.backoff * (2 ** attempt))
+
+    def flush(self):
+
+        with self._flush_lock:
+
+            with self._lock:
+                items, self._pending = list(self._pending.values()), {}
+
+            if not items:
+                return
+
+            start = time.perf_counter()
+
+            for i in range(0, len(items), self.batch_size):
+
+                chunk = items[i:i + self.batch_size]
+
+                if self._write_chunk(chunk):
+
+                    self.written += len(chunk)
+
+                else:
+
+                    self._requeue(chunk)
+
+            elapsed = (time.perf_counter() - start) * 1000
+
+            self.flushes += 1
+            self.last_flush_ms = elapsed
+            self.total_flush_ms += elapsed
+
+    # A newer submission of the same reading wins over the failed
+    # copy.
+    def _requeue(self, chunk):
+
+        with self._lock:
+
+            for item in chunk:
+
+                key = self._key(item)
+
+                if key in self._pending:
+                    continue
+
+                if len(self._pending) < self.max_pending:
+
+                    self._pending[key] = item
+                    self.requeued += 1
+
+                else:
+
+                    self.failed += 1
+
+                    # Forget the digest so the next identical
+                    # submission is written instead of skipped.
+                    self._digests.pop(item[self.key_field], None)
+
+    def close(self):
+
+        if self._stopped:
+            return
+
+        self._stopped = True
+        self._wake.set()
+        self._thread.join()
+
+        self.flush()
+
+    # ----------------------------------------------------------
+    # METRICS
+    # ----------------------------------------------------------
+    def queue_depth(self):
+
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self):
+
+        return {
+            "queue_depth": self.queue_depth(),
+            "submitted": self.submitted,
+            "skipped": self.skipped,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "failed": self.failed,
+            "requeued": self.requeued,
+            "retries": self.retries,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(
+                self.total_flush_ms / self.flushes, 2
+            ) if self.flushes else 0.0
+        }
@@ -0,0 +1,263 @@
+import os
+import threading
+
+import numpy as np
+
+from urllib.parse import quote, unquote
+
+
+ECG_DIR = "ecg"
+
+# MAX30102 IR samples as read by the firmware.
+ECG_SAMPLE_RATE = 250
+ECG_WINDOW_SECONDS = 10
+
+# Largest sample batch accepted from one device message (4 s).
+ECG_MAX_BATCH = ECG_SAMPLE_RATE * 4
+
+# Header: total samples ever written, capacity, sample rate.
+_HEADER = np.dtype([
+    ("written", "<i8"),
+    ("capacity", "<i4"),
+    ("sample_rate", "<i4")
+])
+
+
+# --------------------------------------------------------------
+# RING BUFFER
+# --------------------------------------------------------------
+# Fixed-size float32 ring of the most recent samples. With a path
+# it is a memory-mapped file, so the ingestion gateway can write
+# and the dashboard process can read the same buffer. Samples are
+# written before the counter is advanced; a reader racing a writer
+# can at worst see the oldest few samples already overwritten.
+class EcgRing:
+
+    def __init__(
+        self,
+        path=None,
+        capacity=ECG_SAMPLE_RATE * ECG_WINDOW_SECONDS,
+        sample_rate=ECG_SAMPLE_RATE
+    ):
+
+        self.path = path
+
+        if path is None:
+
+            self.header = np.zeros(1, dtype=_HEADER)
+            self.header["capacity"] = capacity
+            self.header["sample_rate"] = sample_rate
+
+            self.data = np.zeros(capacity, dtype="<f4")
+
+            return
+
+        if not os.path.exists(path):
+
+            header = np.zeros(1, dtype=_HEADER)
+            header["capacity"] = capacity
+            header["sample_rate"] = sample_rate
+
+            with open(path, "wb") as f:
+                f.write(header.tobytes())
+                f.write(np.zeros(capacity, dtype="<f4").tobytes())
+
+        self.header = np.memmap(path, dtype=_HEADER, mode="r+", shape=(1,))
+
+        self.data = np.memmap(
+            path,
+            dtype="<f4",
+            mode="r+",
+            offset=_HEADER.itemsize,
+            shape=(int(self.header["capacity"][0]),)
+        )
+
+    @property
+    def capacity(self):
+
+        return int(self.header["capacity"][0])
+
+    @property
+    def sample_rate(self):
+
+        return int(self.header["sample_rate"][0])
+
+    @property
+    def written(self):
+
+        return int(self.header["written"][0])
+
+    def extend(self, samples):
+
+        samples = np.asarray(samples, dtype="<f4").ravel()
+
+        capacity = self.capacity
+        written = self.written
+
+        count = len(samples)
+
+        if count > capacity:
+            samples = samples[-capacity:]
+
+        start = (written + count - len(samples)) % capacity
+        first = min(len(samples), capacity - start)
+
+        self.data[start:start + first] = samples[:first]
+        self.data[:len(samples) - first] = samples[first:]
+
+        self.header["written"] = written + count
+
+        return written + count
+
+    # Samples with sequence numbers in [start, end), oldest first.
+    # Anything that has already been overwritten is skipped.
+    def _read(self, start, end):
+
+        capacity = self.capacity
+
+        start = max(start, end - capacity, 0)
+
+        if start >= end:
+            return np.empty(0, dtype="<f4")
+
+        first = start % capacity
+        last = end % capacity or capacity
+
+        if first < last:
+            return np.array(self.data[first:last])
+
+        return np.concatenate([self.data[first:], self.data[:last]])
+
+    def latest(self, count=None):
+
+        end = self.written
+
+        count = self.capacity if count is None else count
+
+        return self._read(end - count, end), end
+
+    def flush(self):
+
+        if self.path is not None:
+            self.data.flush()
+            self.header.flush()
+
+
+# --------------------------------------------------------------
+# PER-PATIENT STREAMS
+# --------------------------------------------------------------
+class EcgStreams:
+
+    def __init__(
+        self,
+        root=ECG_DIR,
+        seconds=ECG_WINDOW_SECONDS,
+        sample_rate=ECG_SAMPLE_RATE
+    ):
+
+        self.root = root
+        self.capacity = seconds * sample_rate
+        self.sample_rate = sample_rate
+
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def _path(self, patient_id):
+
+        return os.path.join(self.root, quote(str(patient_id), safe="") + ".ring")
+
+    def get(self, patient_id, create=False):
+
+        with self._lock:
+
+            ring = self._rings.get(patient_id)
+
+            if ring is not None:
+                return ring
+
+            path = self._path(patient_id)
+
+            if not create and not os.path.exists(path):
+                return None
+
+            os.makedirs(self.root, exist_ok=True)
+
+            ring = self._rings[patient_id] = EcgRing(
+                path,
+                self.capacity,
+                self.sample_rate
+            )
+
+            return ring
+
+    def append(self, patient_id, samples):
+
+        return self.get(patient_id, create=True).extend(samples)
+
+    def latest(self, patient_id, seconds=None):
+
+        ring = self.get(patient_id)
+
+        if ring is None:
+            return np.empty(0, dtype="<f4"), 0
+
+        count = None if seconds is None else int(seconds * ring.sample_rate)
+
+        return ring.latest(count)
+
+    def patients(self):
+
+        if not os.path.isdir(self.root):
+            return []
+
+        return sorted(
+            unquote(name[:-len(".ring")])
+            for name in os.listdir(self.root)
+            if name.endswith(".ring")
+        )
+
+
+_streams = None
+_streams_lock = threading.Lock()
+
+
+def get_ecg_streams():
+
+    global _streams
+
+    with _streams_lock:
+
+        if _streams is None:
+            _streams = EcgStreams()
+
+    return _streams
+
+
+def validate_ecg_payload(payload):
+
+    if not isinstance(payload, dict):
+        raise ValueError("payload must be a JSON object")
+
+    patient_id = payload.get("patient_id")
+
+    if not isinstance(patient_id, str) or not patient_id:
+        raise ValueError("patient_id must be a non-empty string")
+
+    samples = payload.get("samples")
+
+    if not isinstance(samples, list) or not samples:
+        raise ValueError("samples must be a non-empty list")
+
+    if len(samples) > ECG_MAX_BATCH:
+        raise ValueError(f"at most {ECG_MAX_BATCH} samples per message")
+
+    try:
+        values = np.asarray(samples, dtype="<f4")
+
+    except (TypeError, ValueError):
+        raise ValueError("samples must be numbers")
+
+    if values.ndim != 1 or not np.isfinite(values).all():
+        raise ValueError("samples must be finite numbers")
+
+    return patient_id, values
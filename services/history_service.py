@@ -1,44 +1,148 @@
-import json
-import os
+from datetime import datetime
+
+from services.live_bus import notify
+from services.storage import get_log, import_legacy
+from services.timeseries_store import TimeSeriesStore, now_ms
+from services.perf import instrument
 
 HISTORY_FILE = "history.json"
+HISTORY_DIR = "history_log"
+
+HISTORY_LIMIT = 15
+
+# Each patient keeps at most two segments on disk; older ones
+# are dropped when a new segment is started.
+HISTORY_SEGMENT_ROWS = 500
+HISTORY_RETAIN_SEGMENTS = 2
+
+# Charts read this much of the columnar store by default.
+HISTORY_WINDOW_MS = 60 * 60 * 1000
+
+_log = None
+_store = None
+
+
+# --------------------------------------------------------------
+# LOG ACCESS
+# --------------------------------------------------------------
+def get_history_log():
+
+    global _log
+
+    if _log is None:
+
+        log = get_log(
+            "history",
+            HISTORY_DIR,
+            HISTORY_SEGMENT_ROWS,
+            HISTORY_RETAIN_SEGMENTS
+        )
+
+        import_legacy(log, HISTORY_DIR, HISTORY_FILE)
+
+        _log = log
+
+    return _log
+
+
+def get_timeseries_store():
 
+    global _store
 
+    if _store is None:
+        _store = TimeSeriesStore()
+
+    return _store
+
+
+# --------------------------------------------------------------
+# READ
+# --------------------------------------------------------------
+@instrument()
 def load_history():
 
-    if not os.path.exists(
-        HISTORY_FILE
-    ):
-        return {}
+    log = get_history_log()
+
+    return {
+        patient_id: log.tail(patient_id, HISTORY_LIMIT)
+        for patient_id in log.keys()
+    }
+
+
+def load_patient_history(patient_id, limit=HISTORY_LIMIT):
+
+    return get_history_log().tail(patient_id, limit)
 
-    try:
 
-        with open(
-            HISTORY_FILE,
-            "r"
-        ) as f:
+@instrument()
+def load_history_window(patient_id, start_ms=None, end_ms=None):
 
-            return json.load(f)
+    if start_ms is None:
+        start_ms = now_ms() - HISTORY_WINDOW_MS
 
-    except json.JSONDecodeError:
+    return get_timeseries_store().window(
+        patient_id,
+        start_ms,
+        end_ms
+    )
 
-        return {}
 
+# --------------------------------------------------------------
+# WRITE
+# --------------------------------------------------------------
+@instrument()
 def save_history(patient_id, vitals):
 
-    history = load_history()
+    get_history_log().append(
+        patient_id,
+        {
+            "time": datetime.now().strftime("%H:%M:%S"),
+            "temperature": vitals["temperature"],
+            "heart_rate": vitals["heart_rate"],
+            "spo2": vitals["spo2"]
+        },
+        now_ms()
+    )
+
+    get_timeseries_store().append(patient_id, vitals)
+
+    notify()
+
+
+# --------------------------------------------------------------
+# BATCH WRITE
+# --------------------------------------------------------------
+# `readings` is a list of (patient_id, vitals, timestamp_ms). Rows
+# are grouped per patient so each patient costs one append to the
+# log and one to each column of the store.
+def save_history_batch(readings):
+
+    by_patient = {}
+
+    for patient_id, vitals, timestamp_ms in readings:
+        by_patient.setdefault(patient_id, []).append((vitals, timestamp_ms))
+
+    log = get_history_log()
+    store = get_timeseries_store()
 
-    if patient_id not in history:
-        history[patient_id] = []
+    for patient_id, rows in by_patient.items():
 
-    history[patient_id].append({
-        "time": datetime.now().strftime("%H:%M:%S"),
-        "temperature": vitals["temperature"],
-        "heart_rate": vitals["heart_rate"],
-        "spo2": vitals["spo2"]
-    })
+        log.append_many(patient_id, [
+            {
+                "time": datetime.fromtimestamp(
+                    timestamp_ms / 1000
+                ).strftime("%H:%M:%S"),
+                "temperature": vitals["temperature"],
+                "heart_rate": vitals["heart_rate"],
+                "spo2": vitals["spo2"]
+            }
+            for vitals, timestamp_ms in rows
+        ], [timestamp_ms for _, timestamp_ms in rows])
 
-    history[patient_id] = history[patient_id][-15:]
+        store.append_many(
+            patient_id,
+            [vitals for vitals, _ in rows],
+            [timestamp_ms for _, timestamp_ms in rows]
+        )
 
-    with open(HISTORY_FILE, "w") as f:
-        json.dump(history, f, indent=4)
+    notify()
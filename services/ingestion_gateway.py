@@ -0,0 +1,597 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+
+from collections import deque
+
+import numpy as np
+
+from services.ecg_stream import get_ecg_streams, validate_ecg_payload
+from services.history_service import save_history_batch
+from services.timeseries_store import now_ms
+
+
+VITALS_TOPIC = "ayushcare/vitals"
+ECG_TOPIC = "ayushcare/ecg"
+
+NUMERIC_FIELDS = ("heart_rate", "spo2", "temperature")
+OPTIONAL_FIELDS = ("respiratory_rate",)
+
+QUEUE_SIZE = 10000
+BATCH_SIZE = 500
+BATCH_WAIT = 0.05
+
+MAX_BODY_BYTES = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+# Device clocks may lag (readings buffered while offline) but must
+# not run ahead of the server: the store keeps each patient's
+# timestamps in order, so one far-future reading would hold back
+# every later one.
+MAX_CLOCK_AHEAD_MS = 30 * 1000
+MAX_READING_AGE_MS = 24 * 60 * 60 * 1000
+
+
+# --------------------------------------------------------------
+# VALIDATION
+# --------------------------------------------------------------
+# Same schema the ESP32 firmware publishes; bp, respiratory_rate
+# and an epoch-ms timestamp are accepted when present.
+def _is_number(value):
+
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return False
+
+    # JSON integers have no size limit; ones too large for a float
+    # are not vitals either.
+    try:
+        return math.isfinite(value)
+
+    except (OverflowError, ValueError, TypeError):
+        return False
+
+
+def validate_payload(payload):
+
+    if not isinstance(payload, dict):
+        raise ValueError("payload must be a JSON object")
+
+    patient_id = payload.get("patient_id")
+
+    if not isinstance(patient_id, str) or not patient_id:
+        raise ValueError("patient_id must be a non-empty string")
+
+    vitals = {}
+
+    for field in NUMERIC_FIELDS:
+
+        if not _is_number(payload.get(field)):
+            raise ValueError(f"{field} must be a number")
+
+        vitals[field] = payload[field]
+
+    for field in OPTIONAL_FIELDS:
+
+        if _is_number(payload.get(field)):
+            vitals[field] = payload[field]
+
+    if isinstance(payload.get("bp"), str):
+        vitals["bp"] = payload["bp"]
+
+    timestamp = payload.get("timestamp")
+
+    server_ms = now_ms()
+
+    if timestamp is None:
+        timestamp = server_ms
+
+    elif not _is_number(timestamp):
+        raise ValueError("timestamp must be epoch milliseconds")
+
+    elif timestamp > server_ms + MAX_CLOCK_AHEAD_MS:
+        raise ValueError("timestamp is ahead of server time")
+
+    elif timestamp < server_ms - MAX_READING_AGE_MS:
+        raise ValueError("timestamp is too old")
+
+    return patient_id, vitals, int(timestamp)
+
+
+def decode_messages(raw):
+
+    payload = json.loads(raw)
+
+    return payload if isinstance(payload, list) else [payload]
+
+
+# --------------------------------------------------------------
+# GATEWAY
+# --------------------------------------------------------------
+# Protocol handlers put raw message bodies on a bounded queue.
+# One consumer task drains up to BATCH_SIZE of them at a time,
+# validates the whole batch and hands the valid readings to
+# `sink` on a worker thread, so disk writes never stall the
+# event loop. When the queue is full, HTTP clients get a 503 and
+# MQTT connections stop being read until there is room.
+class IngestionGateway:
+
+    def __init__(
+        self,
+        sink=save_history_batch,
+        queue_size=QUEUE_SIZE,
+        batch_size=BATCH_SIZE,
+        batch_wait=BATCH_WAIT,
+        ecg=None
+    ):
+
+        self.sink = sink
+        self.ecg = ecg
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+        self.received = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+        self.ecg_samples = 0
+        self.ecg_rejected = 0
+
+        self.started = time.perf_counter()
+
+        # Seconds between enqueue and the sink finishing, for the
+        # most recent messages.
+        self.latencies = deque(maxlen=10000)
+
+        self._consumer = None
+
+    # ----------------------------------------------------------
+    # PRODUCER SIDE
+    # ----------------------------------------------------------
+    def offer(self, raw):
+
+        self.received += 1
+
+        try:
+            self.queue.put_nowait((time.perf_counter(), raw))
+            return True
+
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def put(self, raw):
+
+        self.received += 1
+
+        await self.queue.put((time.perf_counter(), raw))
+
+    # ECG batches skip the queue: appending to a ring buffer is a
+    # memory-mapped copy of a few hundred floats.
+    def ingest_ecg(self, raw):
+
+        if self.ecg is None:
+            self.ecg = get_ecg_streams()
+
+        try:
+            messages = decode_messages(raw)
+
+        except (ValueError, UnicodeDecodeError):
+            self.ecg_rejected += 1
+            return False
+
+        ok = True
+
+        for message in messages:
+
+            try:
+                patient_id, samples = validate_ecg_payload(message)
+
+            except ValueError:
+                self.ecg_rejected += 1
+                ok = False
+                continue
+
+            self.ecg.append(patient_id, samples)
+            self.ecg_samples += len(samples)
+
+        return ok
+
+    # ----------------------------------------------------------
+    # CONSUMER SIDE
+    # ----------------------------------------------------------
+    async def _collect(self):
+
+        batch = [await self.queue.get()]
+
+        deadline = time.perf_counter() + self.batch_wait
+
+        while len(batch) < self.batch_size:
+
+            if self.queue.empty():
+
+                remaining = deadline - time.perf_counter()
+
+                if remaining <= 0:
+                    break
+
+                await asyncio.sleep(min(remaining, 0.005))
+                continue
+
+            batch.append(self.queue.get_nowait())
+
+        return batch
+
+    def _validate(self, batch):
+
+        readings = []
+
+        for _, raw in batch:
+
+            try:
+                messages = decode_messages(raw)
+
+            except (ValueError, UnicodeDecodeError):
+                self.rejected += 1
+                continue
+
+            for message in messages:
+
+                try:
+                    readings.append(validate_payload(message))
+
+                except ValueError:
+                    self.rejected += 1
+
+        return readings
+
+    async def _consume(self):
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+
+            batch = await self._collect()
+
+            # One unexpected error must not end the consumer, or the
+            # queue fills and every producer is turned away.
+            try:
+
+                readings = self._validate(batch)
+
+            except Exception:
+
+                logger.exception("Failed to validate a batch")
+
+                self.rejected += len(batch)
+                readings = []
+
+            if readings:
+
+                try:
+                    await loop.run_in_executor(None, self.sink, readings)
+                    self.accepted += len(readings)
+
+                except Exception:
+
+                    logger.exception("Failed to store %d readings", len(readings))
+
+                    self.failed += len(readings)
+
+            done = time.perf_counter()
+
+            self.latencies.extend(done - enqueued for enqueued, _ in batch)
+            self.batches += 1
+
+    def start(self):
+
+        if self._consumer is None:
+            self._consumer = asyncio.ensure_future(self._consume())
+
+    # ----------------------------------------------------------
+    # METRICS
+    # ----------------------------------------------------------
+    def stats(self):
+
+        elapsed = time.perf_counter() - self.started
+
+        latencies = np.array(self.latencies) * 1000
+
+        return {
+            "received": self.received,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "ecg_samples": self.ecg_samples,
+            "ecg_rejected": self.ecg_rejected,
+            "queue_depth": self.queue.qsize(),
+            "accepted_per_sec": round(self.accepted / elapsed, 1),
+            "queue_latency_p50_ms": round(
+                float(np.percentile(latencies, 50)), 2
+            ) if len(latencies) else 0.0,
+            "queue_latency_p99_ms": round(
+                float(np.percentile(latencies, 99)), 2
+            ) if len(latencies) else 0.0
+        }
+
+    # ----------------------------------------------------------
+    # HTTP
+    # ----------------------------------------------------------
+    # POST /vitals with one JSON object or a JSON array of them.
+    # POST /ecg with {"patient_id", "samples": [...]} objects.
+    # GET /metrics returns stats(). Connections are kept alive so
+    # a device can send many readings over one socket.
+    async def handle_http(self, reader, writer):
+
+        try:
+
+            while True:
+
+                request_line = await reader.readline()
+
+                if not request_line:
+                    break
+
+                try:
+                    method, path, _ = request_line.decode().split(" ", 2)
+
+                except ValueError:
+                    await _respond(writer, 400, {"error": "bad request"})
+                    break
+
+                headers = {}
+
+                while True:
+
+                    line = await reader.readline()
+
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+
+                    name, _, value = line.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0) or 0)
+
+                if length > MAX_BODY_BYTES:
+                    await _respond(writer, 413, {"error": "body too large"})
+                    break
+
+                body = await reader.readexactly(length) if length else b""
+
+                if method == "POST" and path == "/vitals":
+
+                    if self.offer(body):
+                        await _respond(writer, 202, {"queued": True})
+
+                    else:
+                        await _respond(
+                            writer,
+                            503,
+                            {"error": "queue full"},
+                            {"Retry-After": "1"}
+                        )
+
+                elif method == "POST" and path == "/ecg":
+
+                    if self.ingest_ecg(body):
+                        await _respond(writer, 202, {"queued": True})
+
+                    else:
+                        await _respond(writer, 400, {"error": "invalid samples"})
+
+                elif method == "GET" and path == "/metrics":
+
+                    await _respond(writer, 200, self.stats())
+
+                else:
+
+                    await _respond(writer, 404, {"error": "not found"})
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+
+        finally:
+            writer.close()
+
+    # ----------------------------------------------------------
+    # MQTT 3.1.1 (QoS 0/1 PUBLISH ONLY)
+    # ----------------------------------------------------------
+    # Enough of the protocol for PubSubClient on the ESP32:
+    # CONNECT, PUBLISH, PINGREQ and DISCONNECT. Subscriptions are
+    # refused because this listener only ingests.
+    async def handle_mqtt(self, reader, writer):
+
+        try:
+
+            while True:
+
+                header = await reader.readexactly(1)
+
+                packet_type = header[0] >> 4
+                flags = header[0] & 0x0F
+
+                length = await _read_remaining_length(reader)
+                body = await reader.readexactly(length) if length else b""
+
+                if packet_type == 1:
+
+                    writer.write(b"\x20\x02\x00\x00")
+
+                elif packet_type == 3:
+
+                    topic_length = int.from_bytes(body[:2], "big")
+                    topic = body[2:2 + topic_length].decode()
+
+                    offset = 2 + topic_length
+                    qos = (flags >> 1) & 0x03
+
+                    if qos:
+                        packet_id = body[offset:offset + 2]
+                        offset += 2
+
+                    if topic == VITALS_TOPIC:
+                        await self.put(body[offset:])
+
+                    elif topic == ECG_TOPIC:
+                        self.ingest_ecg(body[offset:])
+
+                    if qos == 1:
+                        writer.write(b"\x40\x02" + packet_id)
+
+                elif packet_type == 8:
+
+                    packet_id = body[:2]
+                    topics = _count_subscriptions(body[2:])
+
+                    writer.write(
+                        bytes([0x90, 2 + topics])
+                        + packet_id
+                        + b"\x80" * topics
+                    )
+
+                elif packet_type == 12:
+
+                    writer.write(b"\xd0\x00")
+
+                elif packet_type == 14:
+
+                    break
+
+                await writer.drain()
+
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+
+        finally:
+            writer.close()
+
+
+async def _respond(writer, status, payload, extra_headers=None):
+
+    reasons = {
+        200: "OK",
+        202: "Accepted",
+        400: "Bad Request",
+        404: "Not Found",
+        413: "Payload Too Large",
+        503: "Service Unavailable"
+    }
+
+    body = json.dumps(payload).encode()
+
+    headers = [
+        f"HTTP/1.1 {status} {reasons[status]}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}"
+    ]
+
+    for name, value in (extra_headers or {}).items():
+        headers.append(f"{name}: {value}")
+
+    writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + body)
+
+    await writer.drain()
+
+
+async def _read_remaining_length(reader):
+
+    value = 0
+
+    for shift in range(0, 28, 7):
+
+        byte = (await reader.readexactly(1))[0]
+        value |= (byte & 0x7F) << shift
+
+        if not byte & 0x80:
+            return value
+
+    raise ConnectionError("Malformed MQTT remaining length")
+
+
+def _count_subscriptions(payload):
+
+    count = 0
+    offset = 0
+
+    while offset + 2 <= len(payload):
+
+        offset += 2 + int.from_bytes(payload[offset:offset + 2], "big") + 1
+        count += 1
+
+    return count
+
+
+# --------------------------------------------------------------
+# ENTRY POINT
+# --------------------------------------------------------------
+async def serve(host="0.0.0.0", http_port=8080, mqtt_port=1883, gateway=None):
+
+    gateway = gateway or IngestionGateway()
+    gateway.start()
+
+    servers = []
+
+    if http_port is not None:
+        servers.append(
+            await asyncio.start_server(gateway.handle_http, host, http_port)
+        )
+
+    if mqtt_port is not None:
+        servers.append(
+            await asyncio.start_server(gateway.handle_mqtt, host, mqtt_port)
+        )
+
+    return gateway, servers
+
+
+async def _main(args):
+
+    gateway, servers = await serve(
+        args.host,
+        args.http_port,
+        args.mqtt_port
+    )
+
+    print(
+        f"AyushCare ingestion gateway: HTTP :{args.http_port}, "
+        f"MQTT :{args.mqtt_port}"
+    )
+
+    while True:
+
+        await asyncio.sleep(args.stats_every)
+        print(json.dumps(gateway.stats()))
+
+
+def main():
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--http-port", type=int, default=8080)
+    parser.add_argument("--mqtt-port", type=int, default=1883)
+    parser.add_argument("--stats-every", type=float, default=10.0)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_main(args))
+
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
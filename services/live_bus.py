@@ -0,0 +1,371 @@
+import os
+import threading
+import time
+
+
+# The watcher looks for new data this often while anyone is
+# subscribed. A session that stops renewing its subscription (tab
+# closed) is dropped after SUBSCRIPTION_TTL_SECONDS.
+BUS_POLL_SECONDS = 1.0
+SUBSCRIPTION_TTL_SECONDS = 30
+
+# Topics are a source name for the whole ward, (source, patient_id)
+# for one patient, or ALERTS_TOPIC.
+JSON_SOURCE = "json"
+DEVICE_SOURCE = "devices"
+ALERTS_TOPIC = "alerts"
+
+_MISSING = object()
+
+_bus = None
+
+
+# --------------------------------------------------------------
+# HUB
+# --------------------------------------------------------------
+# Each topic carries a version number that publish() bumps. get()
+# loads a topic's value at most once per version and hands the
+# same object to every session, so file reads follow the number
+# of updates rather than the number of viewers. Values are shared
+# and must not be modified by readers.
+class LiveBus:
+
+    def __init__(
+        self,
+        poll_seconds=BUS_POLL_SECONDS,
+        subscription_ttl=SUBSCRIPTION_TTL_SECONDS
+    ):
+
+        self.poll_seconds = poll_seconds
+        self.subscription_ttl = subscription_ttl
+
+        self.reads = 0
+
+        self._versions = {}
+        self._values = {}
+        self._loading = {}
+
+        self._sources = {}
+        self._subscribers = {}
+        self._live = frozenset()
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+        self._thread = None
+
+    def add_source(self, name, source):
+
+        self._sources[name] = source
+
+    # ----------------------------------------------------------
+    # PUBLISH / READ
+    # ----------------------------------------------------------
+    def publish(self, topic, value=_MISSING):
+
+        with self._lock:
+
+            version = self._versions.get(topic, 0) + 1
+
+            self._versions[topic] = version
+
+            if value is not _MISSING:
+                self._values[(topic, None)] = (version, value)
+
+        return version
+
+    # `key` caches several values per topic, e.g. one history
+    # window per range, all invalidated by the same publish.
+    def get(self, topic, load, key=None):
+
+        slot = (topic, key)
+
+        with self._lock:
+
+            version = self._versions.get(topic, 0)
+
+            cached = self._values.get(slot)
+
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            loading = self._loading.setdefault(slot, threading.Lock())
+
+        # Sessions asking for the same topic wait for one load.
+        with loading:
+
+            with self._lock:
+
+                version = self._versions.get(topic, 0)
+
+                cached = self._values.get(slot)
+
+                if cached is not None and cached[0] == version:
+                    return cached[1]
+
+            value = load()
+
+            with self._lock:
+
+                self.reads += 1
+
+                # A publish during the load leaves this value one
+                # version behind, so the next get loads again.
+                self._values[slot] = (version, value)
+
+        return value
+
+    # True for the first caller per version of `topic`: for work
+    # that should happen once per update, not once per viewer.
+    def once(self, topic, key):
+
+        slot = (topic, ("once", key))
+
+        with self._lock:
+
+            version = self._versions.get(topic, 0)
+
+            cached = self._values.get(slot)
+
+            if cached is not None and cached[0] == version:
+                return False
+
+            self._values[slot] = (version, True)
+
+        return True
+
+    # ----------------------------------------------------------
+    # SUBSCRIPTIONS
+    # ----------------------------------------------------------
+    # Renewed on every refresh; the watcher only runs while at
+    # least one subscription is live.
+    def subscribe(self, subscriber, topics):
+
+        topics = frozenset(topics)
+
+        with self._lock:
+
+            self._subscribers[subscriber] = (
+                topics,
+                time.monotonic() + self.subscription_ttl
+            )
+
+            watcher = None
+
+            if self._thread is None:
+
+                watcher = self._thread = threading.Thread(
+                    target=self._watch,
+                    name="live-bus",
+                    daemon=True
+                )
+
+        # Nothing was published while the watcher was stopped, so
+        # catch up before the caller reads from the cache.
+        if watcher is not None:
+
+            self.poll(topics)
+            watcher.start()
+
+    # Writers in this process call this after storing new data so
+    # the watcher polls now instead of at its next tick.
+    def wake(self):
+
+        self._wake.set()
+
+    # ----------------------------------------------------------
+    # WATCHER
+    # ----------------------------------------------------------
+    # Called with the lock held. Cached values, `once` markers and
+    # load locks of patients nobody is subscribed to any more are
+    # dropped, so the caches follow the patients being watched
+    # rather than every patient ever viewed.
+    def _evict(self, live):
+
+        for slots in (self._values, self._loading):
+
+            for slot in [
+                slot for slot in slots
+                if isinstance(slot[0], tuple) and slot[0] not in live
+            ]:
+                del slots[slot]
+
+    def _live_topics(self):
+
+        now = time.monotonic()
+
+        with self._lock:
+
+            for subscriber, (_, expires) in list(self._subscribers.items()):
+
+                if expires < now:
+                    del self._subscribers[subscriber]
+
+            topics = frozenset().union(
+                *(topics for topics, _ in self._subscribers.values())
+            )
+
+            if topics != self._live:
+                self._evict(topics)
+                self._live = topics
+
+            if not self._subscribers:
+
+                # Idle: the thread ends and the next subscribe()
+                # starts a new one.
+                self._thread = None
+                return None
+
+            return topics
+
+    def _watch(self):
+
+        while True:
+
+            topics = self._live_topics()
+
+            if topics is None:
+                return
+
+            self.poll(topics)
+
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    # One pass over the sources someone is subscribed to. A whole
+    # ward subscription checks every patient of that source,
+    # otherwise only the subscribed patients are checked.
+    def poll(self, topics):
+
+        for name, source in self._sources.items():
+
+            if name in topics:
+                patient_ids = None
+
+            else:
+
+                patient_ids = [
+                    topic[1] for topic in topics
+                    if isinstance(topic, tuple) and topic[0] == name
+                ]
+
+                if not patient_ids:
+                    continue
+
+            changed = source.changed(patient_ids)
+
+            for patient_id, value in changed.items():
+                self.publish((name, patient_id), value)
+
+            if changed:
+                self.publish(name)
+
+
+# --------------------------------------------------------------
+# SOURCES
+# --------------------------------------------------------------
+# A source reports which patients changed since its last check as
+# {patient_id: value}, where value is _MISSING when the source did
+# not read it and the next get() should load it.
+class JsonFileSource:
+
+    def __init__(self, path, load):
+
+        self.path = path
+        self.load = load
+
+        self._signature = None
+        self._data = {}
+
+    def changed(self, patient_ids=None):
+
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+
+        except FileNotFoundError:
+            signature = None
+
+        if signature == self._signature:
+            return {}
+
+        data = self.load() if signature is not None else {}
+
+        changed = {
+            patient_id: data.get(patient_id, _MISSING)
+            for patient_id in data.keys() | self._data.keys()
+            if data.get(patient_id) != self._data.get(patient_id)
+        }
+
+        self._signature = signature
+        self._data = data
+
+        return changed
+
+
+# Readings land in the columnar store, which only ever appends, so
+# a patient's row count (a few stat calls) tells whether anything
+# new arrived, whichever process wrote it.
+class StoreSource:
+
+    def __init__(self, store):
+
+        self.store = store
+
+        self._rows = {}
+
+    def changed(self, patient_ids=None):
+
+        if patient_ids is None:
+            patient_ids = self.store.patients()
+
+        changed = {}
+
+        for patient_id in patient_ids:
+
+            rows = self.store.row_count(patient_id)
+
+            if rows != self._rows.get(patient_id):
+
+                self._rows[patient_id] = rows
+
+                changed[patient_id] = _MISSING
+
+        return changed
+
+
+# --------------------------------------------------------------
+# PROCESS BUS
+# --------------------------------------------------------------
+# The dashboard creates the bus once per server process (through
+# st.cache_resource); writers elsewhere in the process reach it
+# through notify(), which does nothing until it exists.
+def create_live_bus():
+
+    global _bus
+
+    from services.data_loader import VITALS_FILE, load_json_data
+    from services.history_service import get_timeseries_store
+
+    bus = LiveBus()
+
+    bus.add_source(JSON_SOURCE, JsonFileSource(VITALS_FILE, load_json_data))
+    bus.add_source(DEVICE_SOURCE, StoreSource(get_timeseries_store()))
+
+    _bus = bus
+
+    return bus
+
+
+def notify(topic=None):
+
+    bus = _bus
+
+    if bus is None:
+        return
+
+    if topic is None:
+        bus.wake()
+
+    else:
+        bus.publish(topic)
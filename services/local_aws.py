@@ -0,0 +1,172 @@
+import threading
+import time
+
+
+# --------------------------------------------------------------
+# IN-MEMORY DYNAMODB TABLE
+# --------------------------------------------------------------
+# Stand-in for a boto3 DynamoDB Table resource. Supports the
+# calls this app makes (put_item, get_item, batch_writer) so the
+# write paths can run and be measured without AWS.
+class InMemoryTable:
+
+    def __init__(
+        self,
+        name="AyushCareVitals",
+        key_schema=("patient_id", "timestamp")
+    ):
+
+        self.name = name
+        self.key_schema = key_schema
+
+        self.items = {}
+
+        self.put_calls = 0
+        self.batch_calls = 0
+
+        # Number of upcoming batch flushes that should raise,
+        # used to exercise retry paths.
+        self.fail_batches = 0
+
+        self._lock = threading.Lock()
+
+    def _key(self, item):
+
+        return tuple(item[k] for k in self.key_schema)
+
+    def put_item(self, Item, **kwargs):
+
+        with self._lock:
+
+            self.put_calls += 1
+            self.items[self._key(Item)] = dict(Item)
+
+        return {}
+
+    def get_item(self, Key, **kwargs):
+
+        item = self.items.get(self._key(Key))
+
+        return {"Item": dict(item)} if item else {}
+
+    def batch_writer(self, **kwargs):
+
+        return _InMemoryBatchWriter(self)
+
+    def _write_batch(self, items):
+
+        with self._lock:
+
+            if self.fail_batches:
+                self.fail_batches -= 1
+                raise RuntimeError("Simulated batch write failure")
+
+            self.batch_calls += 1
+
+            for item in items:
+                self.items[self._key(item)] = dict(item)
+
+
+class _InMemoryBatchWriter:
+
+    BATCH_SIZE = 25
+
+    def __init__(self, table):
+
+        self.table = table
+        self.buffer = []
+
+    def put_item(self, Item):
+
+        self.buffer.append(Item)
+
+        if len(self.buffer) >= self.BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+
+        items, self.buffer = self.buffer, []
+
+        if items:
+            self.table._write_batch(items)
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+
+        if exc_type is None:
+            self._flush()
+
+        return False
+
+
+# --------------------------------------------------------------
+# IN-MEMORY SNS CLIENT
+# --------------------------------------------------------------
+class InMemorySNSClient:
+
+    def __init__(self, latency=0.0):
+
+        self.messages = []
+
+        # Seconds each API call takes, to model network round trips.
+        self.latency = latency
+
+        self.publish_calls = 0
+        self.batch_calls = 0
+
+        # Number of upcoming API calls that should raise.
+        self.fail_calls = 0
+
+        self._lock = threading.Lock()
+
+    # Called with the lock held; the simulated latency is spent
+    # before taking it so concurrent calls overlap like real ones.
+    def _fail(self):
+
+        if self.fail_calls:
+            self.fail_calls -= 1
+            raise RuntimeError("Simulated SNS failure")
+
+    def publish(self, **kwargs):
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+
+            self._fail()
+
+            self.publish_calls += 1
+            self.messages.append(dict(kwargs))
+
+            return {"MessageId": str(len(self.messages))}
+
+    def publish_batch(self, TopicArn, PublishBatchRequestEntries):
+
+        successful = []
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+
+            self._fail()
+
+            self.batch_calls += 1
+
+            for entry in PublishBatchRequestEntries:
+
+                self.messages.append({
+                    "TopicArn": TopicArn,
+                    "Message": entry["Message"]
+                })
+
+                successful.append({
+                    "Id": entry["Id"],
+                    "MessageId": str(len(self.messages))
+                })
+
+        return {"Successful": successful, "Failed": []}
@@ -1,17 +1,207 @@
-import joblib
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
 import pandas as pd
 
-model = joblib.load("health_model.pkl")
+from concurrent.futures import Future
 
+MODEL_FILE = "health_model.pkl"
 
-def predict_risk(vitals):
+FEATURES = ["spo2", "heart_rate", "temperature"]
+
+# predict_risk gives up waiting for the batcher after this long.
+PREDICT_TIMEOUT_SECONDS = 10
+
+_model = None
+_model_lock = threading.Lock()
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------
+# LAZY MODEL LOADING
+# --------------------------------------------------------------
+# The model was fitted on a DataFrame with FEATURES as columns, so
+# rows are passed under the same names.
+def _predict(model, X):
+
+    return model.predict(pd.DataFrame(X, columns=FEATURES))
+
+
+def get_model():
+
+    global _model
+
+    with _model_lock:
+
+        if _model is None:
+
+            import joblib
+
+            model = joblib.load(MODEL_FILE)
+
+            # The first predict call pays for lazy initialisation
+            # inside scikit-learn; do it here rather than on a
+            # user's request.
+            _predict(model, np.array([[98.0, 75.0, 36.8]]))
+
+            _model = model
+
+    return _model
+
+
+def _warm_up():
+
+    try:
+        get_model()
+
+    except Exception as e:
+        logger.warning("ML model not loaded: %s", e)
+
+
+def warm_up(background=True):
+
+    if not background:
+        get_model()
+        return
+
+    threading.Thread(
+        target=_warm_up,
+        name="ml-warm-up",
+        daemon=True
+    ).start()
+
+
+# --------------------------------------------------------------
+# BATCH PREDICTION
+# --------------------------------------------------------------
+def predict_risk_batch(spo2, heart_rate, temperature):
+
+    X = np.column_stack([
+        np.asarray(spo2, dtype=float),
+        np.asarray(heart_rate, dtype=float),
+        np.asarray(temperature, dtype=float)
+    ])
+
+    return _predict(get_model(), X)
+
+
+# --------------------------------------------------------------
+# MICRO-BATCHER
+# --------------------------------------------------------------
+# Sessions call predict_risk from their own threads. Requests
+# that arrive within `max_wait_ms` of each other are stacked into
+# one array and answered by a single model.predict call.
+class MicroBatcher:
+
+    def __init__(self, predict_fn, max_batch=256, max_wait_ms=2.0):
+
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue = queue.Queue()
+
+        self.batches = 0
+        self.requests = 0
 
-    df = pd.DataFrame([{
-        "spo2": vitals["spo2"],
-        "heart_rate": vitals["heart_rate"],
-        "temperature": vitals["temperature"]
-    }])
+        self._thread = threading.Thread(
+            target=self._run,
+            name="ml-micro-batcher",
+            daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, row):
+
+        future = Future()
+
+        self._queue.put((row, future))
+
+        return future
+
+    def _collect(self):
+
+        batch = [self._queue.get()]
+
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch:
+
+            remaining = deadline - time.perf_counter()
+
+            try:
+
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+
+                else:
+                    batch.append(self._queue.get_nowait())
+
+            except queue.Empty:
+
+                break
+
+        return batch
+
+    def _run(self):
+
+        while True:
+
+            batch = self._collect()
+
+            # Any failure, including a row that is not numeric, fails
+            # this batch's futures; the thread carries on with the next.
+            try:
+
+                rows = np.array([row for row, _ in batch], dtype=float)
+
+                predictions = self.predict_fn(rows)
+
+            except Exception as e:
+
+                for _, future in batch:
+                    future.set_exception(e)
+
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+
+            for (_, future), prediction in zip(batch, predictions):
+                future.set_result(prediction)
+
+
+def get_batcher():
+
+    global _batcher
+
+    with _batcher_lock:
+
+        if _batcher is None:
+
+            _batcher = MicroBatcher(
+                lambda X: _predict(get_model(), X)
+            )
+
+    return _batcher
+
+
+# --------------------------------------------------------------
+# SINGLE PREDICTION
+# --------------------------------------------------------------
+def predict_risk(vitals):
 
-    prediction = model.predict(df)[0]
+    row = [
+        vitals["spo2"],
+        vitals["heart_rate"],
+        vitals["temperature"]
+    ]
 
-    return prediction
+    return get_batcher().submit(row).result(timeout=PREDICT_TIMEOUT_SECONDS)
@@ -0,0 +1,872 @@
+import json
+import math
+import os
+import re
+import shutil
+import threading
+
+import numpy as np
+
+from services.storage import FileLock
+
+
+NOTE_INDEX_DIR = "notes_index"
+
+# New notes are indexed in memory until this many are waiting,
+# then written out together as one immutable segment.
+INDEX_FLUSH_DOCS = 1000
+
+# Once this many segments of the same size class pile up they are
+# merged into one, so a million notes stay in a few dozen segments.
+INDEX_MERGE_FACTOR = 10
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SEARCH_LIMIT = 10
+
+# Left out of the index. Negations such as "no" and "not" are kept
+# because they change what an observation means.
+STOP_WORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "in",
+    "is", "it", "of", "on", "or", "the", "to", "was", "were", "with"
+])
+
+MAX_POSITION = 65535
+
+_TOKEN = re.compile(r"[^\W_]+")
+_PHRASE = re.compile(r'"([^"]*)"')
+
+# One raw little-endian file per column, one row per note, in the
+# same layout as the time-series store.
+DOC_COLUMNS = {
+    "offset": np.dtype("<i8"),
+    "timestamp": np.dtype("<i8"),
+    "patient": np.dtype("<u4"),
+    "length": np.dtype("<u2")
+}
+
+
+# --------------------------------------------------------------
+# TOKENIZER
+# --------------------------------------------------------------
+# (position, term) pairs. Positions still count stop words, so a
+# phrase query keeps the gaps between its words.
+def tokenize(text):
+
+    return [
+        (min(i, MAX_POSITION), term)
+        for i, term in enumerate(_TOKEN.findall(str(text).lower()))
+        if term not in STOP_WORDS
+    ]
+
+
+def _signature(path):
+
+    try:
+        st = os.stat(path)
+
+    except FileNotFoundError:
+        return None
+
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def _read_column(path, dtype, start=0):
+
+    try:
+        size = os.path.getsize(path)
+
+    except FileNotFoundError:
+        return np.zeros(0, dtype)
+
+    if size <= start * dtype.itemsize:
+        return np.zeros(0, dtype)
+
+    return np.fromfile(path, dtype=dtype, offset=start * dtype.itemsize)
+
+
+def _map_column(path, dtype):
+
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype)
+
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+# --------------------------------------------------------------
+# SEGMENT
+# --------------------------------------------------------------
+# An immutable slice of the index covering a contiguous range of
+# notes. Occurrences are sorted by (term, note, position); term i
+# owns occurrences offsets[i]:offsets[i + 1]. The arrays are
+# memory-mapped, so opening an index costs the vocabulary only.
+class _Segment:
+
+    def __init__(self, path, start, end):
+
+        self.path = path
+        self.start = start
+        self.end = end
+
+        with open(os.path.join(path, "terms.json"), "r") as f:
+            self.terms = json.load(f)
+
+        self.lookup = {term: i for i, term in enumerate(self.terms)}
+
+        self.offsets = _map_column(
+            os.path.join(path, "offsets.bin"), np.dtype("<i8")
+        )
+        self.docs = _map_column(
+            os.path.join(path, "docs.bin"), np.dtype("<u4")
+        )
+        self.positions = _map_column(
+            os.path.join(path, "positions.bin"), np.dtype("<u2")
+        )
+
+    def postings(self, term):
+
+        i = self.lookup.get(term)
+
+        if i is None:
+            return None
+
+        a, b = self.offsets[i], self.offsets[i + 1]
+
+        return self.docs[a:b], self.positions[a:b]
+
+    @staticmethod
+    def write(path, terms, offsets, docs, positions):
+
+        tmp = path + ".tmp"
+
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        with open(os.path.join(tmp, "terms.json"), "w") as f:
+            json.dump(terms, f, separators=(",", ":"))
+
+        np.asarray(offsets, dtype="<i8").tofile(os.path.join(tmp, "offsets.bin"))
+        np.asarray(docs, dtype="<u4").tofile(os.path.join(tmp, "docs.bin"))
+        np.asarray(positions, dtype="<u2").tofile(os.path.join(tmp, "positions.bin"))
+
+        os.replace(tmp, path)
+
+
+# --------------------------------------------------------------
+# NOTE INDEX
+# --------------------------------------------------------------
+# Inverted index over doctor notes with positional postings.
+#
+#   docs.jsonl          the indexed notes, one JSON line each
+#   <column>.bin        per-note offset, timestamp, patient, length
+#   patients.txt        patient ids; line number = patient code
+#   segments/<n>/       immutable postings for a range of notes
+#   manifest.json       live segments, replaced atomically
+#
+# Notes past the last segment are re-tokenized into memory when
+# the index is opened, never more than INDEX_FLUSH_DOCS of them.
+# Writers hold a file lock; readers in other processes pick new
+# notes and segments up from the file sizes and the manifest.
+class NoteIndex:
+
+    def __init__(
+        self,
+        root=NOTE_INDEX_DIR,
+        flush_docs=INDEX_FLUSH_DOCS,
+        merge_factor=INDEX_MERGE_FACTOR
+    ):
+
+        self.root = root
+        self.flush_docs = flush_docs
+        self.merge_factor = merge_factor
+
+        self._lock = threading.RLock()
+
+        self._manifest_sig = False
+        self._segments = []
+        self._next_segment = 0
+        self._indexed = 0
+
+        self._columns = {
+            name: np.zeros(0, dtype) for name, dtype in DOC_COLUMNS.items()
+        }
+        self._docs = 0
+        self._total_length = 0
+
+        self._patients = []
+        self._codes = {}
+
+        # term -> ([note], [position]) for notes not in a segment
+        self._live = {}
+        self._live_end = 0
+
+        self._recovered = False
+
+    # ----------------------------------------------------------
+    # PATHS
+    # ----------------------------------------------------------
+    def _path(self, name):
+
+        return os.path.join(self.root, name)
+
+    def _column_path(self, name):
+
+        return self._path(f"{name}.bin")
+
+    def _segment_path(self, name):
+
+        return os.path.join(self.root, "segments", name)
+
+    # ----------------------------------------------------------
+    # LOADING
+    # ----------------------------------------------------------
+    def _rows_on_disk(self):
+
+        rows = None
+
+        for name, dtype in DOC_COLUMNS.items():
+
+            try:
+                size = os.path.getsize(self._column_path(name))
+
+            except FileNotFoundError:
+                size = 0
+
+            count = size // dtype.itemsize
+            rows = count if rows is None else min(rows, count)
+
+        return rows
+
+    def _load_manifest(self):
+
+        try:
+
+            with open(self._path("manifest.json"), "r") as f:
+                manifest = json.load(f)
+
+        except FileNotFoundError:
+
+            manifest = {"segments": [], "next": 0}
+
+        opened = {os.path.basename(s.path): s for s in self._segments}
+
+        self._segments = [
+            opened.get(entry["name"]) or _Segment(
+                self._segment_path(entry["name"]),
+                entry["start"],
+                entry["end"]
+            )
+            for entry in manifest["segments"]
+        ]
+
+        self._next_segment = manifest["next"]
+        self._indexed = self._segments[-1].end if self._segments else 0
+
+        self._live = {}
+        self._live_end = self._indexed
+
+    def _load_patients(self):
+
+        try:
+
+            with open(self._path("patients.txt"), "r") as f:
+                self._patients = f.read().split("\n")[:-1]
+
+        except FileNotFoundError:
+
+            self._patients = []
+
+        self._codes = {p: i for i, p in enumerate(self._patients)}
+
+    def _read_docs(self, start, end):
+
+        offsets = self._columns["offset"]
+
+        docs = []
+
+        with open(self._path("docs.jsonl"), "rb") as f:
+
+            f.seek(int(offsets[start]))
+
+            for _ in range(start, end):
+                docs.append(json.loads(f.readline()))
+
+        return docs
+
+    # Columns are kept in arrays that double when full, so adding a
+    # note does not copy every earlier one.
+    def _extend(self, name, values):
+
+        column = self._columns[name]
+
+        needed = self._docs + len(values)
+
+        if needed > column.size:
+
+            grown = np.zeros(max(needed, column.size * 2, 1024), column.dtype)
+            grown[:self._docs] = column[:self._docs]
+
+            column = self._columns[name] = grown
+
+        column[self._docs:needed] = values
+
+    def _index_live(self, doc, tokens):
+
+        for position, term in tokens:
+
+            entry = self._live.get(term)
+
+            if entry is None:
+                entry = self._live[term] = ([], [])
+
+            entry[0].append(doc)
+            entry[1].append(position)
+
+    # Brings this process up to date with the files: a new manifest
+    # means another process flushed or merged, and column files
+    # longer than what is loaded mean it added notes.
+    def _refresh(self):
+
+        sig = _signature(self._path("manifest.json"))
+
+        if sig != self._manifest_sig:
+            self._load_manifest()
+            self._manifest_sig = sig
+
+        rows = self._rows_on_disk()
+
+        if rows < self._docs:
+
+            self._columns = {
+                name: np.zeros(0, dtype)
+                for name, dtype in DOC_COLUMNS.items()
+            }
+            self._docs = 0
+            self._total_length = 0
+
+        if rows > self._docs:
+
+            for name, dtype in DOC_COLUMNS.items():
+
+                new = _read_column(self._column_path(name), dtype, self._docs)
+
+                self._extend(name, new[:rows - self._docs])
+
+            self._total_length += int(
+                self._columns["length"][self._docs:rows].sum(dtype=np.int64)
+            )
+            self._docs = rows
+
+            if self._columns["patient"].size and (
+                int(self._columns["patient"].max()) >= len(self._patients)
+            ):
+                self._load_patients()
+
+        if self._live_end < self._docs:
+
+            for i, doc in enumerate(
+                self._read_docs(self._live_end, self._docs),
+                self._live_end
+            ):
+                self._index_live(i, tokenize(doc["note"]))
+
+            self._live_end = self._docs
+
+    # ----------------------------------------------------------
+    # RECOVERY
+    # ----------------------------------------------------------
+    # A crash between writes can leave docs.jsonl or some columns
+    # ahead of the others. Everything is trimmed back to the notes
+    # all columns agree on, once per process before the first write.
+    def _recover(self):
+
+        os.makedirs(os.path.join(self.root, "segments"), exist_ok=True)
+
+        rows = self._rows_on_disk()
+
+        for name, dtype in DOC_COLUMNS.items():
+
+            path = self._column_path(name)
+
+            if os.path.exists(path) and os.path.getsize(path) != rows * dtype.itemsize:
+
+                with open(path, "rb+") as f:
+                    f.truncate(rows * dtype.itemsize)
+
+        end = 0
+
+        if rows:
+
+            offset = int(_read_column(
+                self._column_path("offset"),
+                DOC_COLUMNS["offset"],
+                rows - 1
+            )[0])
+
+            with open(self._path("docs.jsonl"), "rb") as f:
+                f.seek(offset)
+                end = offset + len(f.readline())
+
+        with open(self._path("docs.jsonl"), "ab") as f:
+            f.truncate(end)
+
+        self._recovered = True
+
+    # ----------------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------------
+    def add(self, patient_id, record, timestamp_ms):
+
+        self.add_many([(patient_id, record, timestamp_ms)])
+
+    # `notes` is a list of (patient_id, record, timestamp_ms) where
+    # the record holds at least "note" and "time".
+    def add_many(self, notes):
+
+        os.makedirs(self.root, exist_ok=True)
+
+        with self._lock, FileLock(self._path("index")):
+
+            if not self._recovered:
+                self._recover()
+
+            self._refresh()
+
+            for start in range(0, len(notes), self.flush_docs):
+                self._append(notes[start:start + self.flush_docs])
+
+                if self._docs - self._indexed >= self.flush_docs:
+                    self._flush()
+
+    def _code(self, patient_id, new_patients):
+
+        code = self._codes.get(patient_id)
+
+        if code is None:
+
+            code = self._codes[patient_id] = len(self._patients)
+
+            self._patients.append(patient_id)
+            new_patients.append(patient_id)
+
+        return code
+
+    def _append(self, notes):
+
+        new_patients = []
+
+        lines = []
+        rows = {name: [] for name in DOC_COLUMNS}
+
+        with open(self._path("docs.jsonl"), "ab") as f:
+            offset = f.seek(0, 2)
+
+        for patient_id, record, timestamp_ms in notes:
+
+            line = json.dumps({
+                "patient_id": patient_id,
+                "time": record.get("time"),
+                "note": record.get("note", ""),
+                "timestamp": int(timestamp_ms)
+            }, separators=(",", ":")).encode() + b"\n"
+
+            tokens = tokenize(record.get("note", ""))
+
+            self._index_live(self._docs + len(lines), tokens)
+
+            rows["offset"].append(offset)
+            rows["timestamp"].append(int(timestamp_ms))
+            rows["patient"].append(self._code(patient_id, new_patients))
+            rows["length"].append(min(len(tokens), MAX_POSITION))
+
+            lines.append(line)
+            offset += len(line)
+
+        # Patients first, then the notes, then the columns that
+        # make them visible, so a reader never sees a row whose
+        # note or patient is missing.
+        if new_patients:
+            with open(self._path("patients.txt"), "a") as f:
+                f.write("".join(p + "\n" for p in new_patients))
+
+        with open(self._path("docs.jsonl"), "ab") as f:
+            f.write(b"".join(lines))
+
+        for name, dtype in DOC_COLUMNS.items():
+
+            values = np.asarray(rows[name], dtype=dtype)
+
+            with open(self._column_path(name), "ab") as f:
+                values.tofile(f)
+
+            self._extend(name, values)
+
+        self._docs += len(lines)
+        self._total_length += sum(rows["length"])
+        self._live_end = self._docs
+
+    # ----------------------------------------------------------
+    # SEGMENTS
+    # ----------------------------------------------------------
+    def _write_manifest(self):
+
+        manifest = {
+            "segments": [
+                {
+                    "name": os.path.basename(s.path),
+                    "start": s.start,
+                    "end": s.end
+                }
+                for s in self._segments
+            ],
+            "next": self._next_segment
+        }
+
+        tmp = self._path("manifest.json.tmp")
+
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+
+        os.replace(tmp, self._path("manifest.json"))
+
+        self._manifest_sig = _signature(self._path("manifest.json"))
+
+    def _new_segment(self, start, end, terms, offsets, docs, positions):
+
+        name = f"{self._next_segment:08d}"
+        self._next_segment += 1
+
+        path = self._segment_path(name)
+
+        _Segment.write(path, terms, offsets, docs, positions)
+
+        return _Segment(path, start, end)
+
+    def _flush(self):
+
+        terms = sorted(self._live)
+
+        counts = [len(self._live[t][0]) for t in terms]
+
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        docs = np.fromiter(
+            (d for t in terms for d in self._live[t][0]),
+            dtype=np.uint32,
+            count=int(offsets[-1])
+        )
+        positions = np.fromiter(
+            (p for t in terms for p in self._live[t][1]),
+            dtype=np.uint16,
+            count=int(offsets[-1])
+        )
+
+        self._segments.append(self._new_segment(
+            self._indexed, self._docs, terms, offsets, docs, positions
+        ))
+
+        self._indexed = self._docs
+        self._live = {}
+        self._live_end = self._docs
+
+        removed = self._merge()
+
+        self._write_manifest()
+
+        for segment in removed:
+            shutil.rmtree(segment.path, ignore_errors=True)
+
+    def _level(self, segment):
+
+        return int(math.log(
+            max(1, (segment.end - segment.start) / self.flush_docs),
+            self.merge_factor
+        ) + 1e-9)
+
+    # Merges the newest `merge_factor` segments while they share a
+    # size class. Segments are in note order, so a stable sort on
+    # the term keeps every posting list sorted by note.
+    def _merge(self):
+
+        removed = []
+
+        while len(self._segments) >= self.merge_factor:
+
+            group = self._segments[-self.merge_factor:]
+
+            if len({self._level(s) for s in group}) != 1:
+                break
+
+            terms = sorted(set().union(*(s.terms for s in group)))
+            ids = {term: i for i, term in enumerate(terms)}
+
+            term_ids = np.concatenate([
+                np.repeat(
+                    np.array([ids[t] for t in s.terms], dtype=np.int64),
+                    np.diff(s.offsets)
+                )
+                for s in group
+            ])
+
+            order = np.argsort(term_ids, kind="stable")
+
+            docs = np.concatenate([s.docs for s in group])[order]
+            positions = np.concatenate([s.positions for s in group])[order]
+
+            offsets = np.searchsorted(
+                term_ids[order],
+                np.arange(len(terms) + 1)
+            )
+
+            merged = self._new_segment(
+                group[0].start, group[-1].end,
+                terms, offsets, docs, positions
+            )
+
+            self._segments[-self.merge_factor:] = [merged]
+
+            removed.extend(group)
+
+        return removed
+
+    # ----------------------------------------------------------
+    # SEARCH
+    # ----------------------------------------------------------
+    # Posting slices for a term, one per segment plus the live
+    # notes. Segment slices are views of the mapped files; nothing
+    # is read until the parts are concatenated.
+    def _postings(self, term):
+
+        parts = []
+
+        for segment in self._segments:
+
+            hit = segment.postings(term)
+
+            if hit is not None:
+                parts.append(hit)
+
+        live = self._live.get(term)
+
+        if live:
+            parts.append((
+                np.array(live[0], dtype=np.uint32),
+                np.array(live[1], dtype=np.uint16)
+            ))
+
+        return parts
+
+    @staticmethod
+    def _concat(parts, column, dtype):
+
+        if not parts:
+            return np.zeros(0, dtype)
+
+        return np.concatenate([part[column] for part in parts])
+
+    # Notes holding every word of the phrase at the query's spacing.
+    # Each (note, position) key list is already sorted, so matching
+    # is a binary search rather than a sort.
+    @classmethod
+    def _phrase_docs(cls, tokens, postings):
+
+        matches = None
+
+        first = tokens[0][0]
+
+        for position, term in tokens:
+
+            parts = postings[term]
+
+            starts = (
+                cls._concat(parts, 0, np.uint32).astype(np.int64) << 17
+            ) + cls._concat(parts, 1, np.uint16) - (position - first)
+
+            if matches is None:
+                matches = starts
+
+            elif starts.size:
+                found = np.searchsorted(starts, matches)
+                found[found == starts.size] = 0
+                matches = matches[starts[found] == matches]
+
+            else:
+                matches = starts
+
+            if not matches.size:
+                break
+
+        docs = matches >> 17
+
+        return docs[np.diff(docs, prepend=-1) != 0]
+
+    # Ranked BM25 search. Plain words are OR'ed; every "quoted
+    # phrase" must appear. Results are newest first among equal
+    # scores and carry the patient, time, note and score.
+    def search(
+        self,
+        query,
+        patient_ids=None,
+        start_ms=None,
+        end_ms=None,
+        limit=SEARCH_LIMIT
+    ):
+
+        phrases = [tokenize(p) for p in _PHRASE.findall(query)]
+        phrases = [p for p in phrases if p]
+
+        words = {t for _, t in tokenize(_PHRASE.sub(" ", query))}
+        words |= {t for p in phrases for _, t in p}
+
+        if not words:
+            return []
+
+        with self._lock:
+
+            self._refresh()
+
+            postings = {t: self._postings(t) for t in words}
+
+            count = self._docs
+            lengths = self._columns["length"][:count]
+            timestamps = self._columns["timestamp"][:count]
+            patients = self._columns["patient"][:count]
+            offsets = self._columns["offset"][:count]
+            codes = dict(self._codes)
+            average = self._total_length / count if count else 0.0
+
+        if not count:
+            return []
+
+        # Filters become one mask over all notes, applied to each
+        # posting list before it is scored.
+        allowed = None
+
+        if patient_ids is not None:
+
+            if isinstance(patient_ids, str):
+                patient_ids = [patient_ids]
+
+            wanted = [codes[p] for p in patient_ids if p in codes]
+
+            allowed = np.isin(patients, wanted)
+
+        if start_ms is not None or end_ms is not None:
+
+            window = np.ones(count, dtype=bool)
+
+            if start_ms is not None:
+                window &= timestamps >= start_ms
+
+            if end_ms is not None:
+                window &= timestamps < end_ms
+
+            allowed = window if allowed is None else allowed & window
+
+        for tokens in phrases:
+
+            required = np.zeros(count, dtype=bool)
+            required[self._phrase_docs(tokens, postings)] = True
+
+            allowed = required if allowed is None else allowed & required
+
+        scores = np.zeros(count)
+
+        for term in words:
+
+            docs = self._concat(postings[term], 0, np.uint32)
+
+            if not docs.size:
+                continue
+
+            starts = np.flatnonzero(np.diff(docs, prepend=-1))
+            unique = docs[starts].astype(np.int64)
+            tf = np.diff(np.append(starts, docs.size)).astype(np.float64)
+
+            idf = math.log(1 + (count - unique.size + 0.5) / (unique.size + 0.5))
+
+            if allowed is not None:
+
+                keep = allowed[unique]
+
+                unique = unique[keep]
+                tf = tf[keep]
+
+            norm = BM25_K1 * (
+                1 - BM25_B + BM25_B * lengths[unique] / max(average, 1e-9)
+            )
+
+            # Each note appears once per term, so a plain indexed
+            # add is safe.
+            scores[unique] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        docs = np.flatnonzero(scores)
+
+        if not docs.size:
+            return []
+
+        score = scores[docs]
+
+        # Top `limit` by score; notes tied at the cut-off are taken
+        # newest first, so results do not depend on partition order.
+        if docs.size > limit:
+
+            kth = np.partition(score, docs.size - limit)[docs.size - limit]
+
+            above = np.flatnonzero(score > kth)
+            tied = np.flatnonzero(score == kth)[::-1][:limit - above.size]
+
+            top = np.concatenate([above, tied])
+
+            docs = docs[top]
+            score = score[top]
+
+        order = np.lexsort((-docs, -score))
+
+        results = []
+
+        with open(self._path("docs.jsonl"), "rb") as f:
+
+            for i in order:
+
+                f.seek(int(offsets[docs[i]]))
+
+                result = json.loads(f.readline())
+                result["score"] = round(float(score[i]), 4)
+
+                results.append(result)
+
+        return results
+
+    # ----------------------------------------------------------
+    # METRICS
+    # ----------------------------------------------------------
+    def __len__(self):
+
+        with self._lock:
+
+            self._refresh()
+
+            return self._docs
+
+    def stats(self):
+
+        with self._lock:
+
+            self._refresh()
+
+            size = 0
+
+            for folder, _, files in os.walk(self.root):
+                for name in files:
+                    size += os.path.getsize(os.path.join(folder, name))
+
+            return {
+                "notes": self._docs,
+                "segments": len(self._segments),
+                "live_notes": self._docs - self._indexed,
+                "patients": len(self._patients),
+                "bytes": size
+            }
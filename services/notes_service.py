@@ -0,0 +1,159 @@
+import shutil
+import threading
+
+from datetime import datetime
+
+from services.note_index import NOTE_INDEX_DIR, SEARCH_LIMIT, NoteIndex
+from services.storage import get_log, import_legacy, now_ms
+
+NOTES_FILE = "doctor_notes.json"
+NOTES_DIR = "doctor_notes_log"
+
+NOTES_SEGMENT_ROWS = 1000
+
+NOTES_PAGE_SIZE = 10
+
+NOTE_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_log = None
+_index = None
+_index_lock = threading.Lock()
+
+
+# --------------------------------------------------------------
+# LOG ACCESS
+# --------------------------------------------------------------
+def get_notes_log():
+
+    global _log
+
+    if _log is None:
+
+        log = get_log("notes", NOTES_DIR, NOTES_SEGMENT_ROWS)
+
+        import_legacy(log, NOTES_DIR, NOTES_FILE)
+
+        _log = log
+
+    return _log
+
+
+# --------------------------------------------------------------
+# SEARCH INDEX
+# --------------------------------------------------------------
+def _note_timestamp(record):
+
+    try:
+        return int(
+            datetime.strptime(record["time"], NOTE_TIME_FORMAT).timestamp() * 1000
+        )
+
+    except (KeyError, TypeError, ValueError):
+        return 0
+
+
+# Built from the notes log the first time it is opened empty, then
+# kept up to date by save_note.
+def get_note_index():
+
+    global _index
+
+    with _index_lock:
+
+        if _index is None:
+
+            index = NoteIndex(NOTE_INDEX_DIR)
+
+            if not len(index):
+
+                log = get_notes_log()
+
+                for patient_id in log.keys():
+                    index.add_many([
+                        (patient_id, record, _note_timestamp(record))
+                        for record in log.scan(patient_id)
+                    ])
+
+            _index = index
+
+    return _index
+
+
+# For notes that reached the log without save_note, e.g. an import.
+def rebuild_note_index():
+
+    global _index
+
+    with _index_lock:
+
+        shutil.rmtree(NOTE_INDEX_DIR, ignore_errors=True)
+
+        _index = None
+
+    return get_note_index()
+
+
+def search_notes(
+    query,
+    patient_id=None,
+    start_ms=None,
+    end_ms=None,
+    limit=SEARCH_LIMIT
+):
+
+    return get_note_index().search(
+        query,
+        patient_ids=patient_id,
+        start_ms=start_ms,
+        end_ms=end_ms,
+        limit=limit
+    )
+
+
+# --------------------------------------------------------------
+# READ
+# --------------------------------------------------------------
+def load_notes():
+
+    log = get_notes_log()
+
+    return {
+        patient_id: list(log.scan(patient_id))
+        for patient_id in log.keys()
+    }
+
+
+def load_patient_notes(patient_id):
+
+    return list(get_notes_log().scan(patient_id))
+
+
+# Newest first. Pass the returned cursor back as `before` for the
+# next older page; it is None when there is nothing older.
+def load_note_page(patient_id, limit=NOTES_PAGE_SIZE, before=None):
+
+    return get_notes_log().page(patient_id, limit, before)
+
+
+# --------------------------------------------------------------
+# WRITE
+# --------------------------------------------------------------
+def save_note(patient_id, note):
+
+    timestamp_ms = now_ms()
+
+    record = {
+        "time": datetime.fromtimestamp(timestamp_ms / 1000).strftime(
+            NOTE_TIME_FORMAT
+        ),
+
+        "note": note
+    }
+
+    # Opened first: building a new index from the log must not
+    # pick up this note as well.
+    index = get_note_index()
+
+    get_notes_log().append(patient_id, record, timestamp_ms)
+
+    index.add(patient_id, record, timestamp_ms)
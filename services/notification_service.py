@@ -1,25 +1,247 @@
-import json
-import os
+import threading
+import time
+
 from datetime import datetime
 
+from services.live_bus import ALERTS_TOPIC, notify
+from services.rate_limit import TokenBucket
+from services.storage import get_log, import_legacy
+
 NOTIFICATION_FILE = "notifications.json"
+NOTIFICATION_DIR = "notifications_log"
+
+# All alerts go into one ward-wide feed, newest last.
+NOTIFICATION_KEY = "ward"
+
+NOTIFICATION_SEGMENT_ROWS = 1000
+NOTIFICATION_RETAIN_SEGMENTS = 5
+
+NOTIFICATION_LIMIT = 20
+
+# The same alert (patient, rule, severity) is stored at most once
+# per window; repeats are counted and reported on the next one
+# that is stored.
+DEDUP_WINDOW_SECONDS = 300
+
+# Stored alerts per patient: a burst of 5, then one every 12 s.
+PATIENT_ALERT_RATE = 5 / 60
+PATIENT_ALERT_BURST = 5
+
+# Stored alerts for the whole ward: a burst of 60, then 1/s.
+# Critical alerts are exempt from both limits.
+WARD_ALERT_RATE = 1.0
+WARD_ALERT_BURST = 60
+
+_log = None
+_suppressor = None
+_lock = threading.Lock()
+
+
+# --------------------------------------------------------------
+# STORM SUPPRESSION
+# --------------------------------------------------------------
+class AlertSuppressor:
+
+    def __init__(
+        self,
+        dedup_window=DEDUP_WINDOW_SECONDS,
+        patient_rate=PATIENT_ALERT_RATE,
+        patient_burst=PATIENT_ALERT_BURST,
+        ward_rate=WARD_ALERT_RATE,
+        ward_burst=WARD_ALERT_BURST,
+        clock=time.monotonic
+    ):
+
+        self.dedup_window = dedup_window
+        self.patient_rate = patient_rate
+        self.patient_burst = patient_burst
+        self.clock = clock
+
+        self.ward = TokenBucket(ward_rate, ward_burst, clock)
+
+        # (patient, rule, severity) -> when it was last stored
+        self.last_stored = {}
+
+        # (patient, rule, severity) -> repeats since then
+        self.pending = {}
+
+        self.patients = {}
+
+        self.stored = 0
+        self.duplicates = 0
+        self.rate_limited = 0
+
+        self.next_prune = clock() + dedup_window
+
+    def _patient_bucket(self, patient_id):
+
+        bucket = self.patients.get(patient_id)
+
+        if bucket is None:
+            bucket = self.patients[patient_id] = TokenBucket(
+                self.patient_rate,
+                self.patient_burst,
+                self.clock
+            )
+
+        return bucket
+
+    def _prune(self, now):
+
+        expired = [
+            key for key, stored in self.last_stored.items()
+            if now - stored >= self.dedup_window
+            and key not in self.pending
+        ]
+
+        for key in expired:
+            del self.last_stored[key]
+
+        idle = {key[0] for key in self.last_stored} | {
+            key[0] for key in self.pending
+        }
+
+        for patient_id in list(self.patients):
+
+            if patient_id not in idle and self.patients[patient_id].full():
+                del self.patients[patient_id]
+
+    # Returns (store, repeats): whether this alert should be stored
+    # and how many suppressed repeats it stands for.
+    def check(self, patient_id, rule, severity):
+
+        now = self.clock()
+
+        key = (patient_id, rule, severity)
+
+        stored = self.last_stored.get(key)
+
+        if stored is not None and now - stored < self.dedup_window:
+
+            self.duplicates += 1
+            self.pending[key] = self.pending.get(key, 0) + 1
+
+            return False, 0
+
+        # Critical alerts are only deduplicated: a storm of warnings
+        # must never keep one from being stored and paged. Others
+        # take a token from both buckets, or from neither.
+        if severity != "critical":
+
+            bucket = self._patient_bucket(patient_id)
+
+            if bucket.wait_time() or self.ward.wait_time():
+
+                self.rate_limited += 1
+                self.pending[key] = self.pending.get(key, 0) + 1
+
+                return False, 0
+
+            bucket.try_acquire()
+            self.ward.try_acquire()
+
+        self.last_stored[key] = now
+        self.stored += 1
+
+        # Forget expired keys and idle patients once per window so
+        # memory follows the active patients, not every one seen.
+        if now >= self.next_prune:
+            self._prune(now)
+            self.next_prune = now + self.dedup_window
+
+        return True, self.pending.pop(key, 0)
+
+    def stats(self):
+
+        return {
+            "stored": self.stored,
+            "duplicates": self.duplicates,
+            "rate_limited": self.rate_limited,
+            "suppressed": self.duplicates + self.rate_limited,
+            "pending": sum(self.pending.values())
+        }
+
+
+# --------------------------------------------------------------
+# LOG ACCESS
+# --------------------------------------------------------------
+def get_notification_log():
+
+    global _log
+
+    if _log is None:
+
+        log = get_log(
+            "notifications",
+            NOTIFICATION_DIR,
+            NOTIFICATION_SEGMENT_ROWS,
+            NOTIFICATION_RETAIN_SEGMENTS
+        )
+
+        import_legacy(
+            log,
+            NOTIFICATION_DIR,
+            NOTIFICATION_FILE,
+            NOTIFICATION_KEY
+        )
+
+        _log = log
+
+    return _log
+
+
+def get_suppressor():
+
+    global _suppressor
+
+    if _suppressor is None:
+        _suppressor = AlertSuppressor()
+
+    return _suppressor
+
+
+# --------------------------------------------------------------
+# WRITE
+# --------------------------------------------------------------
+# Returns True when the alert was stored and False when it was
+# folded into an earlier one or dropped by the rate limits.
+def save_alert(patient_id, severity, message, rule=None):
+
+    rule = rule or message
+
+    with _lock:
+
+        store, repeats = get_suppressor().check(patient_id, rule, severity)
+
+        if not store:
+            return False
+
+        now = datetime.now()
+
+        get_notification_log().append(NOTIFICATION_KEY, {
+            "time": now.strftime("%H:%M:%S"),
+            "timestamp": int(now.timestamp() * 1000),
+            "patient_id": patient_id,
+            "severity": severity,
+            "rule": rule,
+            "message": message,
+            "suppressed": repeats
+        })
+
+    notify(ALERTS_TOPIC)
 
+    return True
 
-def save_alert(patient_id, severity, message):
 
-    alerts = []
+# --------------------------------------------------------------
+# READ
+# --------------------------------------------------------------
+def load_alerts(limit=NOTIFICATION_LIMIT):
 
-    if os.path.exists(NOTIFICATION_FILE):
+    return get_notification_log().tail(NOTIFICATION_KEY, limit)
 
-        with open(NOTIFICATION_FILE, "r") as f:
-            alerts = json.load(f)
 
-    alerts.append({
-        "time": datetime.now().strftime("%H:%M:%S"),
-        "patient_id": patient_id,
-        "severity": severity,
-        "message": message
-    })
+def suppression_stats():
 
-    with open(NOTIFICATION_FILE, "w") as f:
-        json.dump(alerts, f, indent=4)
+    with _lock:
+        return get_suppressor().stats()
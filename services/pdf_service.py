@@ -1,15 +1,41 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 from reportlab.platypus import (
     SimpleDocTemplate,
     Paragraph,
-    Spacer
+    Spacer,
+    Table
 )
 
 from reportlab.lib.styles import getSampleStyleSheet
 
+from services.perf import instrument
+
 
-def generate_report(filename, vitals):
+# Upper bound on the PDF bytes kept in memory across all sessions.
+REPORT_CACHE_BYTES = 32 * 1024 * 1024
 
-    doc = SimpleDocTemplate(filename)
+
+# --------------------------------------------------------------
+# BUILD REPORT
+# --------------------------------------------------------------
+# `target` is a filename or any writable binary file object.
+# `history` is an optional list of history rows rendered as a
+# table under the vitals.
+def generate_report(target, vitals, history=None):
+
+    doc = SimpleDocTemplate(target)
 
     styles = getSampleStyleSheet()
 
@@ -33,4 +59,220 @@ def generate_report(filename, vitals):
             )
         )
 
+    if history:
+
+        columns = list(history[0].keys())
+
+        elements.append(Spacer(1, 20))
+
+        elements.append(
+            Paragraph(
+                "Recent History",
+                styles["Heading2"]
+            )
+        )
+
+        elements.append(
+            Table(
+                [columns]
+                + [[row.get(c, "") for c in columns] for row in history]
+            )
+        )
+
     doc.build(elements)
+
+
+def build_report_bytes(vitals, history=None):
+
+    buffer = io.BytesIO()
+
+    generate_report(buffer, vitals, history)
+
+    return buffer.getvalue()
+
+
+def report_key(vitals):
+
+    return hashlib.sha256(
+        json.dumps(vitals, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+# --------------------------------------------------------------
+# IN-MEMORY REPORT CACHE
+# --------------------------------------------------------------
+# Reports are keyed by a hash of their contents, so a patient whose
+# vitals have not changed gets the same bytes back without
+# rebuilding. Least recently used reports are evicted once the
+# cached bytes exceed `max_bytes`.
+class ReportCache:
+
+    def __init__(self, max_bytes=REPORT_CACHE_BYTES):
+
+        self.max_bytes = max_bytes
+
+        self._reports = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, vitals):
+
+        key = report_key(vitals)
+
+        with self._lock:
+
+            data = self._reports.get(key)
+
+            if data is not None:
+
+                self._reports.move_to_end(key)
+                self.hits += 1
+
+                return data
+
+            self.misses += 1
+
+        data = build_report_bytes(vitals)
+
+        with self._lock:
+
+            if key not in self._reports:
+
+                self._reports[key] = data
+                self._size += len(data)
+
+            while self._size > self.max_bytes and len(self._reports) > 1:
+
+                _, evicted = self._reports.popitem(last=False)
+
+                self._size -= len(evicted)
+                self.evictions += 1
+
+        return data
+
+    def stats(self):
+
+        with self._lock:
+
+            return {
+                "reports": len(self._reports),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+
+_cache = ReportCache()
+
+
+@instrument()
+def get_report_bytes(vitals):
+
+    return _cache.get(vitals)
+
+
+# --------------------------------------------------------------
+# BULK WARD REPORTS
+# --------------------------------------------------------------
+def _build_ward_report(job):
+
+    patient_id, vitals, history = job
+
+    report = {"patient": patient_id, **vitals}
+
+    return patient_id, build_report_bytes(report, history)
+
+
+# Patient ids come from uploaded CSVs, so they are reduced to safe
+# characters before becoming names inside the archive. Ids that
+# reduce to the same name (P/1 and P_1) get a numeric suffix, in
+# input order, so no entry shadows another.
+def _report_names(patient_ids):
+
+    names = {}
+    used = set()
+
+    for patient_id in patient_ids:
+
+        base = re.sub(r"[^\w.-]", "_", str(patient_id)).lstrip(".") or "patient"
+
+        name = f"{base}_report.pdf"
+        suffix = 1
+
+        while name in used:
+            suffix += 1
+            name = f"{base}_{suffix}_report.pdf"
+
+        used.add(name)
+        names[patient_id] = name
+
+    return names
+
+
+# Renders one report per patient in a process pool and writes each
+# PDF into the zip archive as soon as it is finished. `target` is
+# a path or a writable binary file object. Workers are spawned,
+# not forked: the Streamlit server has background threads that a
+# forked child would inherit mid-operation.
+def generate_ward_reports(patients, history, target, workers=None):
+
+    workers = workers or os.cpu_count() or 1
+
+    jobs = [
+        (patient_id, vitals, history.get(patient_id, []))
+        for patient_id, vitals in patients.items()
+    ]
+
+    names = _report_names(patients)
+
+    start = time.perf_counter()
+
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+
+        if workers == 1:
+
+            for job in jobs:
+
+                patient_id, data = _build_ward_report(job)
+                archive.writestr(names[patient_id], data)
+
+        else:
+
+            with ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+
+                futures = [
+                    pool.submit(_build_ward_report, job)
+                    for job in jobs
+                ]
+
+                for future in as_completed(futures):
+
+                    patient_id, data = future.result()
+                    archive.writestr(names[patient_id], data)
+
+    elapsed = time.perf_counter() - start
+
+    return {
+        "reports": len(jobs),
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "reports_per_sec": round(len(jobs) / elapsed, 1) if elapsed else 0.0
+    }
+
+
+@instrument()
+def build_ward_archive(patients, history, workers=None):
+
+    buffer = io.BytesIO()
+
+    generate_ward_reports(patients, history, buffer, workers)
+
+    return buffer.getvalue()
@@ -0,0 +1,281 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+import numpy as np
+
+
+# AYUSHCARE_PERF=1 turns timing on at startup. Allocation tracking
+# (tracemalloc) roughly doubles the cost of allocating code, so it
+# has its own switch. AYUSHCARE_PERF_LOG names a JSON-lines file
+# that gets one line per timed call.
+PERF_ENABLED = os.environ.get("AYUSHCARE_PERF", "0") == "1"
+PERF_TRACEMALLOC = os.environ.get("AYUSHCARE_PERF_TRACEMALLOC", "0") == "1"
+PERF_LOG = os.environ.get("AYUSHCARE_PERF_LOG")
+
+PERF_BUFFER = 5000
+
+_recorder = None
+_lock = threading.Lock()
+
+_DISABLED = nullcontext()
+
+
+# --------------------------------------------------------------
+# RECORDER
+# --------------------------------------------------------------
+# Samples go into a fixed-size ring buffer, so memory stays flat
+# however long the app runs. Call counts and totals are kept per
+# name for the whole process lifetime. Log lines are buffered and
+# written by flush() once per rerun rather than per call.
+class PerfRecorder:
+
+    def __init__(
+        self,
+        capacity=PERF_BUFFER,
+        log_path=None,
+        trace_allocations=False
+    ):
+
+        self.samples = deque(maxlen=capacity)
+        self.totals = {}
+
+        self.log_path = log_path
+        self.trace_allocations = trace_allocations
+
+        self._pending = []
+        self._lock = threading.Lock()
+
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def timer(self, name):
+
+        return _Timer(self, name)
+
+    def record(self, name, started, seconds, allocated=None):
+
+        sample = {
+            "name": name,
+            "time": round(started, 3),
+            "ms": round(seconds * 1000, 3),
+            "alloc_kb": (
+                round(allocated / 1024, 1)
+                if allocated is not None else None
+            )
+        }
+
+        with self._lock:
+
+            self.samples.append(sample)
+
+            total = self.totals.get(name)
+
+            if total is None:
+                total = self.totals[name] = [0, 0.0, 0.0]
+
+            total[0] += 1
+            total[1] += seconds
+            total[2] = max(total[2], seconds)
+
+            if self.log_path:
+                self._pending.append(sample)
+
+    def flush(self):
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        if not pending or not self.log_path:
+            return 0
+
+        with open(self.log_path, "a") as f:
+            f.write(
+                "".join(json.dumps(s) + "\n" for s in pending)
+            )
+
+        return len(pending)
+
+    def summary(self):
+
+        with self._lock:
+            samples = list(self.samples)
+            totals = {k: list(v) for k, v in self.totals.items()}
+
+        recent = {}
+
+        for sample in samples:
+            recent.setdefault(sample["name"], []).append(sample)
+
+        rows = []
+
+        for name, (calls, seconds, worst) in totals.items():
+
+            window = recent.get(name, [])
+
+            times = np.array([s["ms"] for s in window])
+
+            allocs = [
+                s["alloc_kb"] for s in window
+                if s["alloc_kb"] is not None
+            ]
+
+            rows.append({
+                "name": name,
+                "calls": calls,
+                "total_ms": round(seconds * 1000, 2),
+                "mean_ms": round(seconds * 1000 / calls, 3),
+                "p95_ms": (
+                    round(float(np.percentile(times, 95)), 3)
+                    if len(times) else None
+                ),
+                "max_ms": round(worst * 1000, 3),
+                "mean_alloc_kb": (
+                    round(sum(allocs) / len(allocs), 1)
+                    if allocs else None
+                )
+            })
+
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+
+        return rows
+
+    def reset(self):
+
+        with self._lock:
+            self.samples.clear()
+            self.totals.clear()
+            self._pending = []
+
+    def close(self):
+
+        self.flush()
+
+        if self.trace_allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class _Timer:
+
+    __slots__ = ("recorder", "name", "started", "clock", "memory")
+
+    def __init__(self, recorder, name):
+
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+
+        if self.recorder.trace_allocations:
+            self.memory = tracemalloc.get_traced_memory()[0]
+
+        self.started = time.time()
+        self.clock = time.perf_counter()
+
+        return self
+
+    def __exit__(self, *exc):
+
+        seconds = time.perf_counter() - self.clock
+
+        allocated = None
+
+        if self.recorder.trace_allocations:
+            allocated = tracemalloc.get_traced_memory()[0] - self.memory
+
+        self.recorder.record(self.name, self.started, seconds, allocated)
+
+        return False
+
+
+# --------------------------------------------------------------
+# PUBLIC API
+# --------------------------------------------------------------
+def enable(log_path=PERF_LOG, trace_allocations=PERF_TRACEMALLOC):
+
+    global _recorder
+
+    with _lock:
+
+        if _recorder is None:
+            _recorder = PerfRecorder(
+                log_path=log_path,
+                trace_allocations=trace_allocations
+            )
+
+    return _recorder
+
+
+def disable():
+
+    global _recorder
+
+    with _lock:
+
+        if _recorder is not None:
+            _recorder.close()
+
+        _recorder = None
+
+
+def get_recorder():
+
+    return _recorder
+
+
+def is_enabled():
+
+    return _recorder is not None
+
+
+# with timed("render_history"): ...
+# Returns a shared no-op context manager while timing is off.
+def timed(name):
+
+    recorder = _recorder
+
+    if recorder is None:
+        return _DISABLED
+
+    return recorder.timer(name)
+
+
+# @instrument("aws.save_to_dynamodb")
+# While timing is off the wrapper costs one global lookup.
+def instrument(name=None):
+
+    def decorator(fn):
+
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+
+            recorder = _recorder
+
+            if recorder is None:
+                return fn(*args, **kwargs)
+
+            with recorder.timer(label):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def flush():
+
+    recorder = _recorder
+
+    return recorder.flush() if recorder is not None else 0
+
+
+if PERF_ENABLED:
+    enable()
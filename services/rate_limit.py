@@ -0,0 +1,79 @@
+import threading
+import time
+
+
+# --------------------------------------------------------------
+# TOKEN BUCKET
+# --------------------------------------------------------------
+# `rate` tokens are added per second up to `capacity`, so bursts of
+# up to `capacity` go through immediately and the long-run rate is
+# capped at `rate`. `clock` can be swapped for a fake in benchmarks.
+class TokenBucket:
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.clock = clock
+
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+        self._lock = threading.Lock()
+
+    def _refill(self):
+
+        now = self.clock()
+
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated) * self.rate
+        )
+
+        self.updated = now
+
+    def try_acquire(self, tokens=1):
+
+        with self._lock:
+
+            self._refill()
+
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+
+            return False
+
+    # Seconds until `tokens` would be available, 0 if they are now.
+    def wait_time(self, tokens=1):
+
+        with self._lock:
+
+            self._refill()
+
+            missing = tokens - self.tokens
+
+            return max(0.0, missing / self.rate) if self.rate else float("inf")
+
+    def acquire(self, tokens=1, timeout=None):
+
+        deadline = None if timeout is None else self.clock() + timeout
+
+        while not self.try_acquire(tokens):
+
+            wait = self.wait_time(tokens)
+
+            if deadline is not None and self.clock() + wait > deadline:
+                return False
+
+            time.sleep(wait)
+
+        return True
+
+    def full(self):
+
+        with self._lock:
+
+            self._refill()
+
+            return self.tokens >= self.capacity
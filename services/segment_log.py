@@ -0,0 +1,304 @@
+import json
+import os
+import threading
+
+from urllib.parse import quote, unquote
+
+
+SEGMENT_ROWS = 1000
+
+
+# --------------------------------------------------------------
+# KEY -> DIRECTORY NAME
+# --------------------------------------------------------------
+def _key_dir(key):
+
+    if key in ("", ".", ".."):
+        raise ValueError(f"Invalid log key: {key!r}")
+
+    return quote(str(key), safe="")
+
+
+def _json_default(value):
+
+    if hasattr(value, "item"):
+        return value.item()
+
+    return str(value)
+
+
+def _segment_name(number):
+
+    return f"{number:08d}.log"
+
+
+# --------------------------------------------------------------
+# APPEND-ONLY SEGMENTED LOG
+# --------------------------------------------------------------
+# One directory per key, one JSON line per record. Appends open
+# the active segment in append mode and write a single line, so
+# their cost does not depend on how many keys or rows exist.
+# When the active segment is full a new one is started and the
+# oldest segments beyond `retain_segments` are removed.
+class SegmentedLog:
+
+    def __init__(
+        self,
+        root,
+        segment_rows=SEGMENT_ROWS,
+        retain_segments=None
+    ):
+
+        self.root = root
+        self.segment_rows = segment_rows
+        self.retain_segments = retain_segments
+
+        self._lock = threading.Lock()
+
+        # key -> [active segment number, rows in active segment]
+        self._active = {}
+
+    # ----------------------------------------------------------
+    # PATHS
+    # ----------------------------------------------------------
+    def _dir(self, key):
+
+        return os.path.join(self.root, _key_dir(key))
+
+    def _segments(self, key):
+
+        path = self._dir(key)
+
+        if not os.path.isdir(path):
+            return []
+
+        return sorted(
+            int(name[:-4])
+            for name in os.listdir(path)
+            if name.endswith(".log") and name[:-4].isdigit()
+        )
+
+    def _segment_path(self, key, number):
+
+        return os.path.join(
+            self._dir(key),
+            _segment_name(number)
+        )
+
+    # ----------------------------------------------------------
+    # RECOVERY SCAN
+    # ----------------------------------------------------------
+    # Runs once per key per process. A crash in the middle of an
+    # append can leave a partial last line; it is cut off here so
+    # every segment only ever holds complete records.
+    def _recover(self, key):
+
+        segments = self._segments(key)
+
+        if not segments:
+            return [0, 0]
+
+        number = segments[-1]
+        path = self._segment_path(key, number)
+
+        with open(path, "rb+") as f:
+
+            data = f.read()
+
+            if data and not data.endswith(b"\n"):
+
+                data = data[:data.rfind(b"\n") + 1]
+
+                f.seek(len(data))
+                f.truncate()
+
+        return [number, data.count(b"\n")]
+
+    def _state(self, key):
+
+        state = self._active.get(key)
+
+        if state is None:
+            state = self._recover(key)
+            self._active[key] = state
+
+        return state
+
+    # ----------------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------------
+    # Timestamps are accepted for compatibility with SQLiteLog;
+    # segments keep records in arrival order only.
+    def append(self, key, record, timestamp_ms=None):
+
+        self.append_many(key, [record])
+
+    def append_many(self, key, records, timestamps_ms=None):
+
+        if not records:
+            return
+
+        with self._lock:
+
+            state = self._state(key)
+
+            os.makedirs(self._dir(key), exist_ok=True)
+
+            pending = list(records)
+
+            while pending:
+
+                if state[1] >= self.segment_rows:
+
+                    state[0] += 1
+                    state[1] = 0
+
+                    self._compact(key, state[0])
+
+                room = self.segment_rows - state[1]
+                chunk, pending = pending[:room], pending[room:]
+
+                data = "".join(
+                    json.dumps(
+                        r,
+                        separators=(",", ":"),
+                        default=_json_default
+                    ) + "\n"
+                    for r in chunk
+                )
+
+                with open(
+                    self._segment_path(key, state[0]),
+                    "a"
+                ) as f:
+                    f.write(data)
+
+                state[1] += len(chunk)
+
+    # ----------------------------------------------------------
+    # COMPACTION
+    # ----------------------------------------------------------
+    def _compact(self, key, active):
+
+        if self.retain_segments is None:
+            return
+
+        oldest = active - self.retain_segments + 1
+
+        for number in self._segments(key):
+
+            if number < oldest:
+                os.remove(self._segment_path(key, number))
+
+    def compact(self, key):
+
+        with self._lock:
+            self._compact(key, self._state(key)[0])
+
+    # ----------------------------------------------------------
+    # READ
+    # ----------------------------------------------------------
+    def _read_lines(self, key, number):
+
+        try:
+            with open(self._segment_path(key, number), "rb") as f:
+                return [line for line in f.read().split(b"\n") if line]
+
+        except FileNotFoundError:
+            return []
+
+    def _read_segment(self, key, number):
+
+        records = []
+
+        for line in self._read_lines(key, number):
+
+            try:
+                records.append(json.loads(line))
+
+            except json.JSONDecodeError:
+                continue
+
+        return records
+
+    def tail(self, key, limit):
+
+        rows = []
+
+        for number in reversed(self._segments(key)):
+
+            rows = self._read_segment(key, number) + rows
+
+            if len(rows) >= limit:
+                break
+
+        return rows[-limit:] if limit else []
+
+    # Newest-first pages. Every segment but the active one holds
+    # exactly `segment_rows` lines, so a row's position is its
+    # segment number * segment_rows + its line, and a page only
+    # reads the one or two segments it falls in. `before` is the
+    # cursor returned by the previous page; None once the oldest
+    # row has been returned.
+    def page(self, key, limit, before=None):
+
+        segments = self._segments(key)
+
+        if not segments or not limit:
+            return [], None
+
+        lines = []
+        cursor = None
+
+        for number in reversed(segments):
+
+            start = number * self.segment_rows
+
+            if before is not None and start >= before:
+                continue
+
+            segment = self._read_lines(key, number)
+
+            end = len(segment)
+
+            if before is not None:
+                end = min(end, before - start)
+
+            take = segment[max(0, end - (limit - len(lines))):end]
+
+            lines.extend(reversed(take))
+            cursor = start + end - len(take)
+
+            if len(lines) >= limit:
+                break
+
+        records = []
+
+        for line in lines:
+
+            try:
+                records.append(json.loads(line))
+
+            except json.JSONDecodeError:
+                continue
+
+        if cursor is None or cursor <= segments[0] * self.segment_rows:
+            cursor = None
+
+        return records, cursor
+
+    def scan(self, key):
+
+        for number in self._segments(key):
+            yield from self._read_segment(key, number)
+
+    def keys(self):
+
+        if not os.path.isdir(self.root):
+            return []
+
+        return sorted(
+            unquote(name)
+            for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name))
+        )
@@ -0,0 +1,567 @@
+import argparse
+import contextlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from services.segment_log import SegmentedLog, _json_default
+
+try:
+    import fcntl
+
+except ImportError:
+    fcntl = None
+
+
+STORAGE_BACKEND_ENV = "AYUSHCARE_STORAGE"
+
+DB_FILE = "ayushcare.db"
+
+# Idle connections kept per process. Sessions beyond this still get
+# a connection; it is closed instead of returned.
+POOL_SIZE = 8
+
+# How long a writer waits for another process's write lock.
+BUSY_TIMEOUT = 5.0
+
+BACKENDS = ("sqlite", "files")
+
+_database = None
+_lock = threading.Lock()
+
+
+def get_backend():
+
+    name = os.environ.get(STORAGE_BACKEND_ENV, "sqlite")
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {name!r}")
+
+    return name
+
+
+def now_ms():
+
+    return int(time.time() * 1000)
+
+
+# --------------------------------------------------------------
+# FILE LOCK
+# --------------------------------------------------------------
+# Held around writes to file-based stores so two Streamlit
+# processes never interleave them. A no-op where fcntl is missing.
+class FileLock:
+
+    def __init__(self, path):
+
+        self.path = path + ".lock"
+
+    def __enter__(self):
+
+        self.handle = open(self.path, "a")
+
+        if fcntl:
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+
+        return self
+
+    def __exit__(self, *exc):
+
+        if fcntl:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+
+        self.handle.close()
+
+        return False
+
+
+# --------------------------------------------------------------
+# DATABASE
+# --------------------------------------------------------------
+# One SQLite file in WAL mode shared by every store. In WAL mode
+# readers see the last committed state without taking the write
+# lock, so a session drawing charts never waits on one saving a
+# note. Connections are pooled per process and handed to one
+# thread at a time; sqlite3 keeps a prepared-statement cache per
+# connection, so reusing them also reuses the compiled SQL.
+class Database:
+
+    def __init__(self, path=DB_FILE, pool_size=POOL_SIZE):
+
+        self.path = path
+
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._schema = set()
+        self._schema_lock = threading.Lock()
+
+    def _connect(self):
+
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
+
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+
+        try:
+            conn = self._idle.get_nowait()
+
+        except queue.Empty:
+            conn = self._connect()
+
+        try:
+            yield conn
+
+        finally:
+
+            if conn.in_transaction:
+                conn.rollback()
+
+            try:
+                self._idle.put_nowait(conn)
+
+            except queue.Full:
+                conn.close()
+
+    # BEGIN IMMEDIATE takes the write lock up front, so a
+    # read-then-write transaction cannot fail halfway with "database
+    # is locked".
+    @contextlib.contextmanager
+    def transaction(self):
+
+        with self.connection() as conn:
+
+            conn.execute("BEGIN IMMEDIATE")
+
+            try:
+                yield conn
+
+            except BaseException:
+                conn.rollback()
+                raise
+
+            conn.commit()
+
+    def ensure(self, name, statements):
+
+        with self._schema_lock:
+
+            if name in self._schema:
+                return
+
+            with self.transaction() as conn:
+
+                for statement in statements:
+                    conn.execute(statement)
+
+            self._schema.add(name)
+
+    def close(self):
+
+        while True:
+
+            try:
+                self._idle.get_nowait().close()
+
+            except queue.Empty:
+                return
+
+
+def get_database():
+
+    global _database
+
+    with _lock:
+
+        if _database is None:
+            _database = Database()
+
+    return _database
+
+
+# --------------------------------------------------------------
+# SQLITE LOG
+# --------------------------------------------------------------
+# Same interface as SegmentedLog: records are appended per key and
+# read back newest last. Each row also carries the patient and a
+# millisecond timestamp in indexed columns for range queries.
+# Retention mirrors the segment log: once a key has grown by
+# `prune_every` rows, all but its newest `retain_rows` are deleted.
+class SQLiteLog:
+
+    def __init__(
+        self,
+        db,
+        table,
+        retain_rows=None,
+        prune_every=1000
+    ):
+
+        if not re.fullmatch(r"[a-z_]+", table):
+            raise ValueError(f"Invalid table name: {table!r}")
+
+        self.db = db
+        self.table = table
+        self.retain_rows = retain_rows
+        self.prune_every = prune_every
+
+        self._since_prune = {}
+        self._lock = threading.Lock()
+
+        db.ensure(table, [
+            f"""CREATE TABLE IF NOT EXISTS {table} (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL,
+                patient_id TEXT,
+                timestamp INTEGER NOT NULL,
+                data TEXT NOT NULL
+            )""",
+            f"CREATE INDEX IF NOT EXISTS {table}_key "
+            f"ON {table} (key, id)",
+            f"CREATE INDEX IF NOT EXISTS {table}_patient_time "
+            f"ON {table} (patient_id, timestamp)"
+        ])
+
+    # ----------------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------------
+    def append(self, key, record, timestamp_ms=None):
+
+        self.append_many(
+            key,
+            [record],
+            None if timestamp_ms is None else [timestamp_ms]
+        )
+
+    # One transaction and one executemany per call, however many
+    # records it carries.
+    def append_many(self, key, records, timestamps_ms=None):
+
+        if not records:
+            return
+
+        now = now_ms()
+
+        if timestamps_ms is None:
+            timestamps_ms = [r.get("timestamp", now) for r in records]
+
+        rows = [
+            (
+                key,
+                r.get("patient_id", key),
+                int(ts),
+                json.dumps(r, separators=(",", ":"), default=_json_default)
+            )
+            for r, ts in zip(records, timestamps_ms)
+        ]
+
+        with self.db.transaction() as conn:
+
+            conn.executemany(
+                f"INSERT INTO {self.table} "
+                f"(key, patient_id, timestamp, data) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+            if self.retain_rows is not None:
+
+                with self._lock:
+
+                    grown = self._since_prune.get(key, 0) + len(rows)
+
+                    if grown >= self.prune_every:
+                        self._prune(conn, key)
+                        grown = 0
+
+                    self._since_prune[key] = grown
+
+    def _prune(self, conn, key):
+
+        conn.execute(
+            f"DELETE FROM {self.table} WHERE key = ? AND id < ("
+            f"SELECT id FROM {self.table} WHERE key = ? "
+            f"ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (key, key, self.retain_rows - 1)
+        )
+
+    def compact(self, key):
+
+        if self.retain_rows is None:
+            return
+
+        with self.db.transaction() as conn:
+            self._prune(conn, key)
+
+    # ----------------------------------------------------------
+    # READ
+    # ----------------------------------------------------------
+    def tail(self, key, limit):
+
+        if not limit:
+            return []
+
+        with self.db.connection() as conn:
+
+            rows = conn.execute(
+                f"SELECT data FROM {self.table} WHERE key = ? "
+                f"ORDER BY id DESC LIMIT ?",
+                (key, limit)
+            ).fetchall()
+
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    # Newest-first pages; `before` is the row id returned by the
+    # previous page, None once the oldest row has been returned.
+    # The (key, id) index makes every page cost the same however
+    # deep it is.
+    def page(self, key, limit, before=None):
+
+        if not limit:
+            return [], None
+
+        with self.db.connection() as conn:
+
+            rows = conn.execute(
+                f"SELECT id, data FROM {self.table} "
+                f"WHERE key = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (key, before if before is not None else 2 ** 63 - 1, limit + 1)
+            ).fetchall()
+
+        cursor = rows[limit - 1][0] if len(rows) > limit else None
+
+        return [json.loads(row[1]) for row in rows[:limit]], cursor
+
+    def scan(self, key):
+
+        with self.db.connection() as conn:
+
+            rows = conn.execute(
+                f"SELECT data FROM {self.table} WHERE key = ? ORDER BY id",
+                (key,)
+            ).fetchall()
+
+        for row in rows:
+            yield json.loads(row[0])
+
+    def between(self, patient_id, start_ms, end_ms=None):
+
+        with self.db.connection() as conn:
+
+            rows = conn.execute(
+                f"SELECT data FROM {self.table} "
+                f"WHERE patient_id = ? AND timestamp >= ? AND timestamp < ? "
+                f"ORDER BY timestamp, id",
+                (patient_id, start_ms, end_ms if end_ms is not None else 2 ** 62)
+            ).fetchall()
+
+        return [json.loads(row[0]) for row in rows]
+
+    def keys(self):
+
+        with self.db.connection() as conn:
+
+            rows = conn.execute(
+                f"SELECT DISTINCT key FROM {self.table} ORDER BY key"
+            ).fetchall()
+
+        return [row[0] for row in rows]
+
+
+# --------------------------------------------------------------
+# STORE FACTORY
+# --------------------------------------------------------------
+# `name` is the SQLite table, `root` the directory the file backend
+# keeps its segments in. Segment sizes translate to row retention.
+def get_log(name, root, segment_rows, retain_segments=None):
+
+    if get_backend() == "files":
+
+        return SegmentedLog(
+            root,
+            segment_rows=segment_rows,
+            retain_segments=retain_segments
+        )
+
+    return SQLiteLog(
+        get_database(),
+        name,
+        retain_rows=(
+            None if retain_segments is None
+            else segment_rows * retain_segments
+        ),
+        prune_every=segment_rows
+    )
+
+
+# Fills an empty store from whatever the app used before: the
+# segment log directory when switching an existing install to
+# SQLite, otherwise the original JSON file. `key` is set for
+# files holding one list rather than a dict of lists.
+def import_legacy(log, log_dir, json_file, key=None):
+
+    if log.keys():
+        return
+
+    if isinstance(log, SQLiteLog) and os.path.isdir(log_dir):
+
+        source = SegmentedLog(log_dir)
+
+        for k in source.keys():
+            log.append_many(k, list(source.scan(k)))
+
+        return
+
+    if not os.path.exists(json_file):
+        return
+
+    try:
+
+        with open(json_file, "r") as f:
+            legacy = json.load(f)
+
+    except json.JSONDecodeError:
+
+        return
+
+    if key is not None:
+        log.append_many(key, legacy)
+        return
+
+    for k, rows in legacy.items():
+        log.append_many(k, rows)
+
+
+# --------------------------------------------------------------
+# JSON IMPORT / EXPORT
+# --------------------------------------------------------------
+# Writes every store in the original JSON layout, e.g. for a
+# backup or to move data between backends.
+def export_json(directory):
+
+    from services import auth_service, history_service
+    from services import notes_service, notification_service
+
+    os.makedirs(directory, exist_ok=True)
+
+    history = history_service.get_history_log()
+    notes = notes_service.get_notes_log()
+
+    files = {
+        auth_service.USERS_FILE: auth_service.load_users(),
+        history_service.HISTORY_FILE: {
+            k: list(history.scan(k)) for k in history.keys()
+        },
+        notes_service.NOTES_FILE: {
+            k: list(notes.scan(k)) for k in notes.keys()
+        },
+        notification_service.NOTIFICATION_FILE: list(
+            notification_service.get_notification_log().scan(
+                notification_service.NOTIFICATION_KEY
+            )
+        )
+    }
+
+    for name, data in files.items():
+
+        with open(os.path.join(directory, name), "w") as f:
+            json.dump(data, f, indent=4, default=_json_default)
+
+    return list(files)
+
+
+# Appends the JSON files found in `directory` to the current
+# stores. Users with the same name are overwritten.
+def import_json(directory):
+
+    from services import auth_service, history_service
+    from services import notes_service, notification_service
+
+    def read(name):
+
+        path = os.path.join(directory, name)
+
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "r") as f:
+            return json.load(f)
+
+    imported = []
+
+    users = read(auth_service.USERS_FILE)
+
+    if users is not None:
+
+        user_directory = auth_service.get_user_directory()
+
+        for username, record in users.items():
+            user_directory.put(username, record)
+
+        imported.append(auth_service.USERS_FILE)
+
+    for name, log in (
+        (history_service.HISTORY_FILE, history_service.get_history_log()),
+        (notes_service.NOTES_FILE, notes_service.get_notes_log())
+    ):
+
+        data = read(name)
+
+        if data is not None:
+
+            for k, rows in data.items():
+                log.append_many(k, rows)
+
+            imported.append(name)
+
+    if notes_service.NOTES_FILE in imported:
+        notes_service.rebuild_note_index()
+
+    alerts = read(notification_service.NOTIFICATION_FILE)
+
+    if alerts is not None:
+
+        notification_service.get_notification_log().append_many(
+            notification_service.NOTIFICATION_KEY,
+            alerts
+        )
+
+        imported.append(notification_service.NOTIFICATION_FILE)
+
+    return imported
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Copy AyushCare data to or from JSON files."
+    )
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("directory")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        names = export_json(args.directory)
+
+    else:
+        names = import_json(args.directory)
+
+    print(f"{args.command}ed {', '.join(names) or 'nothing'} "
+          f"({get_backend()} backend)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from urllib.parse import quote, unquote
+
+from services.storage import FileLock
+
+
+TIMESERIES_DIR = "timeseries"
+
+# One raw little-endian file per column; row i of every column
+# belongs to the same sample.
+COLUMNS = {
+    "timestamp": np.dtype("<i8"),
+    "heart_rate": np.dtype("<f4"),
+    "spo2": np.dtype("<f4"),
+    "temperature": np.dtype("<f4"),
+    "respiratory_rate": np.dtype("<f4"),
+    "systolic": np.dtype("<f4"),
+    "diastolic": np.dtype("<f4")
+}
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------------------------
+# HELPERS
+# --------------------------------------------------------------
+def parse_bp(bp):
+
+    try:
+        systolic, diastolic = str(bp).split("/")
+        return float(systolic), float(diastolic)
+
+    except (ValueError, TypeError):
+        return np.nan, np.nan
+
+
+def _number(vitals, key):
+
+    value = vitals.get(key)
+
+    if value is None:
+        return np.nan
+
+    try:
+        return float(value)
+
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def now_ms():
+
+    return int(time.time() * 1000)
+
+
+# --------------------------------------------------------------
+# COLUMNAR STORE
+# --------------------------------------------------------------
+class TimeSeriesStore:
+
+    def __init__(self, root=TIMESERIES_DIR):
+
+        self.root = root
+
+        self._lock = threading.Lock()
+
+    def _dir(self, patient_id):
+
+        return os.path.join(self.root, quote(str(patient_id), safe=""))
+
+    def _path(self, patient_id, column):
+
+        return os.path.join(self._dir(patient_id), f"{column}.bin")
+
+    def _rows_on_disk(self, patient_id):
+
+        rows = None
+
+        for column, dtype in COLUMNS.items():
+
+            try:
+                size = os.path.getsize(self._path(patient_id, column))
+
+            except FileNotFoundError:
+                size = 0
+
+            count = size // dtype.itemsize
+            rows = count if rows is None else min(rows, count)
+
+        return rows
+
+    # ----------------------------------------------------------
+    # RECOVERY
+    # ----------------------------------------------------------
+    # A crash between column writes leaves some columns one batch
+    # longer than others. Trim everything back to the shortest
+    # column and return the last stored timestamp. Called under the
+    # patient's file lock, so no other writer is mid-append.
+    def _recover(self, patient_id):
+
+        sizes = {}
+
+        for column in COLUMNS:
+
+            try:
+                sizes[column] = os.path.getsize(self._path(patient_id, column))
+
+            except FileNotFoundError:
+                sizes[column] = 0
+
+        rows = min(
+            sizes[column] // dtype.itemsize
+            for column, dtype in COLUMNS.items()
+        )
+
+        for column, dtype in COLUMNS.items():
+
+            if sizes[column] != rows * dtype.itemsize:
+
+                with open(self._path(patient_id, column), "rb+") as f:
+                    f.truncate(rows * dtype.itemsize)
+
+        if not rows:
+            return None
+
+        itemsize = COLUMNS["timestamp"].itemsize
+
+        with open(self._path(patient_id, "timestamp"), "rb") as f:
+
+            f.seek((rows - 1) * itemsize)
+
+            return int(np.frombuffer(f.read(itemsize), dtype=COLUMNS["timestamp"])[0])
+
+    # ----------------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------------
+    def append(self, patient_id, vitals, timestamp_ms=None):
+
+        self.append_many(patient_id, [vitals], [timestamp_ms or now_ms()])
+
+    # Returns how many rows were stored. Window queries binary-search
+    # the timestamp column, so a batch is written in timestamp order
+    # and rows older than the patient's last stored sample are
+    # dropped rather than re-stamped.
+    def append_many(self, patient_id, rows, timestamps_ms):
+
+        if not rows:
+            return 0
+
+        ts = np.asarray(timestamps_ms, dtype=np.int64)
+
+        if np.any(ts[1:] < ts[:-1]):
+
+            order = np.argsort(ts, kind="stable")
+
+            ts = ts[order]
+            rows = [rows[i] for i in order]
+
+        systolic, diastolic = zip(*(parse_bp(r.get("bp")) for r in rows))
+
+        columns = {
+            "timestamp": ts,
+            "heart_rate": [_number(r, "heart_rate") for r in rows],
+            "spo2": [_number(r, "spo2") for r in rows],
+            "temperature": [_number(r, "temperature") for r in rows],
+            "respiratory_rate": [
+                _number(r, "respiratory_rate") for r in rows
+            ],
+            "systolic": systolic,
+            "diastolic": diastolic
+        }
+
+        os.makedirs(self._dir(patient_id), exist_ok=True)
+
+        # The gateway and the dashboard can both append to one
+        # patient, so the last timestamp is re-read from disk under
+        # a lock shared between processes.
+        with self._lock, FileLock(os.path.join(self._dir(patient_id), "append")):
+
+            last = self._recover(patient_id)
+
+            keep = 0 if last is None else int(
+                np.searchsorted(ts, last, side="left")
+            )
+
+            if keep:
+
+                logger.warning(
+                    "Dropped %d out-of-order samples for %s",
+                    keep,
+                    patient_id
+                )
+
+                if keep == len(ts):
+                    return 0
+
+                columns = {
+                    column: values[keep:]
+                    for column, values in columns.items()
+                }
+
+            for column, dtype in COLUMNS.items():
+
+                with open(self._path(patient_id, column), "ab") as f:
+                    f.write(np.asarray(columns[column], dtype=dtype).tobytes())
+
+        return len(ts) - keep
+
+    # ----------------------------------------------------------
+    # READ
+    # ----------------------------------------------------------
+    def _column(self, patient_id, column, rows):
+
+        if not rows:
+            return np.empty(0, dtype=COLUMNS[column])
+
+        return np.memmap(
+            self._path(patient_id, column),
+            dtype=COLUMNS[column],
+            mode="r",
+            shape=(rows,)
+        )
+
+    def window(self, patient_id, start_ms=None, end_ms=None):
+
+        rows = self._rows_on_disk(patient_id)
+
+        timestamps = self._column(patient_id, "timestamp", rows)
+
+        lo = 0 if start_ms is None else int(
+            np.searchsorted(timestamps, start_ms, side="left")
+        )
+
+        hi = rows if end_ms is None else int(
+            np.searchsorted(timestamps, end_ms, side="right")
+        )
+
+        # Slices of a memmap are views onto the mapped file, so no
+        # sample data is copied until a caller touches it.
+        return {
+            column: (
+                timestamps if column == "timestamp"
+                else self._column(patient_id, column, rows)
+            )[lo:hi]
+            for column in COLUMNS
+        }
+
+    def latest(self, patient_id):
+
+        rows = self._rows_on_disk(patient_id)
+
+        if not rows:
+            return None
+
+        return {
+            column: self._column(patient_id, column, rows)[-1].item()
+            for column in COLUMNS
+        }
+
+    def row_count(self, patient_id):
+
+        return self._rows_on_disk(patient_id)
+
+    def patients(self):
+
+        if not os.path.isdir(self.root):
+            return []
+
+        return sorted(unquote(name) for name in os.listdir(self.root))
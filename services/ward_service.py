@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+from services.alerts import calculate_risk_batch
+from services.history_service import get_timeseries_store
+
+
+VITAL_COLUMNS = [
+    "heart_rate",
+    "spo2",
+    "temperature",
+    "respiratory_rate",
+    "bp"
+]
+
+OVERVIEW_COLUMNS = VITAL_COLUMNS + [
+    "risk_score",
+    "risk_level",
+    "patient_status"
+]
+
+
+# --------------------------------------------------------------
+# WARD FRAMES
+# --------------------------------------------------------------
+# Every source is reduced to one row per patient, indexed by
+# patient id, holding that patient's latest vitals.
+def frame_from_json(data):
+
+    frame = pd.DataFrame.from_dict(data, orient="index")
+    frame.index.name = "patient_id"
+
+    return frame.reindex(columns=VITAL_COLUMNS)
+
+
+def frame_from_csv(csv_df):
+
+    latest = (
+        csv_df
+        .sort_values("timestamp")
+        .groupby("patient_id")
+        .last()
+    )
+
+    return latest.reindex(columns=VITAL_COLUMNS)
+
+
+def frame_from_history():
+
+    store = get_timeseries_store()
+
+    rows = {}
+
+    for patient_id in store.patients():
+
+        latest = _latest_row(store, patient_id)
+
+        if latest is not None:
+            rows[patient_id] = latest
+
+    return frame_from_json(rows)
+
+
+# One patient's latest vitals, shaped like a row of
+# frame_from_history(), without reading every other patient.
+def latest_vitals(patient_id):
+
+    latest = _latest_row(get_timeseries_store(), patient_id)
+
+    if latest is None:
+        return None
+
+    return {column: latest.get(column) for column in VITAL_COLUMNS}
+
+
+def _latest_row(store, patient_id):
+
+    latest = store.latest(patient_id)
+
+    if latest is None:
+        return None
+
+    latest["bp"] = (
+        f"{latest['systolic']:.0f}/{latest['diastolic']:.0f}"
+        if not np.isnan(latest["systolic"]) else None
+    )
+
+    return latest
+
+
+# --------------------------------------------------------------
+# INCREMENTAL WARD OVERVIEW
+# --------------------------------------------------------------
+# Keeps the scored table between refreshes. Each update hashes
+# the incoming vitals row by row and only sends patients that are
+# new or whose vitals changed through calculate_risk_batch.
+class WardOverview:
+
+    def __init__(self):
+
+        self.table = pd.DataFrame(columns=OVERVIEW_COLUMNS)
+        self.fingerprints = pd.Series(dtype="uint64")
+
+        self.last_rescored = 0
+
+    def update(self, frame):
+
+        frame = frame.reindex(columns=VITAL_COLUMNS)
+
+        fingerprints = pd.util.hash_pandas_object(
+            frame.astype(str),
+            index=False
+        )
+        fingerprints.index = frame.index
+
+        previous = self.fingerprints.reindex(frame.index)
+
+        changed = fingerprints.ne(previous).to_numpy()
+
+        table = self.table.reindex(frame.index)
+
+        if changed.any():
+
+            updates = frame.loc[changed]
+
+            scored = calculate_risk_batch(updates)
+
+            updates = updates.assign(
+                risk_score=scored["risk_score"],
+                risk_level=scored["risk_level"],
+                patient_status=scored["patient_status"]
+            )
+
+            table = table.astype(object)
+            table.loc[changed, OVERVIEW_COLUMNS] = updates[OVERVIEW_COLUMNS].to_numpy()
+
+        self.table = table
+        self.fingerprints = fingerprints
+        self.last_rescored = int(changed.sum())
+
+        return self
+
+    def page(self, number, size, sort_by="risk_score", ascending=True):
+
+        ordered = self.table.sort_values(
+            sort_by,
+            ascending=ascending,
+            kind="stable"
+        )
+
+        start = number * size
+
+        return ordered.iloc[start:start + size]
+
+    def page_count(self, size):
+
+        return max(1, -(-len(self.table) // size))
@@ -0,0 +1,620 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from services.alerts import get_alerts
+
+
+VITALS_TOPIC = "ayushcare/vitals"
+ECG_TOPIC = "ayushcare/ecg"
+
+ECG_SAMPLE_RATE = 250
+
+
+# --------------------------------------------------------------
+# DEVICE PAYLOADS
+# --------------------------------------------------------------
+# Normal readings use the same ranges as ayushcare_aws_iot.ino.
+# Abnormal readings cross the get_alerts thresholds.
+def make_payload(patient_id, rng, abnormal_rate):
+
+    if rng.random() < abnormal_rate:
+
+        payload = {
+            "patient_id": patient_id,
+            "heart_rate": rng.randint(101, 140),
+            "spo2": rng.randint(82, 89),
+            "temperature": float(rng.randint(39, 40))
+        }
+
+    else:
+
+        payload = {
+            "patient_id": patient_id,
+            "heart_rate": rng.randint(70, 89),
+            "spo2": rng.randint(95, 99),
+            "temperature": float(rng.randint(36, 37))
+        }
+
+    payload["timestamp"] = int(time.time() * 1000)
+
+    return payload
+
+
+# Synthetic PQRST complex: one Gaussian bump per wave, repeated at
+# the device's heart rate, on top of baseline wander and noise.
+ECG_WAVES = [
+    (0.2, 0.10, 0.025),
+    (-0.15, 0.24, 0.010),
+    (1.6, 0.27, 0.012),
+    (-0.25, 0.30, 0.010),
+    (0.35, 0.55, 0.040)
+]
+
+
+def ecg_samples(start, count, bpm, rng):
+
+    t = (start + np.arange(count)) / ECG_SAMPLE_RATE
+
+    phase = (t * bpm / 60.0) % 1.0
+
+    signal = sum(
+        amplitude * np.exp(-((phase - center) ** 2) / (2 * width ** 2))
+        for amplitude, center, width in ECG_WAVES
+    )
+
+    signal += 0.05 * np.sin(2 * np.pi * 0.3 * t)
+    signal += rng.normal(0, 0.02, count)
+
+    return np.round(signal * 1000).astype(int).tolist()
+
+
+class FleetStats:
+
+    def __init__(self):
+
+        self.sent = 0
+        self.errors = 0
+        self.alerting = 0
+        self.ecg_samples = 0
+
+        self.send_latencies = []
+        self.visible_latencies = []
+
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def stop(self):
+
+        self.finished = time.perf_counter()
+
+    def record(self, payload):
+
+        self.sent += 1
+
+        if get_alerts(payload):
+            self.alerting += 1
+
+    def report(self):
+
+        elapsed = (self.finished or time.perf_counter()) - self.started
+
+        def pct(samples, q):
+            return round(float(np.percentile(samples, q)) * 1000, 2) if samples else None
+
+        return {
+            "sent": self.sent,
+            "errors": self.errors,
+            "alerting_readings": self.alerting,
+            "ecg_samples": self.ecg_samples,
+            "seconds": round(elapsed, 2),
+            "send_rate": round(self.sent / elapsed, 1),
+            "send_latency_p50_ms": pct(self.send_latencies, 50),
+            "send_latency_p99_ms": pct(self.send_latencies, 99),
+            "visible_latency_p50_ms": pct(self.visible_latencies, 50),
+            "visible_latency_p99_ms": pct(self.visible_latencies, 99)
+        }
+
+
+# --------------------------------------------------------------
+# TRANSPORTS
+# --------------------------------------------------------------
+class HttpTransport:
+
+    def __init__(self, host, port):
+
+        self.host = host
+        self.port = port
+
+    async def connect(self):
+
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host,
+            self.port
+        )
+
+    async def send(self, payload, path="/vitals", topic=None):
+
+        body = json.dumps(payload).encode()
+
+        self.writer.write(
+            f"POST {path} HTTP/1.1\r\n".encode()
+            + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await self.writer.drain()
+
+        status = await self.reader.readline()
+        headers = await self.reader.readuntil(b"\r\n\r\n")
+
+        length = 0
+
+        for line in headers.split(b"\r\n"):
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+
+        await self.reader.readexactly(length)
+
+        return status.split()[1] == b"202"
+
+    def close(self):
+
+        self.writer.close()
+
+
+class MqttTransport:
+
+    def __init__(self, host, port, client_id):
+
+        self.host = host
+        self.port = port
+        self.client_id = client_id.encode()
+        self.packet_id = 0
+
+    async def connect(self):
+
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host,
+            self.port
+        )
+
+        variable = b"\x00\x04MQTT\x04\x02\x00\x3c"
+        payload = len(self.client_id).to_bytes(2, "big") + self.client_id
+
+        self.writer.write(
+            _mqtt_packet(0x10, variable + payload)
+        )
+        await self.writer.drain()
+
+        await self.reader.readexactly(4)
+
+    async def send(self, payload, path=None, topic=VITALS_TOPIC):
+
+        self.packet_id = self.packet_id % 65535 + 1
+
+        topic = topic.encode()
+
+        body = (
+            len(topic).to_bytes(2, "big")
+            + topic
+            + self.packet_id.to_bytes(2, "big")
+            + json.dumps(payload).encode()
+        )
+
+        # QoS 1 so every publish is acknowledged.
+        self.writer.write(_mqtt_packet(0x32, body))
+        await self.writer.drain()
+
+        ack = await self.reader.readexactly(4)
+
+        return ack[0] == 0x40
+
+    def close(self):
+
+        self.writer.write(b"\xe0\x00")
+        self.writer.close()
+
+
+def _mqtt_packet(header, body):
+
+    length = len(body)
+    encoded = bytearray()
+
+    while True:
+
+        byte = length % 128
+        length //= 128
+
+        encoded.append(byte | 0x80 if length else byte)
+
+        if not length:
+            break
+
+    return bytes([header]) + bytes(encoded) + body
+
+
+# --------------------------------------------------------------
+# DEVICE LOOP
+# --------------------------------------------------------------
+async def run_device(index, transport, args, stats, probes, stop_at):
+
+    rng = random.Random(args.seed + index)
+    patient_id = f"P{index:05d}"
+
+    try:
+        await transport.connect()
+
+    except OSError:
+        stats.errors += 1
+        return
+
+    interval = 1.0 / args.rate
+
+    # Spread first sends over one interval so devices do not all
+    # fire in the same tick.
+    await asyncio.sleep(rng.random() * interval)
+
+    next_burst = time.monotonic() + args.burst_every if args.burst_every else None
+
+    try:
+
+        while time.monotonic() < stop_at:
+
+            count = 1
+
+            if next_burst and time.monotonic() >= next_burst:
+                count = args.burst_size
+                next_burst += args.burst_every
+
+            for _ in range(count):
+
+                payload = make_payload(patient_id, rng, args.abnormal_rate)
+
+                start = time.perf_counter()
+
+                try:
+                    ok = await transport.send(payload)
+
+                except (OSError, asyncio.IncompleteReadError):
+                    stats.errors += 1
+                    return
+
+                stats.send_latencies.append(time.perf_counter() - start)
+                stats.record(payload)
+
+                if not ok:
+                    stats.errors += 1
+
+                elif patient_id in probes:
+                    probes[patient_id] = (payload["timestamp"], start)
+
+            jitter = 1 + rng.uniform(-args.jitter, args.jitter)
+
+            await asyncio.sleep(interval * jitter)
+
+    finally:
+        transport.close()
+
+
+# Streams 250 Hz samples in batches of --ecg-batch over its own
+# connection, like the firmware's ayushcare/ecg publisher.
+async def run_ecg_device(index, transport, args, stats, stop_at):
+
+    rng = np.random.default_rng(args.seed + index)
+    patient_id = f"P{index:05d}"
+
+    bpm = int(rng.integers(60, 100))
+
+    try:
+        await transport.connect()
+
+    except OSError:
+        stats.errors += 1
+        return
+
+    interval = args.ecg_batch / ECG_SAMPLE_RATE
+
+    sent = 0
+    started = time.monotonic()
+
+    try:
+
+        while time.monotonic() < stop_at:
+
+            payload = {
+                "patient_id": patient_id,
+                "samples": ecg_samples(sent, args.ecg_batch, bpm, rng)
+            }
+
+            try:
+                ok = await transport.send(payload, path="/ecg", topic=ECG_TOPIC)
+
+            except (OSError, asyncio.IncompleteReadError):
+                stats.errors += 1
+                return
+
+            if ok:
+                stats.ecg_samples += args.ecg_batch
+
+            else:
+                stats.errors += 1
+
+            sent += args.ecg_batch
+
+            # Keep to the sample clock rather than drifting by the
+            # send latency.
+            await asyncio.sleep(
+                max(0, started + sent / ECG_SAMPLE_RATE - time.monotonic())
+            )
+
+    finally:
+        transport.close()
+
+
+# Polls the columnar store for a sample of devices and records how
+# long each reading took to become readable by the dashboard.
+async def watch_visibility(probes, stats, stop_at):
+
+    from services.history_service import get_timeseries_store
+
+    store = get_timeseries_store()
+
+    while time.monotonic() < stop_at + 2:
+
+        for patient_id, pending in list(probes.items()):
+
+            if pending is None:
+                continue
+
+            timestamp, sent = pending
+
+            latest = store.latest(patient_id)
+
+            if latest and latest["timestamp"] >= timestamp:
+
+                stats.visible_latencies.append(time.perf_counter() - sent)
+                probes[patient_id] = None
+
+        await asyncio.sleep(0.01)
+
+
+async def run_network_fleet(args):
+
+    stats = FleetStats()
+
+    stop_at = time.monotonic() + args.duration
+
+    probes = {
+        f"P{i:05d}": None
+        for i in range(0, args.devices, max(1, args.devices // args.probes))
+    }
+
+    def transport(i):
+
+        if args.target == "http":
+            return HttpTransport(args.host, args.port)
+
+        return MqttTransport(args.host, args.port, f"sim-{i}")
+
+    devices = [
+        run_device(i, transport(i), args, stats, probes, stop_at)
+        for i in range(args.devices)
+    ]
+
+    devices += [
+        run_ecg_device(i, transport(f"ecg-{i}"), args, stats, stop_at)
+        for i in range(min(args.ecg_devices, args.devices))
+    ]
+
+    watcher = asyncio.ensure_future(watch_visibility(probes, stats, stop_at))
+
+    await asyncio.gather(*devices)
+    stats.stop()
+
+    await watcher
+
+    return stats.report()
+
+
+# --------------------------------------------------------------
+# IN-PROCESS TARGETS
+# --------------------------------------------------------------
+def _lambda_worker(job):
+
+    import importlib.util
+    import logging
+
+    from services.local_aws import InMemoryTable
+
+    devices, readings, seed, abnormal_rate = job
+
+    spec = importlib.util.spec_from_file_location(
+        "lambda_function",
+        os.path.join(ROOT, "aws", "lambda_function.py")
+    )
+
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.logger.setLevel(logging.CRITICAL)
+    module.set_table(InMemoryTable())
+
+    rng = random.Random(seed)
+
+    latencies = []
+    errors = 0
+    alerting = 0
+
+    for _ in range(readings):
+
+        payloads = [
+            make_payload(f"P{i:05d}", rng, abnormal_rate)
+            for i in devices
+        ]
+
+        alerting += sum(1 for p in payloads if get_alerts(p))
+
+        event = {"Records": [
+            {"Sns": {"MessageId": str(n), "Message": json.dumps(p)}}
+            for n, p in enumerate(payloads)
+        ]}
+
+        start = time.perf_counter()
+        result = module.lambda_handler(event, None)
+        latencies.append(time.perf_counter() - start)
+
+        errors += len(result["batchItemFailures"])
+
+    return len(devices) * readings, errors, alerting, latencies
+
+
+def run_lambda_fleet(args):
+
+    stats = FleetStats()
+
+    workers = args.workers or os.cpu_count() or 1
+
+    # Each worker owns a slice of the fleet and sends one SNS batch
+    # per tick containing a reading from each of its devices.
+    slices = [
+        list(range(args.devices))[w::workers]
+        for w in range(workers)
+    ]
+
+    readings = max(1, int(args.rate * args.duration))
+
+    with ProcessPoolExecutor(workers) as pool:
+
+        for sent, errors, alerting, latencies in pool.map(
+            _lambda_worker,
+            [
+                (devices, readings, args.seed + w, args.abnormal_rate)
+                for w, devices in enumerate(slices) if devices
+            ]
+        ):
+
+            stats.sent += sent
+            stats.errors += errors
+            stats.alerting += alerting
+            stats.send_latencies.extend(latencies)
+
+    return stats.report()
+
+
+# save_to_dynamodb also appends to the history log and time-series
+# store, which live under the working directory, so the run happens
+# in a temp directory instead of over the real patient history.
+def run_dynamodb_fleet(args):
+
+    os.environ.setdefault("AYUSHCARE_AWS_BACKEND", "local")
+
+    from services.aws_service import save_to_dynamodb, get_dynamo_writer
+
+    stats = FleetStats()
+
+    rng = random.Random(args.seed)
+
+    readings = max(1, int(args.rate * args.duration))
+
+    previous = os.getcwd()
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        os.chdir(tmp)
+
+        try:
+
+            for _ in range(readings):
+
+                for i in range(args.devices):
+
+                    payload = make_payload(f"P{i:05d}", rng, args.abnormal_rate)
+
+                    vitals = dict(payload, bp="120/80", respiratory_rate=18)
+
+                    start = time.perf_counter()
+                    save_to_dynamodb(payload["patient_id"], vitals)
+                    stats.send_latencies.append(time.perf_counter() - start)
+
+                    stats.record(payload)
+
+            writer = get_dynamo_writer()
+            writer.flush()
+
+        finally:
+            os.chdir(previous)
+
+    report = stats.report()
+    report["writer"] = writer.stats()
+
+    return report
+
+
+# --------------------------------------------------------------
+# ENTRY POINT
+# --------------------------------------------------------------
+def main():
+
+    parser = argparse.ArgumentParser(
+        description="Emulate a fleet of AyushCare ESP32 devices."
+    )
+
+    parser.add_argument(
+        "--target",
+        choices=["http", "mqtt", "lambda", "dynamodb"],
+        default="http"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--devices", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=0.2,
+                        help="readings per second per device")
+    parser.add_argument("--jitter", type=float, default=0.1,
+                        help="+/- fraction applied to each interval")
+    parser.add_argument("--burst-every", type=float, default=0,
+                        help="seconds between bursts, 0 disables")
+    parser.add_argument("--burst-size", type=int, default=10)
+    parser.add_argument("--abnormal-rate", type=float, default=0.05)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--probes", type=int, default=50)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--ecg-devices", type=int, default=0,
+                        help="devices that also stream 250 Hz ECG (http/mqtt)")
+    parser.add_argument("--ecg-batch", type=int, default=25,
+                        help="ECG samples per message")
+    parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    if args.target in ("http", "mqtt"):
+
+        if args.port is None:
+            args.port = 8080 if args.target == "http" else 1883
+
+        report = asyncio.run(run_network_fleet(args))
+
+    elif args.target == "lambda":
+
+        report = run_lambda_fleet(args)
+
+    else:
+
+        report = run_dynamodb_fleet(args)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import streamlit as st
 
+from functools import partial, wraps
+from uuid import uuid4
+
 from components.sidebar import render_sidebar
 
 from components.status_card import (
@@ -41,6 +44,10 @@ from components.emergency import (
     render_timeline
 )
 
+from components.notification_center import (
+    render_notification_center
+)
+
 from components.patient_monitor import (
     render_patient_monitor,
     render_download
@@ -51,41 +58,125 @@ from services.data_loader import (
     upload_csv
 )
 
+from services.ward_service import (
+    frame_from_json,
+    frame_from_csv,
+    frame_from_history,
+    latest_vitals
+)
+
+from services.aws_clients import (
+    using_local_backend
+)
+
 from services.aws_service import (
-    save_to_dynamodb
+    save_to_dynamodb,
+    send_emergency_alert
 )
 
 from services.alerts import (
-    calculate_risk
+    calculate_risk,
+    get_alerts
+)
+
+from services.notification_service import (
+    save_alert,
+    load_alerts
 )
 
 from services.pdf_service import (
-    generate_report
+    get_report_bytes,
+    build_ward_archive
 )
 
-st.markdown("""
-<style>
+from services.history_service import (
+    load_history,
+    load_history_window
+)
 
-@media (max-width: 768px) {
+from services.live_bus import (
+    ALERTS_TOPIC,
+    DEVICE_SOURCE,
+    JSON_SOURCE,
+    create_live_bus
+)
 
-    h1 {
-        font-size: 2rem !important;
-    }
+from services.timeseries_store import now_ms
 
-    .block-container {
-        padding: 1rem !important;
-    }
+from services.ml_service import warm_up
 
+from services.perf import timed, flush
+
+from components.perf_panel import (
+    render_perf_panel
+)
+
+
+# Seconds between reruns of each live section. Everything else on
+# the page renders once per interaction instead of on a timer.
+LIVE_REFRESH_SECONDS = 5
+FEED_REFRESH_SECONDS = 5
+WARD_REFRESH_SECONDS = 10
+HISTORY_REFRESH_SECONDS = 30
+
+# Live bus source for each data source; uploaded CSVs never change.
+LIVE_SOURCES = {
+    "Local JSON": JSON_SOURCE,
+    "Live Devices": DEVICE_SOURCE
 }
 
-</style>
-""", unsafe_allow_html=True)
+
+# --------------------------------------------------------------
+# LIVE BUS
+# --------------------------------------------------------------
+# One hub per server process, shared by every session. Sessions
+# read live data through it, so each update is read from disk once
+# however many dashboards are open.
+@st.cache_resource
+def get_live_bus():
+
+    return create_live_bus()
+
+
+# The risk model loads on a background thread when the first
+# dashboard opens in this process, not on a session's first
+# prediction.
+@st.cache_resource
+def warm_up_model():
+
+    warm_up()
+
+    return True
+
 
 # --------------------------------------------------------------
 # DASHBOARD PAGE
 # --------------------------------------------------------------
 def page_dashboard():
 
+    warm_up_model()
+
+    # ----------------------------------------------------------
+    # MOBILE LAYOUT
+    # ----------------------------------------------------------
+    st.markdown("""
+    <style>
+
+    @media (max-width: 768px) {
+
+        h1 {
+            font-size: 2rem !important;
+        }
+
+        .block-container {
+            padding: 1rem !important;
+        }
+
+    }
+
+    </style>
+    """, unsafe_allow_html=True)
+
     # ----------------------------------------------------------
     # WELCOME CARD
     # ----------------------------------------------------------
@@ -174,7 +265,12 @@ def page_dashboard():
     c1, c2, c3, c4 = st.columns(4)
 
     with c1:
-        st.success("☁ AWS Connected")
+
+        if using_local_backend():
+            st.warning("☁ AWS not configured: data stays local")
+
+        else:
+            st.success("☁ AWS Connected")
 
     with c2:
         st.success("📡 IoT Active")
@@ -188,17 +284,20 @@ def page_dashboard():
     # ----------------------------------------------------------
     # SIDEBAR
     # ----------------------------------------------------------
-    dark_mode, data_source, show_gauge = (
-        render_sidebar()
-    )
+    with timed("render_sidebar"):
+        dark_mode, data_source, show_gauge = (
+            render_sidebar()
+        )
 
     # ----------------------------------------------------------
     # LOAD DATA
     # ----------------------------------------------------------
+    # Subscribing first brings the bus up to date if it went idle.
+    subscribe_live(data_source)
     
     if data_source == "Local JSON":
     
-        data = load_json_data()
+        data = get_live_bus().get(JSON_SOURCE, load_json_data)
     
         patients = list(data.keys())
     
@@ -208,6 +307,8 @@ def page_dashboard():
         )
     
         vitals = data[selected]
+
+        ward_frame = current_ward_frame(data_source, None)
     
     elif data_source == "Upload CSV":
     
@@ -242,80 +343,367 @@ def page_dashboard():
                 "bp": latest["bp"],
                 "respiratory_rate": latest["respiratory_rate"]
             }
+
+            ward_frame = frame_from_csv(csv_df)
     
         else:
     
             st.warning("📂 Upload a CSV file to continue")
             st.stop()
 
-    # ----------------------------------------------------------
-    # SAVE TO AWS
-    # ----------------------------------------------------------
-    save_to_dynamodb(selected, vitals)
+    elif data_source == "Live Devices":
+
+        # Readings posted to the ingestion gateway
+        # (python -m services.ingestion_gateway).
+        ward_frame = current_ward_frame(data_source, None)
+
+        if ward_frame.empty:
+
+            st.warning("📡 No device readings received yet")
+
+            wait_for_devices()
+            st.stop()
+
+        selected = st.sidebar.selectbox(
+            "👤 Select Patient",
+            list(ward_frame.index)
+        )
+
+        vitals = ward_frame.loc[selected].to_dict()
 
     # ----------------------------------------------------------
     # RISK CALCULATION
     # ----------------------------------------------------------
-    (
-        risk_score,
-        risk_level,
-        risk_color,
-        patient_status
-    ) = calculate_risk(vitals)
+    # The static sections below (AI predictions) follow this risk
+    # level; the live status tile reruns the page when it changes.
+    with timed("calculate_risk"):
+        risk_level = calculate_risk(vitals)[1]
 
     # ----------------------------------------------------------
-    # STATUS CARD
+    # PATIENT STATUS (live)
     # ----------------------------------------------------------
-    render_status_card(
-        risk_score,
+    render_live_status(
+        data_source,
+        selected,
+        vitals,
         risk_level,
-        risk_color,
-        patient_status,
         show_gauge
     )
 
     # ----------------------------------------------------------
-    # EMERGENCY MODE
+    # NOTIFICATION CENTER + MULTI PATIENT MONITOR (live)
     # ----------------------------------------------------------
-    render_emergency(risk_level)
-    if risk_level == "Critical":
-    
-        play_voice_alert(
-            f"Emergency detected for patient {selected}"
+    render_live_ward(data_source, ward_frame)
+
+    # ----------------------------------------------------------
+    # LIVE DEVICE FEED (live)
+    # ----------------------------------------------------------
+    render_live_feed()
+
+    # ----------------------------------------------------------
+    # METRICS (live)
+    # ----------------------------------------------------------
+    if show_gauge:
+        render_live_metrics(data_source, selected, vitals)
+
+    # ----------------------------------------------------------
+    # ECG MONITOR
+    # ----------------------------------------------------------
+    # The traces refresh in their own fragment every
+    # ECG_REFRESH_SECONDS.
+    with timed("render_ecg"):
+        render_ecg(selected)
+
+    # ----------------------------------------------------------
+    # VITALS CHART (live)
+    # ----------------------------------------------------------
+    render_live_vitals_chart(data_source, selected, vitals)
+
+    # ----------------------------------------------------------
+    # HEALTH COVERAGE MAP
+    # ----------------------------------------------------------
+    with timed("render_health_map"):
+        render_health_map()
+
+    st.success(
+        "🏡 Rural Healthcare Coverage Expanded Across Multiple Villages"
+    )
+    # ----------------------------------------------------------
+    # HISTORY DASHBOARD (live)
+    # ----------------------------------------------------------
+    render_live_history(selected)
+
+    # ----------------------------------------------------------
+    # AI PREDICTIONS
+    # ----------------------------------------------------------
+    with timed("render_ai_predictions"):
+        render_ai_predictions(risk_level)
+
+    # ----------------------------------------------------------
+    # DOCTOR NOTES
+    # ----------------------------------------------------------
+    with timed("render_doctor_notes"):
+        render_doctor_notes(selected)
+
+    # ----------------------------------------------------------
+    # DOWNLOAD REPORT (live)
+    # ----------------------------------------------------------
+    render_live_downloads(data_source, selected, vitals, ward_frame)
+
+    # ----------------------------------------------------------
+    # DARK MODE
+    # ----------------------------------------------------------
+    if dark_mode:
+
+        st.markdown(
+            """
+            <style>
+
+            .stApp {
+                background: linear-gradient(
+                    135deg,
+                    #0f172a,
+                    #111827
+                );
+
+                color:white !important;
+            }
+
+            </style>
+            """,
+            unsafe_allow_html=True
+        )
+
+    render_perf_panel()
+
+    render_footer()
+
+
+# --------------------------------------------------------------
+# LIVE SECTIONS
+# --------------------------------------------------------------
+# Each live section is a fragment that reruns on its own timer
+# without rerunning the rest of the page. Fragment reruns skip
+# app.py, so the section is timed and perf samples are flushed
+# here.
+def live_fragment(name, run_every):
+
+    def decorate(body):
+
+        @wraps(body)
+        def run(*args):
+
+            try:
+                with timed(name):
+                    body(*args)
+
+            finally:
+                flush()
+
+        return st.fragment(run, run_every=run_every)
+
+    return decorate
+
+
+# Arguments are the values read by the last full rerun; the
+# fragments read the newest readings from the live bus, which
+# loads them once per update for all sessions.
+def current_vitals(data_source, selected, vitals):
+
+    bus = get_live_bus()
+
+    if data_source == "Local JSON":
+        return bus.get(
+            (JSON_SOURCE, selected),
+            lambda: load_json_data().get(selected, vitals)
         )
-    render_timeline()
+
+    if data_source == "Live Devices":
+        return bus.get(
+            (DEVICE_SOURCE, selected),
+            lambda: latest_vitals(selected)
+        ) or vitals
+
+    return vitals
+
+
+def current_ward_frame(data_source, ward_frame):
+
+    bus = get_live_bus()
+
+    if data_source == "Local JSON":
+        return bus.get(
+            JSON_SOURCE,
+            lambda: frame_from_json(load_json_data()),
+            key="frame"
+        )
+
+    if data_source == "Live Devices":
+        return bus.get(DEVICE_SOURCE, frame_from_history, key="frame")
+
+    return ward_frame
+
+
+# Every reading lands in the device store, so the history chart
+# follows the patient's device topic whatever the data source.
+def load_live_history(patient_id, range_ms):
+
+    return get_live_bus().get(
+        (DEVICE_SOURCE, patient_id),
+        lambda: load_history_window(patient_id, now_ms() - range_ms),
+        key=("history", range_ms)
+    )
+
+
+# Renewed on every refresh; the bus stops watching once a closed
+# session's subscription expires.
+def subscribe_live(data_source, selected=None):
+
+    subscriber = st.session_state.setdefault("live_subscriber", uuid4().hex)
+
+    topics = [ALERTS_TOPIC]
+
+    source = LIVE_SOURCES.get(data_source)
+
+    if source is not None:
+        topics.append(source)
+
+    if selected is not None:
+
+        topics.append((DEVICE_SOURCE, selected))
+
+        if source is not None:
+            topics.append((source, selected))
+
+    get_live_bus().subscribe(subscriber, topics)
+
+
+@live_fragment("live_status", LIVE_REFRESH_SECONDS)
+def render_live_status(
+    data_source,
+    selected,
+    vitals,
+    page_risk_level,
+    show_gauge
+):
+
+    subscribe_live(data_source, selected)
+
+    vitals = current_vitals(data_source, selected, vitals)
 
     # ----------------------------------------------------------
-    # NOTIFICATION CENTER
+    # RISK CALCULATION
     # ----------------------------------------------------------
-    
-    st.subheader("🔔 Notification Center")
-    
-    notifications = [
-    
-        "AWS Sync Successful",
-    
-        "Vitals Received",
-    
-        "AI Analysis Completed",
-    
-        "Doctor Review Pending"
-    
-    ]
-    
-    for n in notifications:
-    
-        st.info(n)
-        
+    with timed("calculate_risk"):
+        (
+            risk_score,
+            risk_level,
+            risk_color,
+            patient_status
+        ) = calculate_risk(vitals)
+
+    # The static sections were rendered for another risk level.
+    if risk_level != page_risk_level:
+        st.rerun()
+
+    # ----------------------------------------------------------
+    # SAVE TO AWS
+    # ----------------------------------------------------------
+    # Live device readings are already stored by the gateway. JSON
+    # readings are saved once per update, not by every viewer on
+    # every refresh; an uploaded CSV once per session.
+    source = LIVE_SOURCES.get(data_source)
+
+    if source is not None:
+
+        new_reading = get_live_bus().once((source, selected), "reading")
+
+    else:
+
+        saved = st.session_state.setdefault("saved_vitals", {})
+
+        new_reading = saved.get(selected) != vitals
+
+        saved[selected] = vitals
+
+    if new_reading and data_source != "Live Devices":
+        save_to_dynamodb(selected, vitals)
+
     # ----------------------------------------------------------
-    # MULTI PATIENT MONITOR
+    # STATUS CARD
     # ----------------------------------------------------------
-    render_patient_monitor()
+    with timed("render_status_card"):
+        render_status_card(
+            risk_score,
+            risk_level,
+            risk_color,
+            patient_status,
+            show_gauge
+        )
+
+    # ----------------------------------------------------------
+    # EMERGENCY MODE
+    # ----------------------------------------------------------
+    with timed("render_emergency"):
+        render_emergency(risk_level)
+
+    if risk_level == "Critical":
+
+        with timed("play_voice_alert"):
+            play_voice_alert(
+                f"Emergency detected for patient {selected}"
+            )
+
+    with timed("render_timeline"):
+        render_timeline()
 
     # ----------------------------------------------------------
-    # LIVE DEVICE FEED
+    # ALERTS
     # ----------------------------------------------------------
-    render_device_feed()
+    # Alerts are raised once per new reading, by whichever viewer
+    # sees it first; repeats across readings are folded away by the
+    # notification store. Critical alerts that are actually stored
+    # also go out by SMS through the background dispatcher, so
+    # repeats never page anyone twice.
+    if not new_reading:
+        return
+
+    patient_alerts = get_alerts(vitals)
+
+    if risk_level == "Critical":
+        patient_alerts.append(
+            ("Risk", "critical", f"Critical risk score {risk_score}")
+        )
+
+    with timed("save_alert"):
+
+        for rule, severity, message in patient_alerts:
+
+            stored = save_alert(selected, severity, message, rule)
+
+            if stored and severity == "critical":
+                send_emergency_alert(message, selected)
+
+
+@live_fragment("live_ward", WARD_REFRESH_SECONDS)
+def render_live_ward(data_source, ward_frame):
+
+    with timed("render_notification_center"):
+        render_notification_center(
+            get_live_bus().get(ALERTS_TOPIC, load_alerts)
+        )
+
+    with timed("render_patient_monitor"):
+        render_patient_monitor(
+            current_ward_frame(data_source, ward_frame)
+        )
+
+
+@live_fragment("live_feed", FEED_REFRESH_SECONDS)
+def render_live_feed():
+
+    with timed("render_device_feed"):
+        render_device_feed()
 
     import random
     
@@ -347,53 +735,47 @@ def page_dashboard():
         "Signal Quality: Excellent"
     )
 
-    # ----------------------------------------------------------
-    # METRICS
-    # ----------------------------------------------------------
-    if show_gauge:
+
+@live_fragment("live_metrics", LIVE_REFRESH_SECONDS)
+def render_live_metrics(data_source, selected, vitals):
+
+    vitals = current_vitals(data_source, selected, vitals)
+
+    risk_score, risk_level = calculate_risk(vitals)[:2]
+
+    with timed("render_metrics"):
         render_metrics(
             vitals,
             risk_level,
             risk_score
         )
 
-    # ----------------------------------------------------------
-    # ECG MONITOR
-    # ----------------------------------------------------------
-    render_ecg()
 
-    # ----------------------------------------------------------
-    # VITALS CHART
-    # ----------------------------------------------------------
-    render_vitals_chart(vitals)
+@live_fragment("live_vitals_chart", LIVE_REFRESH_SECONDS)
+def render_live_vitals_chart(data_source, selected, vitals):
 
-    # ----------------------------------------------------------
-    # HEALTH COVERAGE MAP
-    # ----------------------------------------------------------
-    render_health_map()
+    with timed("render_vitals_chart"):
+        render_vitals_chart(
+            current_vitals(data_source, selected, vitals)
+        )
 
-    st.success(
-        "🏡 Rural Healthcare Coverage Expanded Across Multiple Villages"
-    )
-    # ----------------------------------------------------------
-    # HISTORY DASHBOARD
-    # ----------------------------------------------------------
-    render_history(selected)
 
-    # ----------------------------------------------------------
-    # AI PREDICTIONS
-    # ----------------------------------------------------------
-    render_ai_predictions(risk_level)
+@live_fragment("live_history", HISTORY_REFRESH_SECONDS)
+def render_live_history(selected):
 
-    # ----------------------------------------------------------
-    # DOCTOR NOTES
-    # ----------------------------------------------------------
-    render_doctor_notes(selected)
+    with timed("render_history"):
+        render_history(selected, load_window=load_live_history)
 
-    # ----------------------------------------------------------
-    # DOWNLOAD REPORT
-    # ----------------------------------------------------------
-    render_download(selected, vitals)
+
+@live_fragment("live_downloads", LIVE_REFRESH_SECONDS)
+def render_live_downloads(data_source, selected, vitals, ward_frame):
+
+    vitals = current_vitals(data_source, selected, vitals)
+
+    risk_score, risk_level = calculate_risk(vitals)[:2]
+
+    with timed("render_download"):
+        render_download(selected, vitals)
     
     report_data = {
     
@@ -415,71 +797,65 @@ def page_dashboard():
             vitals["respiratory_rate"]
     }
     
-    generate_report(
-        "patient_report.pdf",
-        report_data
+    # The PDF is only built when the button is clicked, and then
+    # served from the in-memory cache for unchanged vitals.
+    st.download_button(
+        "📄 Download PDF Report",
+        partial(get_report_bytes, report_data),
+        file_name="patient_report.pdf",
+        mime="application/pdf"
     )
-    
-    with open(
-        "patient_report.pdf",
-        "rb"
-    ) as pdf:
-    
-        st.download_button(
-            "📄 Download PDF Report",
-            pdf,
-            file_name="patient_report.pdf",
-            mime="application/pdf"
-        )
-    # ----------------------------------------------------------
-    # DARK MODE
-    # ----------------------------------------------------------
-    if dark_mode:
 
-        st.markdown(
-            """
-            <style>
+    # End-of-shift reports for every patient on the ward, rendered
+    # in a process pool when the button is clicked.
+    st.download_button(
+        "📦 Download Ward Reports (ZIP)",
+        lambda: build_ward_archive(
+            current_ward_frame(data_source, ward_frame).to_dict("index"),
+            load_history()
+        ),
+        file_name="ward_reports.zip",
+        mime="application/zip"
+    )
 
-            .stApp {
-                background: linear-gradient(
-                    135deg,
-                    #0f172a,
-                    #111827
-                );
 
-                color:white !important;
-            }
+# Polls until the first device reading arrives, then reruns the
+# whole page to leave the waiting screen.
+@st.fragment(run_every=WARD_REFRESH_SECONDS)
+def wait_for_devices():
 
-            </style>
-            """,
-            unsafe_allow_html=True
-        )
+    subscribe_live("Live Devices")
 
-# ----------------------------------------------------------
+    if not current_ward_frame("Live Devices", None).empty:
+        st.rerun()
+
+
+# --------------------------------------------------------------
 # FOOTER
-# ----------------------------------------------------------
+# --------------------------------------------------------------
+def render_footer():
 
-st.markdown("---")
+    st.markdown("---")
 
-st.markdown(
-"""
-<div style='
-text-align:center;
-padding:20px;
-color:#666;
-'>
+    st.markdown(
+        """
+        <div style='
+        text-align:center;
+        padding:20px;
+        color:#666;
+        '>
 
-🌿 AyushCare v2.0
+        🌿 AyushCare v2.0
 
-<br>
+        <br>
 
-AWS + IoT + AI Rural Healthcare Platform
+        AWS + IoT + AI Rural Healthcare Platform
 
-<br><br>
+        <br><br>
 
-Built by K.N.V. Sai Meghana
+        Built by K.N.V. Sai Meghana
 
-</div>
-""",
-unsafe_allow_html=True
-)
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
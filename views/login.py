@@ -1,8 +1,8 @@
 import streamlit as st
 import time
 from services.auth_service import (
-    load_users,
-    verify_password
+    get_user,
+    authenticate
 )
 
 def page_login():
@@ -30,17 +30,17 @@ def page_login():
 
     remember = st.checkbox("Remember Me")
 
-    users = load_users()
-
     if st.button("🚀 Login"):
 
-        if username in users:
+        if get_user(username):
+
+            user = authenticate(username, password)
 
-            if verify_password(password,users[username]["password"]):
+            if user:
 
                 st.success("✅ Login Successful")
 
-                st.session_state.current_user = users[username]["name"]
+                st.session_state.current_user = user["name"]
 
                 time.sleep(1)
 
@@ -3,9 +3,9 @@ import time
 import re
 
 from services.auth_service import (
-    load_users,
-    save_users,
-    hash_password
+    get_user,
+    email_registered,
+    register_user
 )
 
 def page_register():
@@ -44,8 +44,6 @@ def page_register():
         type="password"
     )
 
-    users = load_users()
-
     if st.button("✨ Create Account"):
 
         if not all([
@@ -58,10 +56,14 @@ def page_register():
 
             st.error("Please fill all fields")
 
-        elif username in users:
+        elif get_user(username):
 
             st.error("Username already exists")
 
+        elif email_registered(email):
+
+            st.error("Email already registered")
+
         elif password != confirm_password:
 
             st.error("Passwords do not match")
@@ -79,15 +81,12 @@ def page_register():
 
             st.warning("Enter valid email address")
 
-        else:
+        elif not register_user(username, full_name, email, password):
 
-            users[username] = {
-                "name": full_name,
-                "email": email,
-                "password": hash_password(password)
-            }
+            # Taken by another session since the checks above.
+            st.error("Username or email already registered")
 
-            save_users(users)
+        else:
 
             st.success("🎉 Account Created Successfully")
 